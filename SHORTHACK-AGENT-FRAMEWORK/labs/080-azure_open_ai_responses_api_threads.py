@@ -1,6 +1,8 @@
 # Copyright (c) Microsoft. All rights reserved.
 
 import asyncio
+import sys
+from pathlib import Path
 from random import randint
 from typing import Annotated
 
@@ -9,11 +11,16 @@ from agent_framework.azure import AzureOpenAIResponsesClient
 from azure.identity import AzureCliCredential
 from pydantic import Field
 
+sys.path.insert(0, str(Path(__file__).parent.parent / "resources"))
+
+from thread_store import SQLiteChatMessageStore  # noqa: E402
+
 """
 Azure OpenAI Responses Client with Thread Management Example
 
 This sample demonstrates thread management with Azure OpenAI Responses Client, comparing
-automatic thread creation with explicit thread management for persistent context.
+automatic thread creation with explicit thread management for persistent context,
+kept in memory, on the server, or in a local SQLite database that survives restarts.
 """
 from dotenv import load_dotenv
 load_dotenv()
@@ -134,12 +141,57 @@ async def example_with_existing_thread_id() -> None:
         print("Note: The agent continues the conversation from the previous thread by using thread ID.\n")
 
 
+async def example_with_thread_persistence_on_disk() -> None:
+    """
+    Example showing a thread whose messages are stored in a local SQLite database.
+    The conversation survives restarts: a new agent instance, or a new process,
+    continues it by opening the store with the same thread ID.
+    """
+    print("=== Thread Persistence Example (Local SQLite) ===")
+
+    agent = ChatAgent(
+        chat_client=AzureOpenAIResponsesClient(credential=AzureCliCredential()),
+        instructions="You are a helpful weather agent.",
+        tools=get_weather,
+    )
+
+    store = SQLiteChatMessageStore(thread_id="weather-lab-080")
+    await store.clear()
+    thread = AgentThread(message_store=store)
+
+    query1 = "What's the weather in Berlin?"
+    print(f"User: {query1}")
+    result1 = await agent.run(query1, thread=thread)
+    print(f"Agent: {result1.text}")
+    store.close()
+
+    print("\n--- Continuing with the same thread ID in a new agent instance ---")
+
+    agent = ChatAgent(
+        chat_client=AzureOpenAIResponsesClient(credential=AzureCliCredential()),
+        instructions="You are a helpful weather agent.",
+        tools=get_weather,
+    )
+
+    # Opening the store reads nothing until the agent asks for the messages
+    store = SQLiteChatMessageStore(thread_id="weather-lab-080")
+    thread = AgentThread(message_store=store)
+
+    query2 = "What was the last city I asked about?"
+    print(f"User: {query2}")
+    result2 = await agent.run(query2, thread=thread)
+    print(f"Agent: {result2.text}")
+    store.close()
+    print("Note: The agent continues the conversation from messages stored on disk, with no server-side state.\n")
+
+
 async def main() -> None:
     print("=== Azure OpenAI Response Client Agent Thread Management Examples ===\n")
 
     await example_with_automatic_thread_creation()
     await example_with_thread_persistence_in_memory()
     await example_with_existing_thread_id()
+    await example_with_thread_persistence_on_disk()
 
 
 if __name__ == "__main__":
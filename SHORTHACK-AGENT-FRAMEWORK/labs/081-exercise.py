@@ -14,6 +14,7 @@ Example regulation is in file resources/regulation.pdf.
 Complying specification is in file resources/specification1.pdf, and non-complying specification is in file resources/specificaiton2.pdf
 The agent should use 2 tools, one for reading specifications, and one for reading regulations.
 User should ask the agent for compliance check for given specification number.
+Hint: read_pdf_text in resources/document_cache.py returns the text of a PDF.
 """
 from dotenv import load_dotenv
 load_dotenv()
@@ -1,16 +1,28 @@
 # Copyright (c) Microsoft. All rights reserved.
 
 import asyncio
+import sys
 from pathlib import Path
 
 from agent_framework import ChatAgent, HostedFileSearchTool, HostedVectorStoreContent
 from agent_framework_azure_ai import AzureAIAgentClient
-from azure.ai.agents.models import FileInfo, VectorStore
 from azure.identity.aio import AzureCliCredential
 
+sys.path.insert(0, str(Path(__file__).parent.parent / "resources"))
+
+from vector_store_cache import VectorStoreCache  # noqa: E402
+
 """
 The following sample demonstrates how to create a simple, Azure AI agent that
 uses a file search tool to answer user questions.
+
+The uploaded file and its vector store are kept between runs and recorded in
+resources/.vector_stores.json, so later runs reuse them while employees.pdf is
+unchanged instead of uploading and indexing it again. Vector stores unused for
+a week, and files no vector store uses any more, are deleted at the start of a run.
+
+To answer without a remote vector store, pass search_documents from
+resources/local_retriever.py as the agent's tools instead of file_search_tool.
 """
 
 
@@ -25,26 +37,20 @@ USER_INPUTS = [
 async def main() -> None:
     """Main function demonstrating Azure AI agent with file search capabilities."""
     client = AzureAIAgentClient(async_credential=AzureCliCredential())
-    file: FileInfo | None = None
-    vector_store: VectorStore | None = None
 
     try:
-        # 1. Upload file and create vector store
-        pdf_file_path = Path(__file__).parent.parent / "resources" / "employees.pdf"
-        print(f"Uploading file from: {pdf_file_path}")
-
-        file = await client.agents_client.files.upload_and_poll(
-            file_path=str(pdf_file_path), purpose="assistants"
-        )
-        print(f"Uploaded file, file ID: {file.id}")
+        # 1. Reuse the uploaded file and vector store, uploading and indexing only when the file changed
+        cache = VectorStoreCache(client.agents_client)
+        deleted = await cache.collect_garbage()
+        if deleted["vector_stores"] or deleted["files"]:
+            print(f"Deleted unused vector stores {deleted['vector_stores']} and files {deleted['files']}")
 
-        vector_store = await client.agents_client.vector_stores.create_and_poll(
-            file_ids=[file.id], name="my_vectorstore"
-        )
-        print(f"Created vector store, vector store ID: {vector_store.id}")
+        pdf_file_path = Path(__file__).parent.parent / "resources" / "employees.pdf"
+        vector_store_id = await cache.vector_store("my_vectorstore", [pdf_file_path])
+        print(f"Using vector store ID: {vector_store_id}")
 
         # 2. Create file search tool with uploaded resources
-        file_search_tool = HostedFileSearchTool(inputs=[HostedVectorStoreContent(vector_store_id=vector_store.id)])
+        file_search_tool = HostedFileSearchTool(inputs=[HostedVectorStoreContent(vector_store_id=vector_store_id)])
 
         # 3. Create an agent with file search capabilities
         # The tool_resources are automatically extracted from HostedFileSearchTool
@@ -62,31 +68,8 @@ async def main() -> None:
                 print(f"# User: '{user_input}'")
                 response = await agent.run(user_input)
                 print(f"# Agent: {response.text}")
-
-            # 5. Cleanup: Delete the vector store and file
-            try:
-                if vector_store:
-                    await client.agents_client.vector_stores.delete(vector_store.id)
-                if file:
-                    await client.agents_client.files.delete(file.id)
-            except Exception:
-                # Ignore cleanup errors to avoid masking issues
-                pass
     finally:
-        # 6. Cleanup: Delete the vector store and file in case of eariler failure to prevent orphaned resources.
-
-        # Refreshing the client is required since chat agent closes it
-        client = AzureAIAgentClient(async_credential=AzureCliCredential())
-        try:
-            if vector_store:
-                await client.agents_client.vector_stores.delete(vector_store.id)
-            if file:
-                await client.agents_client.files.delete(file.id)
-        except Exception:
-            # Ignore cleanup errors to avoid masking issues
-            pass
-        finally:
-            await client.close()
+        await client.close()
 
 
 if __name__ == "__main__":
@@ -10,6 +10,8 @@ from pydantic import Field
 
 """
 Exercise: Write a weather agent using devui, with conversation state preserved across executions.
+Hint: resources/thread_store.py provides SQLiteChatMessageStore, a message store for AgentThread
+that keeps the conversation in a local database.
 """
 from dotenv import load_dotenv
 load_dotenv()
@@ -0,0 +1,140 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Benchmark of the local retriever against the hosted file search tool.
+
+Runs labelled questions about the resources documents through the local
+retriever in BM25, dense and hybrid mode and prints the index build time, the
+query latency percentiles of top-k searches and the quality of the ranking of
+all chunks: hit@1, the share of questions whose first passage holds an expected
+fact, and the mean reciprocal rank (MRR) of the first passage that does. The
+documents make only a few chunks, so recall@k would be 1.00 for any k near
+their number and is not reported.
+
+With --hosted it also asks an Azure AI agent the same questions twice, once with
+HostedFileSearchTool over a vector store of the documents and once with the local
+search_documents tool, and prints the time to answer and the share of expected
+facts in the answers. The hosted tool does not return the passages it retrieved
+to ChatAgent, so the two are compared on their answers. Needs `az login` and the
+settings of lab 100.
+
+Usage:
+    python resources/bench_retrieval.py --top-k 5 --repeat 200 [--hosted]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from local_retriever import HybridRetriever, get_retriever, search_documents
+
+RESOURCES = Path(__file__).parent
+
+# Questions with the facts a good answer, or the passages behind it, must contain
+QUERIES: List[Tuple[str, List[str]]] = [
+    ("Who is the youngest employee?", ["Age: 28", "Age: 24", "Age: 35"]),
+    ("Who works in sales?", ["Alice Johnson"]),
+    ("Which department is Bob Wilson in?", ["Marketing"]),
+    ("How old is John Smith?", ["28"]),
+    ("What is the maximum speed allowed by the regulation?", ["120 kilometers"]),
+    ("Which vehicle has a V8 engine?", ["V8"]),
+    ("How fast can the high performance vehicle go?", ["280 km/h"]),
+    ("Is the speed limiter of specification 1 tamper-proof?", ["tamper-proof"]),
+    ("What happens to manufacturers that do not comply?", ["license revocation"]),
+    ("Which languages does Microsoft Agent Framework support?", [".NET", "Python"]),
+]
+
+
+def recall(text: str, facts: List[str]) -> float:
+    return sum(fact.lower() in text.lower() for fact in facts) / len(facts)
+
+
+def first_relevant_rank(texts: List[str], facts: List[str]) -> int | None:
+    """Return the 1-based rank of the first passage holding an expected fact, None if none does."""
+    return next((rank for rank, text in enumerate(texts, 1) if recall(text, facts) > 0), None)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_local(retriever: HybridRetriever, top_k: int, repeat: int) -> None:
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'hit@1':>10}{'MRR':>10}")
+    for mode in ("bm25", "dense", "hybrid"):
+        latencies, ranks = [], []
+        for query, facts in QUERIES:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                retriever.search(query, top_k, mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            ranking = retriever.search(query, len(retriever.chunks), mode)
+            ranks.append(first_relevant_rank([chunk.text for chunk, _ in ranking], facts))
+        print(
+            f"{mode:<10}{percentile(latencies, 0.5):>10.3f}{percentile(latencies, 0.99):>10.3f}"
+            f"{statistics.mean(rank == 1 for rank in ranks):>10.2f}"
+            f"{statistics.mean(1 / rank if rank else 0 for rank in ranks):>10.2f}"
+        )
+
+
+async def bench_hosted() -> None:
+    from agent_framework import ChatAgent, HostedFileSearchTool, HostedVectorStoreContent
+    from agent_framework_azure_ai import AzureAIAgentClient
+    from azure.identity.aio import AzureCliCredential
+    from dotenv import load_dotenv
+    from vector_store_cache import VectorStoreCache
+
+    load_dotenv()
+    instructions = "Answer questions about the employees, the regulation and the vehicle specifications."
+
+    async def ask(name: str, tools: object, setup_seconds: float) -> None:
+        seconds, recalls = [], []
+        async with ChatAgent(chat_client=make_client(), name=name, instructions=instructions, tools=tools) as agent:
+            for query, facts in QUERIES:
+                start = time.perf_counter()
+                response = await agent.run(query)
+                seconds.append(time.perf_counter() - start)
+                recalls.append(recall(response.text, facts))
+        print(
+            f"{name:<24}{setup_seconds:>10.2f}{statistics.median(seconds):>10.2f}{max(seconds):>10.2f}"
+            f"{statistics.mean(recalls):>10.2f}"
+        )
+
+    def make_client() -> AzureAIAgentClient:
+        return AzureAIAgentClient(async_credential=AzureCliCredential())
+
+    print(f"\n{'agent':<24}{'setup s':>10}{'p50 s':>10}{'max s':>10}{'recall':>10}")
+    start = time.perf_counter()
+    client = make_client()
+    vector_store_id = await VectorStoreCache(client.agents_client).vector_store(
+        "bench_retrieval", sorted(RESOURCES.glob("*.pdf"))
+    )
+    await client.close()
+    hosted = HostedFileSearchTool(inputs=[HostedVectorStoreContent(vector_store_id=vector_store_id)])
+    await ask("HostedFileSearchTool", hosted, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    get_retriever()
+    await ask("search_documents", search_documents, time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    retriever = HybridRetriever.from_documents()
+    elapsed = (time.perf_counter() - start) * 1000
+    dense = "with" if retriever.dense is not None else "without NumPy, no"
+    print(f"Indexed {len(retriever.chunks)} chunks in {elapsed:.1f} ms ({dense} dense index)\n")
+    bench_local(retriever, args.top_k, args.repeat)
+    if args.hosted:
+        asyncio.run(bench_hosted())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--hosted", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,274 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+History reducers bounding what an agent sends of a long thread
+
+Every agent.run(query, thread=thread) sends the thread's whole history, so the
+tokens, cost and latency of a turn grow with the length of the conversation.
+ReducingChatMessageStore wraps the message store of a thread and passes the
+history through reducers before it is sent, while the store keeps every message:
+- ToolResultElisionReducer replaces long function results of earlier turns by a
+  short note; the call and its result stay paired
+- SummarizingReducer, once the history exceeds a token threshold, replaces the
+  oldest turns by a summary written by a chat client; summaries are cached and
+  extended rather than rewritten, so a new one is only requested each time the
+  threshold is crossed again
+- SlidingWindowReducer keeps the newest whole turns within a message or token limit
+
+    agent = ChatAgent(
+        chat_client=client,
+        chat_message_store_factory=lambda: ReducingChatMessageStore(
+            reducers=[SummarizingReducer(client, max_tokens=4000), ToolResultElisionReducer()]
+        ),
+    )
+
+The wrapped store defaults to the in-memory ChatMessageStore; pass
+store=SQLiteChatMessageStore(...) from thread_store.py to also keep the thread on disk.
+
+Summarising before eliding keeps the summarised turns identical from one turn
+to the next, which is what the summary cache is keyed on. Tokens are estimated
+from the characters of the messages, about four per token.
+
+The tests check the tokens sent per turn with and without reducers, against a
+fake chat client that counts them:
+    python -m pytest resources/test_context_reducer.py
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, MutableMapping, Protocol, Sequence, Tuple
+
+from agent_framework import (
+    ChatMessage,
+    ChatMessageStore,
+    ChatMessageStoreProtocol,
+    FunctionCallContent,
+    FunctionResultContent,
+    Role,
+    TextContent,
+)
+
+CHARS_PER_TOKEN = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarise the conversation below for the assistant that continues it. Keep the facts, names, numbers, "
+    "decisions and open questions, drop pleasantries. Answer with the summary only."
+)
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, TextContent):
+        return content.text
+    if isinstance(content, FunctionCallContent):
+        arguments = content.arguments if isinstance(content.arguments, str) else json.dumps(content.arguments)
+        return f"{content.name}({arguments})"
+    if isinstance(content, FunctionResultContent):
+        return str(content.result)
+    return ""
+
+
+def estimate_tokens(messages: Sequence[ChatMessage]) -> int:
+    """Approximate number of tokens of the messages' text, function calls and results."""
+    chars = sum(len(_content_text(content)) for message in messages for content in message.contents)
+    return chars // CHARS_PER_TOKEN + 1 if messages else 0
+
+
+def _turn_starts(messages: Sequence[ChatMessage]) -> List[int]:
+    """Indices of the user messages, where a turn starts and the history can be cut."""
+    return [index for index, message in enumerate(messages) if message.role == Role.USER]
+
+
+def _leading_system(messages: Sequence[ChatMessage]) -> int:
+    count = 0
+    while count < len(messages) and messages[count].role == Role.SYSTEM:
+        count += 1
+    return count
+
+
+class HistoryReducer(Protocol):
+    async def reduce(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        """Return the messages to send in place of `messages`, oldest first."""
+        ...
+
+
+class SlidingWindowReducer:
+    """Keeps the newest whole turns within a number of messages and tokens, and any leading system messages."""
+
+    def __init__(self, max_messages: int | None = 40, max_tokens: int | None = None):
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+
+    async def reduce(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        head = _leading_system(messages)
+        starts = [start for start in _turn_starts(messages) if start >= head]
+        # The last turn is always kept, even when it alone is over the limits
+        for start in starts[:-1]:
+            tail = messages[start:]
+            if (self.max_messages is None or head + len(tail) <= self.max_messages) and (
+                self.max_tokens is None or estimate_tokens(messages[:head]) + estimate_tokens(tail) <= self.max_tokens
+            ):
+                return messages[:head] + tail
+        return messages[:head] + messages[starts[-1] :] if starts else messages
+
+
+class ToolResultElisionReducer:
+    """Replaces function results longer than `max_chars` in all but the last `keep_turns` turns by a short note."""
+
+    def __init__(self, keep_turns: int = 1, max_chars: int = 200):
+        self.keep_turns = keep_turns
+        self.max_chars = max_chars
+
+    def _elide(self, message: ChatMessage) -> ChatMessage:
+        contents = []
+        for content in message.contents:
+            if isinstance(content, FunctionResultContent) and len(str(content.result)) > self.max_chars:
+                text = str(content.result)
+                content = FunctionResultContent(
+                    call_id=content.call_id,
+                    result=f"{text[: self.max_chars]}... [{len(text) - self.max_chars} characters elided]",
+                )
+            contents.append(content)
+        return ChatMessage(role=message.role, contents=contents, author_name=message.author_name)
+
+    async def reduce(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        starts = _turn_starts(messages)
+        if len(starts) <= self.keep_turns:
+            return messages
+        boundary = starts[-self.keep_turns] if self.keep_turns else len(messages)
+        return [self._elide(message) for message in messages[:boundary]] + messages[boundary:]
+
+
+class SummarizingReducer:
+    """
+    Replaces the oldest turns by a rolling summary once the history exceeds `max_tokens`.
+
+    A summary covers the turns before a cut and is cached under a hash of those
+    turns. It is reused while the summary and the turns after the cut stay within
+    `max_tokens`; past that, the summary is extended with the turns up to a new
+    cut, leaving the newest turns within `keep_tokens` as they are.
+    """
+
+    def __init__(
+        self,
+        chat_client: Any,
+        max_tokens: int = 4000,
+        keep_tokens: int = 1000,
+        instructions: str = SUMMARY_INSTRUCTIONS,
+        cache: MutableMapping[str, Tuple[int, str]] | None = None,
+        cache_size: int = 128,
+    ):
+        self.chat_client = chat_client
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+        self.instructions = instructions
+        # Hash of the summarised messages -> (their number, summary); may be a persistent mapping
+        self.cache: MutableMapping[str, Tuple[int, str]] = {} if cache is None else cache
+        self.cache_size = cache_size
+        self.summaries = 0
+
+    @staticmethod
+    def _prefix_hashes(messages: Sequence[ChatMessage]) -> List[str]:
+        """Hash of every prefix of the messages: element i covers messages[:i]."""
+        digest = hashlib.sha256()
+        hashes = [digest.hexdigest()]
+        for message in messages:
+            digest.update(message.role.value.encode())
+            for content in message.contents:
+                digest.update(b"\0" + _content_text(content).encode())
+            digest.update(b"\1")
+            hashes.append(digest.copy().hexdigest())
+        return hashes
+
+    async def _summarize(self, summary: str | None, messages: Sequence[ChatMessage]) -> str:
+        lines = [f"Earlier summary: {summary}"] if summary else []
+        lines.extend(
+            f"{message.role.value}: {_content_text(content)}" for message in messages for content in message.contents
+        )
+        response = await self.chat_client.get_response(
+            [ChatMessage(role="system", text=self.instructions), ChatMessage(role="user", text="\n".join(lines))]
+        )
+        self.summaries += 1
+        return response.text
+
+    async def reduce(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        hashes = self._prefix_hashes(messages)
+        covered, summary = 0, None
+        for count in range(len(messages), 0, -1):
+            cached = self.cache.get(hashes[count])
+            if cached is not None and cached[0] == count:
+                covered, summary = cached
+                break
+
+        def with_summary(cut: int, text: str | None) -> List[ChatMessage]:
+            if text is None:
+                return messages[cut:]
+            return [ChatMessage(role="system", text=f"{SUMMARY_PREFIX}{text}")] + messages[cut:]
+
+        current = with_summary(covered, summary)
+        if estimate_tokens(current) <= self.max_tokens:
+            return current
+
+        # Cut before the oldest turn that still leaves the newest turns within keep_tokens
+        starts = [start for start in _turn_starts(messages) if start > covered]
+        cut = next((start for start in starts if estimate_tokens(messages[start:]) <= self.keep_tokens), None)
+        if cut is None:
+            cut = starts[-1] if starts else covered
+        if cut <= covered:
+            return current
+        summary = await self._summarize(summary, messages[covered:cut])
+        self.cache[hashes[cut]] = (cut, summary)
+        while len(self.cache) > self.cache_size:
+            del self.cache[next(iter(self.cache))]
+        return with_summary(cut, summary)
+
+
+class ReducingChatMessageStore:
+    """Message store keeping every message in `store` and sending them through `reducers`."""
+
+    def __init__(self, store: ChatMessageStoreProtocol | None = None, reducers: Sequence[HistoryReducer] = ()):
+        self.store = store if store is not None else ChatMessageStore()
+        self.reducers = list(reducers)
+
+    async def list_messages(self) -> List[ChatMessage]:
+        messages = await self.store.list_messages()
+        for reducer in self.reducers:
+            messages = await reducer.reduce(messages)
+        return messages
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> None:
+        await self.store.add_messages(messages)
+
+    async def serialize(self, **kwargs: Any) -> Dict[str, Any]:
+        return await self.store.serialize(**kwargs)
+
+    @classmethod
+    async def deserialize(
+        cls,
+        serialized_store_state: MutableMapping[str, Any],
+        store: ChatMessageStoreProtocol | None = None,
+        reducers: Sequence[HistoryReducer] = (),
+        **kwargs: Any,
+    ) -> "ReducingChatMessageStore":
+        """
+        Rebuild the wrapped store from a serialized state and wrap it again.
+
+        Args:
+            serialized_store_state: State returned by serialize()
+            store: Store to restore the state into (optional, default: a store of the kind the state was taken from)
+            reducers: Reducers of the rebuilt store
+        """
+        if store is not None:
+            await store.update_from_state(serialized_store_state, **kwargs)
+        elif "thread_id" in serialized_store_state:
+            # Only SQLiteChatMessageStore records where its thread is kept
+            from thread_store import SQLiteChatMessageStore
+
+            store = await SQLiteChatMessageStore.deserialize(serialized_store_state, **kwargs)
+        else:
+            store = await ChatMessageStore.deserialize(serialized_store_state, **kwargs)
+        return cls(store, reducers)
+
+    async def update_from_state(self, serialized_store_state: MutableMapping[str, Any], **kwargs: Any) -> None:
+        await self.store.update_from_state(serialized_store_state, **kwargs)
+
@@ -0,0 +1,228 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Local extraction cache for the PDF documents in resources/
+
+Text is extracted once per document content and stored on disk, so agents
+that read the PDFs do not parse them again on every run. Each document is
+keyed by the SHA-256 hash of its bytes: unchanged files are recognised by size
+and modification time without being read, and only new or changed PDFs are
+extracted again. read_pdf_text(path) returns the text of a PDF through the
+cache of its directory.
+
+The cache lives in resources/.document_cache/:
+- manifest.json: per document its hash, size, modification time and the byte
+  range of every page in the text file
+- <sha256>.txt: the UTF-8 text of all pages, one after another, read through
+  mmap so a page is served without loading the whole document
+
+Extraction needs the pypdf package (pip install pypdf).
+
+To extract new or changed documents and list the cache:
+    python resources/document_cache.py
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+RESOURCES = Path(__file__).parent
+
+# Bumped when the manifest layout or the extraction changes, which discards the cache
+CACHE_FORMAT = 1
+
+
+def content_hash(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pages(path: Path) -> List[str]:
+    """Extract the text of every page of a PDF."""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("Extracting PDF text needs pypdf: pip install pypdf") from e
+    return [page.extract_text() or "" for page in PdfReader(path).pages]
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+class DocumentCache:
+    """Page-level text of the PDFs in a directory, extracted once per content hash."""
+
+    def __init__(self, directory: Path = RESOURCES, cache_dir: Path | None = None):
+        self.directory = Path(directory)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.directory / ".document_cache"
+        self._manifest_path = self.cache_dir / "manifest.json"
+        self._documents: Dict[str, Dict] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+        if self._manifest_path.exists():
+            manifest = json.loads(self._manifest_path.read_text())
+            if manifest.get("format") == CACHE_FORMAT:
+                self._documents = manifest["documents"]
+
+    def __enter__(self) -> "DocumentCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.txt"
+
+    def refresh(self) -> Dict[str, str]:
+        """
+        Bring the cache up to date with the PDFs in the directory.
+
+        Returns:
+            Status per document: "unchanged" when its cached text was used as is,
+            "reused" when the text of identical content cached under another name
+            was used, or "extracted"
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        statuses: Dict[str, str] = {}
+        documents: Dict[str, Dict] = {}
+        for path in sorted(self.directory.glob("*.pdf")):
+            stat = path.stat()
+            entry = self._documents.get(path.name)
+            if (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and self._blob_path(entry["sha256"]).exists()
+            ):
+                documents[path.name] = entry
+                statuses[path.name] = "unchanged"
+                continue
+
+            digest = content_hash(path)
+            known = [e for e in self._documents.values() if e["sha256"] == digest]
+            if known and self._blob_path(digest).exists():
+                pages = known[0]["pages"]
+                statuses[path.name] = "unchanged" if entry is not None and entry["sha256"] == digest else "reused"
+            else:
+                pages, data = [], bytearray()
+                for text in extract_pages(path):
+                    encoded = text.encode("utf-8")
+                    pages.append([len(data), len(data) + len(encoded)])
+                    data.extend(encoded)
+                self._close_map(digest)
+                _write_atomically(self._blob_path(digest), bytes(data))
+                statuses[path.name] = "extracted"
+            documents[path.name] = {
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "pages": pages,
+            }
+
+        # Text no document refers to any more belongs to deleted or changed PDFs
+        referenced = {entry["sha256"] for entry in documents.values()}
+        for blob in self.cache_dir.glob("*.txt"):
+            if blob.stem not in referenced:
+                self._close_map(blob.stem)
+                blob.unlink()
+        self._documents = documents
+        manifest = {"format": CACHE_FORMAT, "documents": documents}
+        _write_atomically(self._manifest_path, json.dumps(manifest, indent=2).encode())
+        return statuses
+
+    def documents(self) -> List[str]:
+        """Return the file names of the cached documents."""
+        return sorted(self._documents)
+
+    def page_count(self, name: str) -> int:
+        return len(self._entry(name)["pages"])
+
+    def page(self, name: str, number: int) -> str:
+        """Return the text of a page, numbered from 1."""
+        entry = self._entry(name)
+        if not 1 <= number <= len(entry["pages"]):
+            raise IndexError(f"{name} has {len(entry['pages'])} pages, there is no page {number}")
+        start, end = entry["pages"][number - 1]
+        return self._map(entry["sha256"])[start:end].decode("utf-8")
+
+    def pages(self, name: str) -> List[Tuple[int, str]]:
+        """Return (page number, text) for every page of a document."""
+        return [(number, self.page(name, number)) for number in range(1, self.page_count(name) + 1)]
+
+    def _entry(self, name: str) -> Dict:
+        entry = self._documents.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown document {name}, available: {', '.join(self.documents())}")
+        return entry
+
+    def _map(self, digest: str) -> mmap.mmap | bytes:
+        if digest not in self._maps:
+            with open(self._blob_path(digest), "rb") as file:
+                # mmap cannot map empty files, e.g. a PDF without any text
+                if os.fstat(file.fileno()).st_size == 0:
+                    return b""
+                self._maps[digest] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[digest]
+
+    def _close_map(self, digest: str) -> None:
+        mapped = self._maps.pop(digest, None)
+        if mapped is not None:
+            mapped.close()
+
+    def close(self) -> None:
+        for digest in list(self._maps):
+            self._close_map(digest)
+
+
+# Caches of the directories read_pdf_text() has read from, by directory
+_caches: Dict[Path, DocumentCache] = {}
+
+
+def get_document_cache(directory: Path = RESOURCES) -> DocumentCache:
+    """Return the shared cache of the documents in a directory, refreshing it on first use."""
+    directory = Path(directory).resolve()
+    if directory not in _caches:
+        _caches[directory] = DocumentCache(directory)
+        _caches[directory].refresh()
+    return _caches[directory]
+
+
+def read_pdf_text(path: str | Path) -> str:
+    """
+    Return the text of a PDF, extracted on first read and then served from the cache.
+
+    Args:
+        path: Path of the PDF; its directory is cached as a whole
+
+    Returns:
+        Text of all pages, separated by blank lines
+    """
+    path = Path(path).resolve()
+    cache = get_document_cache(path.parent)
+    # Picks up PDFs added or changed since the cache was first refreshed
+    cache.refresh()
+    return "\n\n".join(text for _, text in cache.pages(path.name))
+
+
+if __name__ == "__main__":
+    with DocumentCache() as cache:
+        start = time.perf_counter()
+        try:
+            statuses = cache.refresh()
+        except ImportError as e:
+            sys.exit(str(e))
+        elapsed = time.perf_counter() - start
+        for name, status in statuses.items():
+            print(f"{name:<24}{cache.page_count(name):>4} pages  {status}")
+        print(f"Refreshed {cache.cache_dir} in {elapsed * 1000:.1f} ms")
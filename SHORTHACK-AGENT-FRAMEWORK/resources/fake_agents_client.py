@@ -0,0 +1,121 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+In-memory stand-in for the file and vector store operations of the Azure AI agents client
+
+Implements the subset of AzureAIAgentClient.agents_client used by
+vector_store_cache.py, so the reuse of uploads can be checked without an Azure
+project. Uploads and indexing sleep for a configurable time, every call is
+counted in `calls`, e.g. calls["files.upload_and_poll"], and the current state is
+in `uploaded_files` and `stored_vector_stores`.
+"""
+
+import asyncio
+import itertools
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+
+class NotFoundError(Exception):
+    """Raised for unknown IDs, with the status code of azure.core's ResourceNotFoundError."""
+
+    status_code = 404
+
+
+class _Operations:
+    def __init__(self, client: "FakeAgentsClient", group: str):
+        self._client = client
+        self._group = group
+
+    def _count(self, operation: str) -> None:
+        self._client.calls[f"{self._group}.{operation}"] += 1
+
+
+class _Files(_Operations):
+    async def upload_and_poll(self, file_path: str, purpose: str, **kwargs: object) -> SimpleNamespace:
+        self._count("upload_and_poll")
+        await asyncio.sleep(self._client.upload_seconds)
+        file_id = self._client.new_id("assistant-")
+        self._client.uploaded_files[file_id] = Path(file_path).read_bytes()
+        return SimpleNamespace(id=file_id, filename=Path(file_path).name, purpose=purpose, status="processed")
+
+    async def get(self, file_id: str, **kwargs: object) -> SimpleNamespace:
+        self._count("get")
+        if file_id not in self._client.uploaded_files:
+            raise NotFoundError(f"No file found with id '{file_id}'")
+        return SimpleNamespace(id=file_id, status="processed")
+
+    async def delete(self, file_id: str, **kwargs: object) -> None:
+        self._count("delete")
+        if self._client.uploaded_files.pop(file_id, None) is None:
+            raise NotFoundError(f"No file found with id '{file_id}'")
+
+
+class _VectorStores(_Operations):
+    async def create_and_poll(self, file_ids: List[str], name: str, **kwargs: object) -> SimpleNamespace:
+        self._count("create_and_poll")
+        self._client.check_files(file_ids)
+        await asyncio.sleep(self._client.index_seconds * len(file_ids))
+        vector_store_id = self._client.new_id("vs_")
+        self._client.stored_vector_stores[vector_store_id] = {"name": name, "file_ids": list(file_ids)}
+        return SimpleNamespace(id=vector_store_id, name=name, status="completed")
+
+    async def get(self, vector_store_id: str, **kwargs: object) -> SimpleNamespace:
+        self._count("get")
+        vector_store = self._client.vector_store(vector_store_id)
+        return SimpleNamespace(id=vector_store_id, name=vector_store["name"], status="completed")
+
+    async def delete(self, vector_store_id: str, **kwargs: object) -> None:
+        self._count("delete")
+        self._client.vector_store(vector_store_id)
+        del self._client.stored_vector_stores[vector_store_id]
+
+
+class _VectorStoreFileBatches(_Operations):
+    async def create_and_poll(self, vector_store_id: str, file_ids: List[str], **kwargs: object) -> SimpleNamespace:
+        self._count("create_and_poll")
+        vector_store = self._client.vector_store(vector_store_id)
+        self._client.check_files(file_ids)
+        await asyncio.sleep(self._client.index_seconds * len(file_ids))
+        vector_store["file_ids"].extend(file_id for file_id in file_ids if file_id not in vector_store["file_ids"])
+        return SimpleNamespace(id=self._client.new_id("vsfb_"), vector_store_id=vector_store_id, status="completed")
+
+
+class _VectorStoreFiles(_Operations):
+    async def delete(self, vector_store_id: str, file_id: str, **kwargs: object) -> None:
+        self._count("delete")
+        vector_store = self._client.vector_store(vector_store_id)
+        if file_id not in vector_store["file_ids"]:
+            raise NotFoundError(f"No file '{file_id}' in vector store '{vector_store_id}'")
+        vector_store["file_ids"].remove(file_id)
+
+
+class FakeAgentsClient:
+    """Files and vector stores kept in memory, with simulated upload and indexing time."""
+
+    def __init__(self, upload_seconds: float = 0.0, index_seconds: float = 0.0):
+        self.upload_seconds = upload_seconds
+        self.index_seconds = index_seconds
+        self.calls: Counter = Counter()
+        self.uploaded_files: Dict[str, bytes] = {}
+        self.stored_vector_stores: Dict[str, Dict] = {}
+        self._ids = itertools.count(1)
+        self.files = _Files(self, "files")
+        self.vector_stores = _VectorStores(self, "vector_stores")
+        self.vector_store_file_batches = _VectorStoreFileBatches(self, "vector_store_file_batches")
+        self.vector_store_files = _VectorStoreFiles(self, "vector_store_files")
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):06d}"
+
+    def check_files(self, file_ids: List[str]) -> None:
+        for file_id in file_ids:
+            if file_id not in self.uploaded_files:
+                raise NotFoundError(f"No file found with id '{file_id}'")
+
+    def vector_store(self, vector_store_id: str) -> Dict:
+        if vector_store_id not in self.stored_vector_stores:
+            raise NotFoundError(f"No vector store found with id '{vector_store_id}'")
+        return self.stored_vector_stores[vector_store_id]
@@ -0,0 +1,254 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Local retrieval over the PDF documents in resources/, an offline alternative to HostedFileSearchTool
+
+The pages of the documents, taken from the extraction cache in
+document_cache.py, are split into chunks: one per record for pages of
+"Key: value" records such as the employee directory, otherwise overlapping
+windows of words. Chunks are searched in process with two indexes:
+- BM25 over an inverted index of their words
+- when NumPy is installed, cosine similarity over a dense matrix of hashed
+  character n-grams, which also matches partial words and spelling variants
+The two rankings are combined by reciprocal rank fusion. A different encoder,
+e.g. an embeddings model, can be passed to HybridRetriever as `embed`.
+
+Pass search_documents as a tool to an agent instead of the hosted file search:
+    ChatAgent(chat_client=client, tools=search_documents, ...)
+"""
+
+import hashlib
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from document_cache import DocumentCache, get_document_cache
+from pydantic import Field
+
+# Words per chunk of running text, and words repeated from the previous chunk
+CHUNK_WORDS = 80
+CHUNK_OVERLAP = 20
+
+# BM25 term frequency saturation and length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Width of the hashed character n-gram vectors and the n-gram length
+DENSE_DIMENSIONS = 1024
+NGRAM = 3
+
+# Reciprocal rank fusion constant, larger values flatten the difference between ranks
+RRF_K = 60
+
+TOP_K = 5
+
+WORD = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+RECORD_KEY = re.compile(r"^([A-Z][\w ]{0,30}):\s")
+
+# Words too common to tell passages apart, left out of both indexes
+STOPWORDS = frozenset(
+    "a about all an and any are as at be by can do does for from has have how in is it its of on or that the "
+    "their there these this to was what when where which who whom why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text without stopwords, with a plural "s" removed so "sales" matches "sale"."""
+    # NFKC turns ligatures extracted from PDFs, e.g. "ﬂ", back into letters
+    words = WORD.findall(unicodedata.normalize("NFKC", text).lower())
+    words = [word for word in words if word not in STOPWORDS]
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    document: str
+    page: int
+    text: str
+
+
+def _records(lines: List[str]) -> Tuple[str, List[str]] | None:
+    """
+    Split "Key: value" lines into records, each starting where the first key repeats.
+
+    Returns:
+        The lines before the first record, e.g. a title, and the records, or None
+        when the lines are not records
+    """
+    keys = [match.group(1) for match in map(RECORD_KEY.match, lines) if match]
+    if not keys or keys.count(keys[0]) < 2:
+        return None
+    first = next(index for index, line in enumerate(lines) if line.startswith(f"{keys[0]}:"))
+    records: List[List[str]] = []
+    for line in lines[first:]:
+        if line.startswith(f"{keys[0]}:"):
+            records.append([])
+        records[-1].append(line)
+    return "\n".join(lines[:first]), ["\n".join(record) for record in records]
+
+
+def _windows(text: str, size: int, overlap: int) -> List[str]:
+    words = text.split()
+    step = max(1, size - overlap)
+    return [" ".join(words[start : start + size]) for start in range(0, max(1, len(words) - overlap), step)]
+
+
+def chunk_pages(
+    document: str, pages: Iterable[Tuple[int, str]], size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP
+) -> List[Chunk]:
+    """Split the pages of a document into records or overlapping windows of words."""
+    chunks = []
+    for number, text in pages:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if not lines:
+            continue
+        records = _records(lines)
+        if records is not None:
+            # The title repeated in every record gives it its context, e.g. "Employee Directory"
+            title, texts = records
+            chunks.extend(Chunk(document, number, f"{title}\n{text}".strip()) for text in texts)
+        else:
+            chunks.extend(Chunk(document, number, window) for window in _windows(" ".join(lines), size, overlap))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of the chunk words."""
+
+    def __init__(self, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for index, text in enumerate(texts):
+            words = tokenize(text)
+            self.lengths.append(len(words))
+            for word, count in Counter(words).items():
+                self.postings[word].append((index, count))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        total = len(self.lengths)
+        self.idf = {
+            word: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for word, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (chunk index, score) pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for word in set(tokenize(query)):
+            idf = self.idf.get(word)
+            if idf is None:
+                continue
+            for index, count in self.postings[word]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+                scores[index] += idf * count * (self.k1 + 1) / (count + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def hashed_ngrams(texts: Sequence[str], dimensions: int = DENSE_DIMENSIONS) -> Any:
+    """Encode texts as L2-normalised vectors of hashed character n-gram counts."""
+    import numpy as np
+
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in tokenize(text):
+            padded = f"#{word}#"
+            for start in range(max(1, len(padded) - NGRAM + 1)):
+                ngram = padded[start : start + NGRAM].encode()
+                matrix[row, int.from_bytes(hashlib.blake2b(ngram, digest_size=4).digest(), "little") % dimensions] += 1
+    np.log1p(matrix, out=matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class DenseIndex:
+    """Top-k cosine similarity over a matrix of chunk vectors."""
+
+    def __init__(self, texts: Sequence[str], embed: Callable[[Sequence[str]], Any] = hashed_ngrams):
+        self.embed = embed
+        self.matrix = embed(texts)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (chunk index, score) pairs, best first."""
+        import numpy as np
+
+        scores = self.matrix @ self.embed([query])[0]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(index), float(scores[index])) for index in top if scores[index] > 0]
+
+
+class HybridRetriever:
+    """BM25 and, when NumPy is installed, dense retrieval over chunks, fused by reciprocal rank."""
+
+    def __init__(self, chunks: List[Chunk], dense: bool = True, embed: Callable[[Sequence[str]], Any] | None = None):
+        self.chunks = chunks
+        texts = [chunk.text for chunk in chunks]
+        self.bm25 = BM25Index(texts)
+        self.dense: DenseIndex | None = None
+        if dense:
+            try:
+                self.dense = DenseIndex(texts, embed or hashed_ngrams)
+            except ImportError:
+                # NumPy is optional, BM25 alone still answers keyword queries
+                self.dense = None
+
+    @classmethod
+    def from_documents(cls, cache: DocumentCache | None = None, **kwargs: Any) -> "HybridRetriever":
+        """Build a retriever over every document of a document cache (default: resources/)."""
+        cache = cache or get_document_cache()
+        chunks = [chunk for name in cache.documents() for chunk in chunk_pages(name, cache.pages(name))]
+        return cls(chunks, **kwargs)
+
+    def search(self, query: str, k: int = TOP_K, mode: str = "hybrid") -> List[Tuple[Chunk, float]]:
+        """
+        Return the chunks most relevant to a query.
+
+        Args:
+            query: Text to search for
+            k: Maximum number of chunks to return
+            mode: "hybrid", "bm25" or "dense"; "dense" falls back to BM25 without NumPy
+
+        Returns:
+            List of (chunk, score) pairs, best first
+        """
+        if mode == "bm25" or self.dense is None:
+            return [(self.chunks[index], score) for index, score in self.bm25.search(query, k)]
+        if mode == "dense":
+            return [(self.chunks[index], score) for index, score in self.dense.search(query, k)]
+        # Fuse deeper candidate lists than requested so a chunk ranked well by only one index can surface
+        fused: Dict[int, float] = defaultdict(float)
+        for ranking in (self.bm25.search(query, 4 * k), self.dense.search(query, 4 * k)):
+            for rank, (index, _) in enumerate(ranking):
+                fused[index] += 1 / (RRF_K + rank + 1)
+        return [(self.chunks[index], score) for index, score in heapq.nlargest(k, fused.items(), key=lambda i: i[1])]
+
+
+# Retriever shared by the tool function below, built on first use
+_retriever: HybridRetriever | None = None
+
+
+def get_retriever() -> HybridRetriever:
+    """Return the shared retriever over the documents in resources/, building it on first use."""
+    global _retriever
+    if _retriever is None:
+        _retriever = HybridRetriever.from_documents()
+    return _retriever
+
+
+def search_documents(
+    query: Annotated[str, Field(description="What to look for, e.g. a question or key words.")],
+    top_k: Annotated[int, Field(description="Maximum number of passages to return.")] = TOP_K,
+) -> str:
+    """Search the employee directory, regulation and vehicle specifications for relevant passages."""
+    results = get_retriever().search(query, top_k)
+    if not results:
+        return "No matching passages."
+    return "\n\n".join(f"[{chunk.document}, page {chunk.page}]\n{chunk.text}" for chunk, _ in results)
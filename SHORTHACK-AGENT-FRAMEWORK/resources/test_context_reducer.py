@@ -0,0 +1,186 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Tests of the history reducers, against a fake chat client counting the tokens of every turn
+
+    python -m pytest resources/test_context_reducer.py
+"""
+
+from typing import Any, AsyncIterable, Callable, List
+
+import pytest
+from agent_framework import (
+    BaseChatClient,
+    ChatAgent,
+    ChatMessage,
+    ChatMessageStore,
+    ChatResponse,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    Role,
+    use_function_invocation,
+)
+from context_reducer import (
+    SUMMARY_INSTRUCTIONS,
+    ReducingChatMessageStore,
+    SlidingWindowReducer,
+    SummarizingReducer,
+    ToolResultElisionReducer,
+    estimate_tokens,
+)
+from thread_store import SQLiteChatMessageStore
+
+TURNS = 60
+
+
+@use_function_invocation
+class TokenCountingChatClient(BaseChatClient):
+    """Fake chat client that calls get_weather for every question and records the tokens it is sent."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: List[int] = []
+        self.calls = 0
+
+    async def _inner_get_response(
+        self, *, messages: List[ChatMessage], chat_options: Any, **kwargs: Any
+    ) -> ChatResponse:
+        if messages[0].text == SUMMARY_INSTRUCTIONS:
+            summary = "The user asked about the weather in many cities."
+            return ChatResponse(messages=[ChatMessage(role="assistant", text=summary)])
+        self.sent.append(estimate_tokens(messages))
+        if messages[-1].role == Role.USER:
+            self.calls += 1
+            location = messages[-1].text.rsplit(" ", 1)[-1].rstrip("?")
+            call = FunctionCallContent(
+                call_id=f"call_{self.calls}", name="get_weather", arguments={"location": location}
+            )
+            return ChatResponse(messages=[ChatMessage(role="assistant", contents=[call])])
+        return ChatResponse(messages=[ChatMessage(role="assistant", text=messages[-1].contents[0].result[:120])])
+
+    async def _inner_get_streaming_response(
+        self, *, messages: List[ChatMessage], chat_options: Any, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        response = await self._inner_get_response(messages=messages, chat_options=chat_options, **kwargs)
+        for message in response.messages:
+            yield ChatResponseUpdate(role=message.role, contents=message.contents)
+
+
+def get_weather(location: str) -> str:
+    """Get the weather for a given location."""
+    hours = ", ".join(f"{hour:02d}:00 {10 + hour % 7}°C" for hour in range(24))
+    return f"The weather in {location} is sunny. Hourly forecast: {hours}."
+
+
+async def run_turns(
+    reducers: Callable[[Any], List[Any]], turns: int = TURNS, stream: bool = False
+) -> tuple[List[int], ReducingChatMessageStore]:
+    """Ask a question per turn and return the tokens each turn sent, with the store of the thread."""
+    client = TokenCountingChatClient()
+    store = ReducingChatMessageStore(reducers=reducers(client))
+    agent = ChatAgent(chat_client=client, tools=get_weather, chat_message_store_factory=lambda: store)
+    thread = agent.get_new_thread()
+    sent_per_turn = []
+    for turn in range(turns):
+        sent = len(client.sent)
+        if stream:
+            async for _ in agent.run_stream(f"What is the weather in city{turn}?", thread=thread):
+                pass
+        else:
+            await agent.run(f"What is the weather in city{turn}?", thread=thread)
+        # A turn sends the history twice: with the question, then with the function result
+        sent_per_turn.append(sum(client.sent[sent:]))
+    return sent_per_turn, store
+
+
+def summaries(store: ReducingChatMessageStore) -> int:
+    return sum(getattr(reducer, "summaries", 0) for reducer in store.reducers)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "reducers",
+    [
+        pytest.param(lambda client: [SlidingWindowReducer(max_messages=20)], id="sliding window"),
+        pytest.param(lambda client: [SummarizingReducer(client, max_tokens=2000, keep_tokens=1000)], id="summaries"),
+        pytest.param(
+            lambda client: [SummarizingReducer(client, max_tokens=2000, keep_tokens=1000), ToolResultElisionReducer()],
+            id="summaries and elision",
+        ),
+    ],
+)
+async def test_tokens_per_turn_stay_bounded(reducers: Callable[[Any], List[Any]]) -> None:
+    sent_per_turn, store = await run_turns(reducers)
+    # Summaries make a saw-tooth, whose peaks must not rise
+    half = TURNS // 2
+    assert max(sent_per_turn[half:]) <= 1.1 * max(sent_per_turn[:half])
+    # Every message is kept by the store whatever is sent
+    assert len(await store.store.list_messages()) == 4 * TURNS
+
+
+@pytest.mark.asyncio
+async def test_full_history_grows_and_reducers_send_less() -> None:
+    full, _ = await run_turns(lambda client: [])
+    assert full[-1] > 10 * full[0]
+    for reducers in (
+        lambda client: [SlidingWindowReducer(max_messages=20)],
+        lambda client: [ToolResultElisionReducer()],
+        lambda client: [SummarizingReducer(client, max_tokens=2000, keep_tokens=1000)],
+    ):
+        sent_per_turn, _ = await run_turns(reducers)
+        assert sum(sent_per_turn) < sum(full)
+        assert sent_per_turn[-1] < full[-1]
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_cached() -> None:
+    sent_per_turn, store = await run_turns(lambda client: [SummarizingReducer(client, max_tokens=2000)])
+    # A summary is only requested when the threshold is crossed again, not on every turn
+    assert 0 < summaries(store) < TURNS // 4
+
+    reducer = store.reducers[0]
+    messages = await store.store.list_messages()
+    count = reducer.summaries
+    first = [message.text for message in await reducer.reduce(messages)]
+    assert [message.text for message in await reducer.reduce(messages)] == first
+    assert reducer.summaries == count
+
+
+@pytest.mark.asyncio
+async def test_streaming_runs_the_same_turns() -> None:
+    streamed, _ = await run_turns(lambda client: [SlidingWindowReducer(max_messages=20)], turns=10, stream=True)
+    sent_per_turn, _ = await run_turns(lambda client: [SlidingWindowReducer(max_messages=20)], turns=10)
+    assert streamed == sent_per_turn
+
+
+@pytest.mark.asyncio
+async def test_elision_keeps_calls_paired_with_results() -> None:
+    _, store = await run_turns(lambda client: [ToolResultElisionReducer()], turns=3)
+    messages = await store.list_messages()
+    results = [content for message in messages for content in message.contents if content.type == "function_result"]
+    assert len(results) == 3
+    assert all("characters elided" in str(result.result) for result in results[:-1])
+    assert "characters elided" not in str(results[-1].result)
+
+
+@pytest.mark.asyncio
+async def test_deserialize_rebuilds_the_wrapped_store(tmp_path: Any) -> None:
+    reducers = [SlidingWindowReducer(max_messages=1)]
+    messages = [ChatMessage(role="user", text=f"question {number}") for number in range(3)]
+
+    memory = ReducingChatMessageStore(reducers=reducers)
+    await memory.add_messages(messages)
+    restored = await ReducingChatMessageStore.deserialize(await memory.serialize(), reducers=reducers)
+    assert isinstance(restored.store, ChatMessageStore)
+    assert len(await restored.store.list_messages()) == 3
+
+    sqlite = ReducingChatMessageStore(SQLiteChatMessageStore(tmp_path / "threads.db", "reduced"), reducers)
+    await sqlite.add_messages(messages)
+    restored = await ReducingChatMessageStore.deserialize(await sqlite.serialize(), reducers=reducers)
+    assert isinstance(restored.store, SQLiteChatMessageStore)
+    assert restored.store.thread_id == "reduced"
+    assert [message.text for message in await restored.list_messages()] == ["question 2"]
+
+    target = SQLiteChatMessageStore(tmp_path / "threads.db", "other")
+    restored = await ReducingChatMessageStore.deserialize(await sqlite.serialize(), store=target)
+    assert restored.store is target and target.thread_id == "reduced"
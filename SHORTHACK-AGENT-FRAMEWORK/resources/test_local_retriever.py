@@ -0,0 +1,67 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Tests of the ranking of the local retriever, on the resources documents and on a corpus much larger than k
+
+    python -m pytest resources/test_local_retriever.py
+"""
+
+import statistics
+
+import pytest
+from bench_retrieval import QUERIES, first_relevant_rank
+from local_retriever import Chunk, HybridRetriever
+
+MODES = ("bm25", "dense", "hybrid")
+
+
+@pytest.fixture(scope="module")
+def retriever() -> HybridRetriever:
+    return HybridRetriever.from_documents()
+
+
+def test_employee_records_are_chunked_one_per_person(retriever: HybridRetriever) -> None:
+    records = [chunk.text for chunk in retriever.chunks if chunk.document == "employees.pdf"]
+    assert len(records) == 3
+    assert all(text.startswith("Employee Directory\nName: ") for text in records)
+
+
+@pytest.mark.parametrize(
+    "query, document, fact",
+    [
+        ("Who works in sales?", "employees.pdf", "Alice Johnson"),
+        ("Which department is Bob Wilson in?", "employees.pdf", "Marketing"),
+        ("Which vehicle has a V8 engine?", "specification2.pdf", "V8"),
+        ("Is the speed limiter of specification 1 tamper-proof?", "specification1.pdf", "tamper-proof"),
+        ("What happens to manufacturers that do not comply?", "regulation.pdf", "license revocation"),
+        ("Which languages does Microsoft Agent Framework support?", "sample.pdf", "Python"),
+    ],
+)
+def test_hybrid_ranks_the_answering_passage_first(
+    retriever: HybridRetriever, query: str, document: str, fact: str
+) -> None:
+    (chunk, _), *_ = retriever.search(query, 1)
+    assert chunk.document == document
+    assert fact in chunk.text
+
+
+@pytest.mark.parametrize("mode, hit_at_1, mrr", [("bm25", 0.9, 0.95), ("dense", 0.8, 0.9), ("hybrid", 0.9, 0.95)])
+def test_labelled_questions_rank_well(retriever: HybridRetriever, mode: str, hit_at_1: float, mrr: float) -> None:
+    ranks = [
+        first_relevant_rank([chunk.text for chunk, _ in retriever.search(query, len(retriever.chunks), mode)], facts)
+        for query, facts in QUERIES
+    ]
+    assert statistics.mean(rank == 1 for rank in ranks) >= hit_at_1
+    assert statistics.mean(1 / rank if rank else 0 for rank in ranks) >= mrr
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_the_matching_chunk_ranks_first_among_many(mode: str) -> None:
+    chunks = [
+        Chunk("filler.pdf", number, f"Vehicle specification {number} with a V6 engine and a top speed of {number} km/h")
+        for number in range(1, 201)
+    ]
+    chunks.insert(137, Chunk("target.pdf", 1, "The prototype uses a hydrogen fuel cell instead of an engine"))
+    results = HybridRetriever(chunks).search("Which prototype engine runs on hydrogen?", 5, mode)
+    assert len(results) == 5
+    assert results[0][0].document == "target.pdf"
@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Tests of the SQLite message store: persistence, serialization and compaction of a thread
+
+    python -m pytest resources/test_thread_store.py
+"""
+
+from pathlib import Path
+from typing import List
+
+import pytest
+from agent_framework import ChatMessage, ChatMessageStore, FunctionCallContent, FunctionResultContent
+from thread_store import SQLiteChatMessageStore
+
+
+def turn(number: int) -> List[ChatMessage]:
+    """A question answered through a function call: user, call, result and answer."""
+    call_id = f"call_{number}"
+    return [
+        ChatMessage(role="user", text=f"What is the weather in city{number}?"),
+        ChatMessage(role="assistant", contents=[FunctionCallContent(call_id=call_id, name="get_weather", arguments={})]),
+        ChatMessage(role="tool", contents=[FunctionResultContent(call_id=call_id, result=f"Sunny in city{number}")]),
+        ChatMessage(role="assistant", text=f"It is sunny in city{number}."),
+    ]
+
+
+class Summarizer:
+    """Summarize callable recording what it was asked to fold."""
+
+    def __init__(self) -> None:
+        self.calls: List[List[ChatMessage]] = []
+
+    def __call__(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        self.calls.append(messages)
+        return [ChatMessage(role="system", text=f"Summary {len(self.calls)} of {len(messages)} messages.")]
+
+
+def texts(messages: List[ChatMessage]) -> List[str]:
+    return [message.text for message in messages]
+
+
+@pytest.mark.asyncio
+async def test_messages_persist_across_a_reopen(tmp_path: Path) -> None:
+    store = SQLiteChatMessageStore(tmp_path / "threads.db", "weather")
+    for number in range(3):
+        await store.add_messages(turn(number))
+    expected = await store.list_messages()
+    store.close()
+
+    reopened = SQLiteChatMessageStore(tmp_path / "threads.db", "weather")
+    assert texts(await reopened.list_messages()) == texts(expected)
+    assert await SQLiteChatMessageStore(tmp_path / "threads.db", "other").list_messages() == []
+
+    await reopened.add_messages(turn(3))
+    reopened.close()
+    assert len(await SQLiteChatMessageStore(tmp_path / "threads.db", "weather").list_messages()) == 16
+
+
+@pytest.mark.asyncio
+async def test_serialize_and_deserialize_open_the_same_thread(tmp_path: Path) -> None:
+    store = SQLiteChatMessageStore(tmp_path / "threads.db", "weather")
+    await store.add_messages(turn(0))
+    state = await store.serialize()
+    assert state == {"messages": [], "path": str(tmp_path / "threads.db"), "thread_id": "weather"}
+
+    restored = await SQLiteChatMessageStore.deserialize(state)
+    assert restored.thread_id == "weather"
+    assert texts(await restored.list_messages()) == texts(turn(0))
+
+    # The state of an in-memory store carries its messages, which are moved into the database
+    memory = ChatMessageStore(turn(1))
+    moved = await SQLiteChatMessageStore.deserialize(
+        {**await memory.serialize(), "path": str(tmp_path / "threads.db"), "thread_id": "moved"}
+    )
+    assert texts(await moved.list_messages()) == texts(turn(1))
+
+
+@pytest.mark.asyncio
+async def test_compaction_cuts_before_a_user_message(tmp_path: Path) -> None:
+    summarize = Summarizer()
+    store = SQLiteChatMessageStore(tmp_path / "threads.db", "weather", summarize=summarize)
+    for number in range(5):
+        await store.add_messages(turn(number))
+
+    # The last 6 messages start in the middle of turn 3, which is kept whole by cutting after turn 3
+    assert await store.compact(keep_messages=6) == 16
+    messages = await store.list_messages()
+    assert messages[1].role.value == "user"
+    assert texts(messages[1:]) == texts(turn(4))
+    assert texts(summarize.calls[0]) == texts([m for number in range(4) for m in turn(number)])
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_followed_by_the_kept_messages(tmp_path: Path) -> None:
+    summarize = Summarizer()
+    store = SQLiteChatMessageStore(tmp_path / "threads.db", "weather", summarize=summarize)
+    for number in range(6):
+        await store.add_messages(turn(number))
+    await store.list_messages()
+
+    await store.compact(keep_messages=8)
+    expected = ["Summary 1 of 16 messages.", *texts(turn(4)), *texts(turn(5))]
+    assert texts(await store.list_messages()) == expected
+    store.close()
+    reopened = SQLiteChatMessageStore(tmp_path / "threads.db", "weather", summarize=summarize)
+    assert texts(await reopened.list_messages()) == expected
+
+    # The next compaction folds the previous snapshot together with the newly folded turns
+    await reopened.add_messages(turn(6))
+    await reopened.compact(keep_messages=4)
+    assert texts(summarize.calls[1]) == ["Summary 1 of 16 messages.", *texts(turn(4)), *texts(turn(5))]
+    assert texts(await reopened.list_messages()) == ["Summary 2 of 9 messages.", *texts(turn(6))]
+
+
+@pytest.mark.parametrize("compact_after", [4, 10])
+def test_compact_after_must_exceed_keep_messages(tmp_path: Path, compact_after: int) -> None:
+    with pytest.raises(ValueError, match="keep_messages"):
+        SQLiteChatMessageStore(tmp_path / "threads.db", compact_after=compact_after, keep_messages=10, summarize=Summarizer())
+
+
+@pytest.mark.asyncio
+async def test_compaction_runs_once_per_threshold_crossing(tmp_path: Path) -> None:
+    summarize = Summarizer()
+    store = SQLiteChatMessageStore(
+        tmp_path / "threads.db", "weather", compact_after=20, keep_messages=10, summarize=summarize
+    )
+    for number in range(100):
+        await store.add_messages(turn(number))
+        assert len(await store.list_messages()) <= 1 + 20
+
+    # Each compaction folds at least compact_after - keep_messages messages
+    assert 0 < len(summarize.calls) <= 400 // (20 - 10)
+    assert all(len(messages) > 10 for messages in summarize.calls)
+
+    # The messages kept in memory through the compactions are those a reopened store reads
+    expected = texts(await store.list_messages())
+    store.close()
+    assert texts(await SQLiteChatMessageStore(tmp_path / "threads.db", "weather").list_messages()) == expected
@@ -0,0 +1,94 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Tests of the reuse of uploaded files and vector stores, against the fake agents client
+
+    python -m pytest resources/test_vector_store_cache.py
+"""
+
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+from fake_agents_client import FakeAgentsClient
+from vector_store_cache import VectorStoreCache
+
+
+@pytest.fixture
+def files(tmp_path: Path) -> Tuple[Path, List[Path]]:
+    first, second = tmp_path / "employees.txt", tmp_path / "departments.txt"
+    first.write_text("Alice, sales, 29\nBob, support, 41\n")
+    second.write_text("Sales\nSupport\n")
+    return tmp_path / "manifest.json", [first, second]
+
+
+async def vector_store(client: FakeAgentsClient, manifest: Path, paths: List[Path]) -> str:
+    client.calls.clear()
+    return await VectorStoreCache(client, manifest).vector_store("lab", paths)
+
+
+@pytest.mark.asyncio
+async def test_first_run_uploads_and_indexes(files: Tuple[Path, List[Path]]) -> None:
+    manifest, paths = files
+    client = FakeAgentsClient()
+    await vector_store(client, manifest, paths)
+    assert client.calls["files.upload_and_poll"] == 2
+    assert client.calls["vector_stores.create_and_poll"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_reuse_the_vector_store(files: Tuple[Path, List[Path]]) -> None:
+    manifest, paths = files
+    client = FakeAgentsClient()
+    created = await vector_store(client, manifest, paths)
+    assert await vector_store(client, manifest, paths) == created
+    assert dict(client.calls) == {"vector_stores.get": 1}
+
+
+@pytest.mark.asyncio
+async def test_only_a_changed_file_is_uploaded_and_swapped_in(files: Tuple[Path, List[Path]]) -> None:
+    manifest, paths = files
+    client = FakeAgentsClient()
+    created = await vector_store(client, manifest, paths)
+    old_file_id = client.stored_vector_stores[created]["file_ids"][0]
+
+    paths[0].write_text("Alice, sales, 30\nBob, support, 41\n")
+    assert await vector_store(client, manifest, paths) == created
+    assert client.calls["files.upload_and_poll"] == 1
+    assert client.calls["vector_stores.create_and_poll"] == 0
+    assert old_file_id not in client.stored_vector_stores[created]["file_ids"]
+    assert len(client.stored_vector_stores[created]["file_ids"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_a_vector_store_deleted_remotely_is_recreated(files: Tuple[Path, List[Path]]) -> None:
+    manifest, paths = files
+    client = FakeAgentsClient()
+    created = await vector_store(client, manifest, paths)
+    await client.vector_stores.delete(created)
+
+    assert await vector_store(client, manifest, paths) != created
+    assert client.calls["files.upload_and_poll"] == 0, "the uploaded files are still there"
+    assert client.calls["vector_stores.create_and_poll"] == 1
+
+
+@pytest.mark.asyncio
+async def test_garbage_collection_waits_for_the_ttl(files: Tuple[Path, List[Path]]) -> None:
+    manifest, paths = files
+    client = FakeAgentsClient()
+    created = await vector_store(client, manifest, paths)
+    old_file_id = client.stored_vector_stores[created]["file_ids"][0]
+    paths[0].write_text("Alice, sales, 30\nBob, support, 41\n")
+    await vector_store(client, manifest, paths)
+
+    deleted = await VectorStoreCache(client, manifest).collect_garbage()
+    assert deleted == {"vector_stores": [], "files": []}, "nothing is deleted before the TTL"
+
+    deleted = await VectorStoreCache(client, manifest, ttl=0).collect_garbage(now=time.time() + 1)
+    assert deleted["vector_stores"] == [created] and old_file_id in deleted["files"]
+    assert not client.uploaded_files and not client.stored_vector_stores
+
+    assert await vector_store(client, manifest, paths) != created
+    assert client.calls["files.upload_and_poll"] == 2
+    assert client.calls["vector_stores.create_and_poll"] == 1
@@ -0,0 +1,312 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Persistent chat message store for AgentThread, kept in a local SQLite database
+
+Each message added to a thread is appended as one row, so adding a message
+costs the same however long the conversation is, and nothing is kept only in
+memory: a thread is resumed after a restart by opening the store with its
+thread_id, which reads nothing until the agent asks for the messages.
+
+Compaction is opt-in. To keep memory and the prompt bounded, pass
+`compact_after` together with a `summarize` callable (e.g. a chat client asked
+for a summary): once more than `compact_after` messages follow the last
+snapshot, the turns before the last `keep_messages` messages are folded into a
+snapshot written by `summarize`, and only then are their rows deleted. The
+kept messages count towards the next compaction, so `compact_after` must be
+larger than `keep_messages`. Only the snapshot and the turns after it are
+loaded, never the whole history. Compaction always cuts before a user message,
+so a function call is never separated from its result. Without `compact_after`
+every message is kept.
+
+    store = SQLiteChatMessageStore("threads.db", thread_id="weather")
+    thread = AgentThread(message_store=store)
+    # or: ChatAgent(..., chat_message_store_factory=lambda: SQLiteChatMessageStore("threads.db", "weather"))
+
+To measure appending and resuming a long thread against the in-memory store:
+    python resources/thread_store.py --messages 20000
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, MutableMapping, Sequence, Union
+
+from agent_framework import ChatMessage
+
+THREADS_DB = Path(__file__).parent / ".threads.db"
+
+# Messages kept after the snapshot when a thread is compacted
+KEEP_MESSAGES = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    thread_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+Summarizer = Callable[[List[ChatMessage]], Union[List[ChatMessage], Awaitable[List[ChatMessage]]]]
+
+
+def _encode(message: ChatMessage) -> str:
+    return json.dumps(message.to_dict(), ensure_ascii=False)
+
+
+def _decode(data: str) -> ChatMessage:
+    return ChatMessage.from_dict(json.loads(data))
+
+
+def _decode_snapshot(data: str) -> List[ChatMessage]:
+    return [ChatMessage.from_dict(message) for message in json.loads(data)]
+
+
+class SQLiteChatMessageStore:
+    """ChatMessageStoreProtocol implementation appending messages to SQLite and compacting old turns."""
+
+    def __init__(
+        self,
+        path: str | Path = THREADS_DB,
+        thread_id: str | None = None,
+        compact_after: int | None = None,
+        keep_messages: int = KEEP_MESSAGES,
+        summarize: Summarizer | None = None,
+    ):
+        if compact_after and summarize is None:
+            raise ValueError("compact_after needs a summarize callable to write the snapshot of the compacted turns")
+        if compact_after and compact_after <= keep_messages:
+            # The kept messages alone would cross the threshold again and compact on every add
+            raise ValueError(f"compact_after ({compact_after}) must be larger than keep_messages ({keep_messages})")
+        self.path = Path(path)
+        self.thread_id = thread_id or uuid.uuid4().hex
+        self.compact_after = compact_after
+        self.keep_messages = keep_messages
+        self.summarize = summarize
+        self._connection = sqlite3.connect(self.path)
+        # WAL makes an append a sequential write without rewriting the database file
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._open_thread()
+
+    def _open_thread(self) -> None:
+        """Read where the thread stands, without loading any message."""
+        snapshot = self._connection.execute(
+            "SELECT seq FROM snapshots WHERE thread_id = ?", (self.thread_id,)
+        ).fetchone()
+        self._snapshot_seq = snapshot[0] if snapshot else 0
+        last, live = self._connection.execute(
+            "SELECT MAX(seq), COUNT(*) FROM messages WHERE thread_id = ? AND seq > ?",
+            (self.thread_id, self._snapshot_seq),
+        ).fetchone()
+        self._next_seq = (last or self._snapshot_seq) + 1
+        self._live = live
+        # Loaded on the first list_messages() and then kept up to date by add_messages()
+        self._messages: List[ChatMessage] | None = None
+
+    async def list_messages(self) -> List[ChatMessage]:
+        """Return the snapshot of the compacted turns followed by the messages added since."""
+        if self._messages is None:
+            snapshot = self._connection.execute(
+                "SELECT data FROM snapshots WHERE thread_id = ?", (self.thread_id,)
+            ).fetchone()
+            messages = _decode_snapshot(snapshot[0]) if snapshot else []
+            rows = self._connection.execute(
+                "SELECT data FROM messages WHERE thread_id = ? AND seq > ? ORDER BY seq",
+                (self.thread_id, self._snapshot_seq),
+            )
+            messages.extend(_decode(data) for (data,) in rows)
+            self._messages = messages
+        return list(self._messages)
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> None:
+        """Append messages to the thread, compacting it once enough were added since the last snapshot."""
+        if not messages:
+            return
+        rows = [
+            (self.thread_id, self._next_seq + offset, message.role.value, _encode(message))
+            for offset, message in enumerate(messages)
+        ]
+        with self._connection:
+            self._connection.executemany("INSERT INTO messages VALUES (?, ?, ?, ?)", rows)
+        self._next_seq += len(rows)
+        self._live += len(rows)
+        if self._messages is not None:
+            self._messages.extend(messages)
+        if self.compact_after and self._live > self.compact_after:
+            await self.compact()
+
+    async def compact(self, keep_messages: int | None = None) -> int:
+        """
+        Fold the turns before the last `keep_messages` messages into the snapshot and delete their rows.
+
+        The snapshot is written by the store's `summarize` callable from the previous
+        snapshot and the folded turns, in the same transaction that deletes them.
+
+        Args:
+            keep_messages: Messages to keep after the snapshot (optional, default: the store's keep_messages)
+
+        Returns:
+            Number of messages folded into the snapshot
+
+        Raises:
+            ValueError: If the store has no summarize callable
+        """
+        if self.summarize is None:
+            raise ValueError("Compaction needs a summarize callable to write the snapshot of the compacted turns")
+        keep = self.keep_messages if keep_messages is None else keep_messages
+        # Cut before the first user message among the kept ones, so a turn is never split
+        cut = self._connection.execute(
+            "SELECT MIN(seq) FROM messages WHERE thread_id = ? AND seq >= ? AND role = 'user'",
+            (self.thread_id, self._next_seq - keep),
+        ).fetchone()[0]
+        if cut is None or cut <= self._snapshot_seq + 1:
+            return 0
+
+        snapshot = self._connection.execute(
+            "SELECT data FROM snapshots WHERE thread_id = ?", (self.thread_id,)
+        ).fetchone()
+        rows = self._connection.execute(
+            "SELECT data FROM messages WHERE thread_id = ? AND seq > ? AND seq < ? ORDER BY seq",
+            (self.thread_id, self._snapshot_seq, cut),
+        )
+        old = _decode_snapshot(snapshot[0]) if snapshot else []
+        old.extend(_decode(data) for (data,) in rows)
+        result = self.summarize(old)
+        folded: List[ChatMessage] = await result if inspect.isawaitable(result) else result
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                (self.thread_id, cut - 1, json.dumps([message.to_dict() for message in folded], ensure_ascii=False)),
+            )
+            removed = self._connection.execute(
+                "DELETE FROM messages WHERE thread_id = ? AND seq < ?", (self.thread_id, cut)
+            ).rowcount
+        self._snapshot_seq = cut - 1
+        # Counted rather than taken from `keep`, as cutting before a user message can keep fewer
+        self._live = self._connection.execute(
+            "SELECT COUNT(*) FROM messages WHERE thread_id = ? AND seq > ?", (self.thread_id, self._snapshot_seq)
+        ).fetchone()[0]
+        if self._messages is not None:
+            self._messages = folded + self._messages[len(self._messages) - self._live :]
+        return removed
+
+    async def clear(self) -> None:
+        """Delete every message and the snapshot of the thread."""
+        with self._connection:
+            self._connection.execute("DELETE FROM messages WHERE thread_id = ?", (self.thread_id,))
+            self._connection.execute("DELETE FROM snapshots WHERE thread_id = ?", (self.thread_id,))
+        self._open_thread()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    async def serialize(self, **kwargs: Any) -> dict[str, Any]:
+        """
+        Return where the thread is stored; the messages themselves stay in the database.
+
+        The empty "messages" keeps the state valid for AgentThread.serialize(), which
+        keeps only the messages of a store, so resume a thread by opening the store
+        with its thread_id rather than through AgentThread.deserialize().
+        """
+        return {"messages": [], "path": str(self.path), "thread_id": self.thread_id}
+
+    @classmethod
+    async def deserialize(
+        cls, serialized_store_state: MutableMapping[str, Any], **kwargs: Any
+    ) -> "SQLiteChatMessageStore":
+        """Open the thread a serialized state refers to, appending any messages the state carries."""
+        store = cls(
+            serialized_store_state.get("path", THREADS_DB), serialized_store_state.get("thread_id"), **kwargs
+        )
+        await store.update_from_state(serialized_store_state)
+        return store
+
+    async def update_from_state(self, serialized_store_state: MutableMapping[str, Any], **kwargs: Any) -> None:
+        """
+        Switch to the thread a serialized state refers to.
+
+        The state of an in-memory ChatMessageStore carries its messages instead,
+        which are then appended, so an existing conversation can be moved here.
+        """
+        thread_id = serialized_store_state.get("thread_id")
+        if thread_id and thread_id != self.thread_id:
+            self.thread_id = thread_id
+            self._open_thread()
+        messages = serialized_store_state.get("messages") or []
+        await self.add_messages([m if isinstance(m, ChatMessage) else ChatMessage.from_dict(m) for m in messages])
+
+
+async def _benchmark(args: argparse.Namespace) -> None:
+    import tempfile
+    import tracemalloc
+
+    from agent_framework import ChatMessageStore
+
+    def turn(number: int) -> List[ChatMessage]:
+        return [
+            ChatMessage(role="user", text=f"What's the weather like in city {number}?"),
+            ChatMessage(role="assistant", text=f"The weather in city {number} is sunny with a high of 21°C."),
+        ]
+
+    def summarize(messages: List[ChatMessage]) -> List[ChatMessage]:
+        return [ChatMessage(role="system", text=f"Summary of {len(messages)} earlier messages.")]
+
+    turns = [turn(number) for number in range(args.messages // 2)]
+    print(f"{'store':<28}{'append us':>10}{'resume ms':>10}{'messages':>10}{'resume KiB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, compact_after in (("in-memory, serialized", None), ("SQLite", 0), ("SQLite, compacting", 200)):
+            path = Path(directory) / f"{name}.db"
+            if compact_after is None:
+                store: Any = ChatMessageStore()
+            else:
+                store = SQLiteChatMessageStore(path, "bench", compact_after=compact_after or None, summarize=summarize)
+            start = time.perf_counter()
+            for messages in turns:
+                await store.add_messages(messages)
+            append = (time.perf_counter() - start) / args.messages * 1e6
+            if compact_after is None:
+                state = json.dumps(await store.serialize())
+
+            # Resume the thread as a restarted process would and read what the agent would be sent,
+            # timed first and then again while tracing the memory it takes
+            async def resume() -> Any:
+                if compact_after is None:
+                    return await ChatMessageStore.deserialize(json.loads(state))
+                return SQLiteChatMessageStore(path, "bench", compact_after=compact_after or None, summarize=summarize)
+
+            if compact_after is not None:
+                store.close()
+            start = time.perf_counter()
+            resumed = await resume()
+            count = len(await resumed.list_messages())
+            elapsed = (time.perf_counter() - start) * 1000
+            tracemalloc.start()
+            traced = await resume()
+            await traced.list_messages()
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            print(f"{name:<28}{append:>10.1f}{elapsed:>10.1f}{count:>10}{peak:>12.0f}")
+            if compact_after is not None:
+                resumed.close()
+                traced.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    asyncio.run(_benchmark(parser.parse_args()))
@@ -0,0 +1,168 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Reuse of uploaded files and vector stores across runs of the file search lab
+
+Uploading a file and indexing it into a vector store takes most of the time
+before an agent with HostedFileSearchTool can answer its first question. This
+module keeps a manifest of what was uploaded, keyed by the SHA-256 hash of each
+file, so a run whose files have not changed reuses the vector store after a
+single lookup. When files change, only those are uploaded and swapped in the
+existing vector store.
+
+Nothing is deleted at the end of a run. Instead collect_garbage() deletes the
+vector stores not used for a while and the uploaded files no vector store
+refers to any more.
+
+The manifest is resources/.vector_stores.json. Only resources recorded in it
+are ever deleted, never other files or vector stores of the project.
+
+The reuse logic is tested offline against the fake agents client:
+    python -m pytest resources/test_vector_store_cache.py
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from document_cache import content_hash
+
+MANIFEST = Path(__file__).parent / ".vector_stores.json"
+
+# Vector stores unused and uploaded files unreferenced for longer than this are deleted
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Bumped when the manifest layout changes, which forgets what was uploaded
+MANIFEST_FORMAT = 1
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Whether the error means the resource does not exist, e.g. azure.core's ResourceNotFoundError."""
+    return getattr(error, "status_code", None) == 404
+
+
+class VectorStoreCache:
+    """Uploaded files and vector stores of an agents client, reused while their content is unchanged."""
+
+    def __init__(self, agents_client: Any, manifest_path: Path = MANIFEST, ttl: float = DEFAULT_TTL):
+        self.agents_client = agents_client
+        self.manifest_path = Path(manifest_path)
+        self.ttl = ttl
+        self._files: Dict[str, Dict] = {}
+        self._vector_stores: Dict[str, Dict] = {}
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text())
+            if manifest.get("format") == MANIFEST_FORMAT:
+                self._files = manifest["files"]
+                self._vector_stores = manifest["vector_stores"]
+
+    def _save(self) -> None:
+        manifest = {"format": MANIFEST_FORMAT, "files": self._files, "vector_stores": self._vector_stores}
+        temporary = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        temporary.write_text(json.dumps(manifest, indent=2))
+        os.replace(temporary, self.manifest_path)
+
+    async def _exists(self, get: Any, *args: str) -> bool:
+        try:
+            await get(*args)
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+        return True
+
+    async def _file_id(self, path: Path, digest: str, now: float) -> str:
+        """Return the ID of an uploaded file with the content of `path`, uploading it if there is none."""
+        entry = self._files.get(digest)
+        if entry is None or not await self._exists(self.agents_client.files.get, entry["file_id"]):
+            file = await self.agents_client.files.upload_and_poll(file_path=str(path), purpose="assistants")
+            entry = self._files[digest] = {"file_id": file.id, "filename": path.name, "uploaded_at": now}
+        entry["last_used"] = now
+        return entry["file_id"]
+
+    async def vector_store(self, name: str, paths: List[Path]) -> str:
+        """
+        Return the ID of a vector store holding the given files, reusing the last one when possible.
+
+        Args:
+            name: Name of the vector store, also the key it is reused under
+            paths: Files the vector store must hold
+
+        Returns:
+            ID of the vector store
+        """
+        now = time.time()
+        digests = {Path(path).name: content_hash(Path(path)) for path in paths}
+        entry = self._vector_stores.get(name)
+        exists = entry is not None and await self._exists(
+            self.agents_client.vector_stores.get, entry["vector_store_id"]
+        )
+        if exists and entry["files"] == digests:
+            entry["last_used"] = now
+            for digest in digests.values():
+                self._files[digest]["last_used"] = now
+            self._save()
+            return entry["vector_store_id"]
+
+        file_ids = await asyncio.gather(
+            *(self._file_id(Path(path), digests[Path(path).name], now) for path in paths)
+        )
+        if exists:
+            # Swap the changed files in the existing vector store instead of indexing everything again
+            held = {self._files[digest]["file_id"] for digest in entry["files"].values() if digest in self._files}
+            added = sorted(set(file_ids) - held)
+            removed = sorted(held - set(file_ids))
+            vector_store_id = entry["vector_store_id"]
+            if added:
+                await self.agents_client.vector_store_file_batches.create_and_poll(vector_store_id, file_ids=added)
+            for file_id in removed:
+                try:
+                    await self.agents_client.vector_store_files.delete(vector_store_id, file_id)
+                except Exception as e:
+                    if not _is_not_found(e):
+                        raise
+        else:
+            vector_store = await self.agents_client.vector_stores.create_and_poll(file_ids=file_ids, name=name)
+            vector_store_id = vector_store.id
+        self._vector_stores[name] = {"vector_store_id": vector_store_id, "files": digests, "last_used": now}
+        self._save()
+        return vector_store_id
+
+    async def collect_garbage(self, now: float | None = None) -> Dict[str, List[str]]:
+        """
+        Delete the vector stores unused for longer than the TTL, then the uploaded files
+        no remaining vector store refers to and unused for longer than the TTL.
+
+        Args:
+            now: Current time in seconds since the epoch (optional, default: the current time)
+
+        Returns:
+            IDs of the deleted "vector_stores" and "files"
+        """
+        now = time.time() if now is None else now
+        deleted: Dict[str, List[str]] = {"vector_stores": [], "files": []}
+
+        async def delete(operation: Any, resource_id: str) -> None:
+            try:
+                await operation(resource_id)
+            except Exception as e:
+                if not _is_not_found(e):
+                    raise
+
+        for name, entry in list(self._vector_stores.items()):
+            if now - entry["last_used"] > self.ttl:
+                await delete(self.agents_client.vector_stores.delete, entry["vector_store_id"])
+                deleted["vector_stores"].append(entry["vector_store_id"])
+                del self._vector_stores[name]
+        referenced = {digest for entry in self._vector_stores.values() for digest in entry["files"].values()}
+        for digest, entry in list(self._files.items()):
+            if digest not in referenced and now - entry["last_used"] > self.ttl:
+                await delete(self.agents_client.files.delete, entry["file_id"])
+                deleted["files"].append(entry["file_id"])
+                del self._files[digest]
+        self._save()
+        return deleted
+
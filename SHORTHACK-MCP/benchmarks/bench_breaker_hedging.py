@@ -0,0 +1,102 @@
+"""
+Benchmark hedged GETs and the circuit breaker against the Codebeamer stub.
+
+Hedging: the stub answers most requests quickly but delays a share of them by
+a long tail; the same workload is run with hedging off and on, and p50/p99
+latency and the hedge win rate are printed.
+
+Circuit breaker: the stub fails every request slowly; the time agents spend
+per call is printed together with the breaker state.
+
+Usage:
+    python benchmarks/bench_breaker_hedging.py --requests 400
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def timed_calls(requests: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(n: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await codebeamer_interface.get_tracker_item(10100001 + n)
+            latencies.append(time.perf_counter() - start)
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        await asyncio.gather(*(one(n) for n in range(requests)))
+    return latencies
+
+
+def hedging(requests: int, port: int) -> None:
+    settings = codebeamer_interface._get_resilience_settings()
+    for hedge in (False, True):
+        settings["hedge"] = hedge
+        codebeamer_interface._latency_trackers.clear()
+        before = codebeamer_interface.get_request_stats()
+        with run_stub_in_thread(
+            port=port,
+            dataset=StubDataset(items_per_tracker=requests),
+            latency_ms=5,
+            tail_rate=0.05,
+            tail_latency_ms=500,
+        ):
+            latencies = asyncio.run(timed_calls(requests, 4))
+        after = codebeamer_interface.get_request_stats()
+        hedged = after["hedged_requests"] - before["hedged_requests"]
+        wins = after["hedge_wins"] - before["hedge_wins"]
+        print(
+            f"hedging {'on ' if hedge else 'off'}"
+            f"   p50 {percentile(latencies, 50) * 1000:7.1f} ms"
+            f"   p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+            f"   hedged {hedged:4}   wins {wins / hedged if hedged else 0:5.0%}"
+        )
+    settings["hedge"] = False
+
+
+def circuit_breaker(port: int) -> None:
+    with run_stub_in_thread(port=port, latency_ms=200, error_rate=1.0) as app:
+        latencies = asyncio.run(timed_calls(50, 1))
+        mean = sum(latencies) / len(latencies)
+        breaker = codebeamer_interface.get_circuit_breaker_stats()["items/{id}"]
+        print(
+            f"outage         mean {mean * 1000:7.1f} ms per call"
+            f"   upstream {app.state.stats['requests']:4} of 50"
+            f"   breaker {breaker}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["CODEBEAMER_RETRY_MAX_ATTEMPTS"] = "1"
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    hedging(args.requests, args.port)
+    circuit_breaker(args.port)
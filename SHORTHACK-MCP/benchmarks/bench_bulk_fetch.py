@@ -0,0 +1,85 @@
+"""
+Benchmark get_tracker_items_bulk against serial get_tracker_item calls.
+
+With the stub's items query endpoint disabled, throughput is measured for the
+per-item path at increasing concurrency caps; then the single-query path is
+measured with the endpoint enabled. The response cache is disabled throughout.
+
+Usage:
+    python benchmarks/bench_bulk_fetch.py --items 200 --latency-ms 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+
+
+async def serial(item_ids: list) -> float:
+    start = time.perf_counter()
+    for item_id in item_ids:
+        await codebeamer_interface.get_tracker_item(item_id)
+    return time.perf_counter() - start
+
+
+async def bulk(item_ids: list, concurrency: int) -> float:
+    start = time.perf_counter()
+    response = await codebeamer_interface.get_tracker_items_bulk(
+        item_ids, concurrency=concurrency
+    )
+    elapsed = time.perf_counter() - start
+    entries = response["result"]
+    assert [e["item_id"] for e in entries] == item_ids, "order must be preserved"
+    assert "error" in entries[-1], "missing items are reported per item"
+    return elapsed
+
+
+async def main(items: int, with_query: bool) -> None:
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    codebeamer_interface.get_validator_store().max_entries = 0
+    # The last ID does not exist in the stub, to exercise per-item errors
+    item_ids = [10100001 + n for n in range(items - 1)] + [10199999]
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        if not with_query:
+            elapsed = await serial(item_ids)
+            print(f"{'serial':<12}{items / elapsed:>10.0f} items/s")
+            for level in CONCURRENCY_LEVELS:
+                elapsed = await bulk(item_ids, level)
+                print(f"{'bulk c=' + str(level):<12}{items / elapsed:>10.0f} items/s")
+        else:
+            codebeamer_interface._items_query_supported = True
+            elapsed = await bulk(item_ids, 8)
+            print(f"{'bulk query':<12}{items / elapsed:>10.0f} items/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    for with_query in (False, True):
+        with run_stub_in_thread(
+            port=args.port,
+            dataset=StubDataset(items_per_tracker=args.items),
+            latency_ms=args.latency_ms,
+            items_query=with_query,
+        ):
+            asyncio.run(main(args.items, with_query))
@@ -0,0 +1,85 @@
+"""
+Benchmark one-off AsyncClient per call versus the shared client pool.
+
+Runs the same workload of get_tracker_item calls against the local Codebeamer
+stub, first without a pool (a new connection per call) and then with
+codebeamer_client_pool() open, and prints p50/p99 latency and requests/sec.
+
+Usage:
+    python benchmarks/bench_client_pool.py --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_workload(requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(n: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await codebeamer_interface.get_tracker_item(10100001 + n % 50)
+            latencies.append(time.perf_counter() - start)
+            assert "result" in result, result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "rps": requests / elapsed,
+    }
+
+
+async def main(requests: int, concurrency: int) -> None:
+    # Measure the transport only, every call must reach the stub
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    before = await run_workload(requests, concurrency)
+    async with codebeamer_interface.codebeamer_client_pool():
+        after = await run_workload(requests, concurrency)
+
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>10}")
+    for name, stats in (("per-call", before), ("pooled", after)):
+        print(
+            f"{name:<10}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            f"{stats['mean_ms']:>10.2f}{stats['rps']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    with run_stub_in_thread(port=args.port, latency_ms=args.latency_ms):
+        asyncio.run(main(args.requests, args.concurrency))
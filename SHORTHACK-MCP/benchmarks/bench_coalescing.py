@@ -0,0 +1,70 @@
+"""
+Benchmark single-flight coalescing of concurrent identical GETs.
+
+Simulates bursts of agents fanning out over the same projects, trackers and
+items, with the response cache disabled so that only in-flight deduplication
+is measured, and prints how many upstream requests were saved.
+
+Usage:
+    python benchmarks/bench_coalescing.py --agents 8 --bursts 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def agent_turn(burst: int) -> None:
+    project_id = 1 + burst % 3
+    await codebeamer_interface.get_trackers_by_project_id(project_id)
+    await asyncio.gather(
+        *(
+            codebeamer_interface.get_tracker_item(project_id * 10000000 + n)
+            for n in range(1, 6)
+        )
+    )
+
+
+async def main(agents: int, bursts: int) -> None:
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    async with codebeamer_interface.codebeamer_client_pool():
+        start = time.perf_counter()
+        for burst in range(bursts):
+            await asyncio.gather(*(agent_turn(burst) for _ in range(agents)))
+        elapsed = time.perf_counter() - start
+
+    stats = codebeamer_interface.get_request_stats()
+    logical = stats["upstream_requests"] + stats["coalesced_requests"]
+    print(f"logical requests:   {logical}")
+    print(f"upstream requests:  {stats['upstream_requests']}")
+    print(
+        f"saved by coalesce:  {stats['coalesced_requests']} "
+        f"({stats['coalesced_requests'] / logical:.0%})"
+    )
+    print(f"upstream req/s:     {stats['upstream_requests'] / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    with run_stub_in_thread(port=args.port, latency_ms=args.latency_ms):
+        asyncio.run(main(args.agents, args.bursts))
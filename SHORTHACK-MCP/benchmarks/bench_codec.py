@@ -0,0 +1,117 @@
+"""
+Benchmark the JSON codecs on representative Codebeamer payloads.
+
+Encodes a 500-item bulk query page, a single tracker item and a list of
+comments as the stub Codebeamer would, then times each installed backend of
+servers/codec.py: full decoding of the upstream body, typed decoding of items
+into the reference schema the mirror reads them with, and indented encoding of
+the tool result. Finally a
+tool result is converted to MCP content by FastMCP's own path and by the
+server's codec path.
+
+Usage:
+    python benchmarks/bench_codec.py --items 500 --repeat 20
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+import codec  # noqa: E402
+from codebeamer_stub import StubDataset  # noqa: E402
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def payloads(items: int) -> Dict[str, tuple]:
+    dataset = StubDataset(projects=1, trackers_per_project=1, items_per_tracker=items)
+    page = {
+        "page": 1,
+        "pageSize": items,
+        "total": items,
+        "items": [dataset.item(10100001 + n) for n in range(items)],
+    }
+    comments = [
+        {
+            "id": n,
+            "name": f"Re: review {n}",
+            "comment": f"Checked against the specification, see finding {n}. " * 4,
+            "commentFormat": "PlainText",
+            "createdAt": "2025-01-01T09:00:00.000",
+            "createdBy": dataset.user(1 + n % 7),
+            "type": "Comment",
+        }
+        for n in range(100)
+    ]
+    return {
+        "bulk page": (
+            json.dumps(page).encode(),
+            codec.TRACKER_ITEM_REFERENCE,
+            page["items"],
+        ),
+        "single item": (
+            json.dumps(dataset.item(10100001)).encode(),
+            codec.TRACKER_ITEM_REFERENCE,
+            None,
+        ),
+        "100 comments": (json.dumps(comments).encode(), None, None),
+    }
+
+
+def main(items: int, repeat: int) -> None:
+    from mcp_server import _convert_result, mcp
+
+    installed = [name for name in codec.CODECS if codec.set_codec(name) == name]
+    print(
+        f"{'payload':<14}{'codec':<9}{'KB':>8}"
+        f"{'decode ms':>11}{'typed ms':>10}{'encode ms':>11}"
+    )
+    for label, (body, schema, records) in payloads(items).items():
+        for name in installed:
+            codec.set_codec(name)
+            value = codec.loads(body)
+            # The bulk page's schema applies to its records, not to the page around them
+            typed_body = json.dumps(records).encode() if records is not None else body
+            decode = best_of(repeat, lambda: codec.loads(body))
+            typed = "-"
+            if schema:
+                seconds = best_of(repeat, lambda: codec.loads_as(typed_body, schema))
+                typed = f"{seconds * 1000:.2f}"
+            encode = best_of(
+                repeat, lambda: codec.dumps({"result": value}, indent=True)
+            )
+            print(
+                f"{label:<14}{name:<9}{len(body) / 1024:>8.0f}"
+                f"{decode * 1000:>11.2f}{typed:>10}{encode * 1000:>11.2f}"
+            )
+
+    tool = mcp._tool_manager.get_tool("mcp_get_tracker_items_bulk")
+    result = {"result": json.loads(payloads(items)["bulk page"][0])["items"]}
+    print(f"\nconverting a {items}-item tool result to MCP content")
+    seconds = best_of(repeat, lambda: tool.fn_metadata.convert_result(result))
+    print(f"{'FastMCP':<18}{seconds * 1000:>8.2f} ms")
+    for name in installed:
+        codec.set_codec(name)
+        seconds = best_of(repeat, lambda: _convert_result(tool, result))
+        print(f"{f'codec {name}':<18}{seconds * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.items, args.repeat)
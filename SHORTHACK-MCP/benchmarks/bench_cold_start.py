@@ -0,0 +1,199 @@
+"""
+Measure cold start of the MCP server and flag regressions against a baseline.
+
+Profiles `import mcp_server` with `python -X importtime` and lists the modules
+it imports directly by cumulative import time. Then launches
+servers/mcp_server.py as a fresh process over stdio (as an editor would) and
+over streamable HTTP (as a scale-to-zero container would), against a stub
+Codebeamer, and times the first successful tool response from process start.
+Each measurement is the median of several runs. With --baseline, medians more
+than --tolerance slower than the saved ones are reported and the script exits
+with status 1; --save writes the medians as a new baseline.
+
+Usage:
+    python benchmarks/bench_cold_start.py --runs 5 --save cold_start.json
+    python benchmarks/bench_cold_start.py --runs 5 --baseline cold_start.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SERVERS = Path(__file__).resolve().parent.parent / "servers"
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+def profile_imports(env: Dict[str, str]) -> Tuple[float, List[Tuple[str, float]]]:
+    """Return the import time of mcp_server and of its direct imports, in ms."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mcp_server"],
+        cwd=SERVERS,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, direct = 0.0, []
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if not match:
+            continue
+        cumulative, level = int(match.group(2)) / 1000, (len(match.group(3)) - 1) // 2
+        # A module's imports are listed before it, one level deeper
+        if level == 0 and match.group(4) == "mcp_server":
+            total = cumulative
+            break
+        if level == 0:
+            direct = []
+        elif level == 1:
+            direct.append((match.group(4), cumulative))
+    return total, sorted(direct, key=lambda entry: entry[1], reverse=True)
+
+
+async def first_response_stdio(env: Dict[str, str]) -> float:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    parameters = StdioServerParameters(
+        command=sys.executable,
+        args=[str(SERVERS / "mcp_server.py")],
+        env={**env, "CODEBEAMER_MCP_TRANSPORT": "stdio"},
+        cwd=str(SERVERS),
+    )
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        async with stdio_client(parameters, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                result = await session.call_tool("mcp_get_projects", {})
+                elapsed = time.perf_counter() - start
+    if result.isError:
+        raise RuntimeError(f"Tool call failed: {result.content}")
+    return elapsed
+
+
+def first_response_http(client: httpx.Client, env: Dict[str, str], port: int) -> float:
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": "mcp_get_projects"},
+    }
+    try:
+        client.get(f"http://127.0.0.1:{port}/metrics")
+        raise RuntimeError(f"Port {port} is already in use")
+    except httpx.TransportError:
+        pass
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, str(SERVERS / "mcp_server.py")],
+        cwd=SERVERS,
+        env={**env, "CODEBEAMER_MCP_TRANSPORT": "streamable-http"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Poll until a tool call succeeds, like a client of a scaled-up container
+        while time.perf_counter() - start < 60:
+            try:
+                response = client.post(
+                    f"http://127.0.0.1:{port}/mcp", headers=HEADERS, json=payload
+                )
+                if response.status_code == 200 and '"isError":false' in response.text:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("The server did not answer within 60 s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args: argparse.Namespace) -> int:
+    env = {
+        **os.environ,
+        "CODEBEAMER_BASE_URL": f"http://127.0.0.1:{args.stub_port}",
+        "CODEBEAMER_RATE_LIMIT": "0",
+    }
+    # One client for all polling, so its own setup is not counted as server start time
+    with run_stub_in_thread(port=args.stub_port), httpx.Client(timeout=10.0) as client:
+        profiles = [profile_imports(env) for _ in range(args.runs)]
+        stdio = [
+            asyncio.run(first_response_stdio(env)) * 1000 for _ in range(args.runs)
+        ]
+        http = [
+            first_response_http(client, env, args.port) * 1000 for _ in range(args.runs)
+        ]
+
+    results = {
+        "import_ms": statistics.median(total for total, _ in profiles),
+        "stdio_first_response_ms": statistics.median(stdio),
+        "http_first_response_ms": statistics.median(http),
+    }
+    _, direct = min(profiles)
+    print(f"slowest direct imports of mcp_server (fastest of {args.runs} runs)")
+    for name, cumulative in direct[: args.top]:
+        print(f"  {name:<32}{cumulative:>9.1f} ms")
+    print(
+        f"\n{'median of ' + str(args.runs) + ' runs':<28}"
+        f"{'ms':>9}{'baseline':>10}{'change':>9}"
+    )
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else {}
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        change = f"{(value / reference - 1) * 100:+.0f}%" if reference else "-"
+        print(f"{name:<28}{value:>9.1f}{reference or '-':>10}{change:>9}")
+        if reference and value > reference * (1 + args.tolerance):
+            regressions.append(name)
+
+    if args.save:
+        Path(args.save).write_text(
+            json.dumps(
+                {name: round(value, 1) for name, value in results.items()}, indent=2
+            )
+        )
+    if regressions:
+        print(
+            f"\nREGRESSION: {', '.join(regressions)} "
+            f"more than {args.tolerance:.0%} slower than the baseline"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--baseline", help="JSON file of medians saved by an earlier --save"
+    )
+    parser.add_argument("--save", help="Write the medians to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--stub-port", type=int, default=8765)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,127 @@
+"""
+Benchmark posting comments one by one against the bulk write queue.
+
+Posts comments to a stub Codebeamer with write latency, first serially with
+post_tracker_item_comment and then with post_tracker_item_comments at several
+concurrency limits, and prints comments per second. The last batch is then
+submitted again to show that its idempotency keys prevent any new POST.
+Finally a batch is posted to a stub that loses some responses after applying
+the write and rejects others with 503, and the number of items that ended up
+with a duplicate comment is printed (it should be 0).
+
+Usage:
+    python benchmarks/bench_comment_writes.py --comments 200 --latency-ms 20 --concurrency 1 4 8 16
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("codebeamer_interface").setLevel(logging.WARNING)
+
+
+def batch(label: str, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "item_id": 10100001 + n % 50,
+            "comment_text": f"{label}: finding {n} checked against the specification",
+            "idempotency_key": f"{label}-{n}",
+        }
+        for n in range(count)
+    ]
+
+
+def duplicated_items(app: Any) -> int:
+    comments = app.state.dataset.comments.values()
+    return sum(
+        1 for posted in comments if len(posted) != len({c["comment"] for c in posted})
+    )
+
+
+async def throughput(app: Any, comments: int, concurrencies: List[int]) -> None:
+    import codebeamer_interface
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        start = time.perf_counter()
+        for comment in batch("serial", comments):
+            await codebeamer_interface.post_tracker_item_comment(
+                comment["item_id"], comment["comment_text"]
+            )
+        print(f"{'serial':<18}{comments / (time.perf_counter() - start):>12.0f}")
+
+        for concurrency in concurrencies:
+            comments_batch = batch(f"bulk c={concurrency}", comments)
+            start = time.perf_counter()
+            response = await codebeamer_interface.post_tracker_item_comments(
+                comments_batch, concurrency
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{f'bulk c={concurrency}':<18}{comments / elapsed:>12.0f}"
+                f"   {response['summary']}"
+            )
+
+        requests = app.state.stats["requests"]
+        response = await codebeamer_interface.post_tracker_item_comments(
+            comments_batch, concurrencies[-1]
+        )
+        print(
+            f"\nresubmitted last batch: {response['summary']}, "
+            f"{app.state.stats['requests'] - requests} requests sent to Codebeamer"
+        )
+
+
+async def faulty(app: Any, comments: int, concurrency: int) -> None:
+    import codebeamer_interface
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        response = await codebeamer_interface.post_tracker_item_comments(
+            batch("faulty", comments), concurrency
+        )
+    stats = app.state.stats
+    print(
+        f"faulty stub: {response['summary']}, "
+        f"{stats['lost_responses']} responses lost after the write, "
+        f"{stats['errors']} rejected with 503, "
+        f"{duplicated_items(app)} items with a duplicate comment"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    with run_stub_in_thread(port=args.port, latency_ms=args.latency_ms) as app:
+        print(f"{'writes':<18}{'comments/s':>12}")
+        asyncio.run(throughput(app, args.comments, args.concurrency))
+    with run_stub_in_thread(
+        port=args.port,
+        latency_ms=args.latency_ms,
+        error_rate=0.1,
+        lost_response_rate=0.2,
+    ) as app:
+        asyncio.run(faulty(app, args.comments, args.concurrency[-1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    # The faulty stub fails often enough to open a circuit breaker, hiding the retries
+    os.environ["CODEBEAMER_BREAKER_FAILURE_THRESHOLD"] = "0"
+    main(args)
@@ -0,0 +1,82 @@
+"""
+Benchmark conditional GET revalidation against the ETag-emitting Codebeamer stub.
+
+Every refresh of an item, tracker or comment list is sent with If-None-Match.
+The response cache is disabled so each call revalidates upstream; unchanged
+payloads come back as 304 Not Modified and are served from the stored body.
+The run checks that 304 answers return the same data as full downloads and
+that a posted comment forces a full refresh of the comment list.
+
+Usage:
+    python benchmarks/bench_conditional_get.py --items 200 --rounds 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def refresh_all(item_ids: list) -> list:
+    results = [await codebeamer_interface.get_tracker_items(101, page=1, page_size=500)]
+    results += await asyncio.gather(
+        *(codebeamer_interface.get_tracker_item(i) for i in item_ids)
+    )
+    return results
+
+
+async def main(items: int, rounds: int) -> None:
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    item_ids = [10100001 + n for n in range(items)]
+    async with codebeamer_interface.codebeamer_client_pool():
+        start = time.perf_counter()
+        first = await refresh_all(item_ids)
+        full_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            again = await refresh_all(item_ids)
+            assert again == first, "304 answers must return the stored bodies"
+        revalidate_elapsed = (time.perf_counter() - start) / rounds
+
+        before = await codebeamer_interface.get_tracker_item_comments(10100001)
+        await codebeamer_interface.get_tracker_item_comments(10100001)
+        await codebeamer_interface.post_tracker_item_comment(
+            10100001, "revalidation check"
+        )
+        after = await codebeamer_interface.get_tracker_item_comments(10100001)
+        assert (
+            len(after["result"]) == len(before["result"]) + 1
+        ), "writes must invalidate validators"
+
+    stats = codebeamer_interface.get_request_stats()
+    print(f"full download round:   {full_elapsed * 1000:.1f} ms")
+    print(f"revalidation round:    {revalidate_elapsed * 1000:.1f} ms")
+    print(f"304 Not Modified:      {stats['not_modified']}")
+    print(f"bytes saved:           {stats['bytes_saved']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    with run_stub_in_thread(
+        port=args.port, dataset=StubDataset(items_per_tracker=args.items)
+    ):
+        asyncio.run(main(args.items, args.rounds))
@@ -0,0 +1,125 @@
+"""
+Benchmark building Codebeamer auth headers per request, before and after caching.
+
+Times the former per-request path (load .env, read the credentials and base64
+encode them on every call) against the cached credentials providers. Then runs
+uncached GETs against a stub Codebeamer that requires a bearer token, revokes
+the token halfway through and lets the short-lived tokens expire, and prints how
+many requests were rejected, retried with renewed credentials and failed.
+
+Usage:
+    python benchmarks/bench_credentials.py --calls 20000 --requests 400
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def legacy_auth_headers() -> Dict[str, str]:
+    """What every request did before credentials were cached."""
+    load_dotenv()
+    credentials = {
+        "base_url": os.getenv("CODEBEAMER_BASE_URL", ""),
+        "username": os.getenv("CODEBEAMER_USERNAME", ""),
+        "password": os.getenv("CODEBEAMER_PASSWORD", ""),
+    }
+    auth_string = f"{credentials['username']}:{credentials['password']}"
+    return {"Authorization": f"Basic {base64.b64encode(auth_string.encode()).decode()}"}
+
+
+async def time_per_call(calls: int, get_headers: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        headers = get_headers()
+        if asyncio.iscoroutine(headers):
+            await headers
+    return (time.perf_counter() - start) / calls
+
+
+async def header_overhead(calls: int) -> None:
+    from credentials import EnvCredentials, TokenCredentials
+
+    async def fetch_token():
+        return "token", 3600.0
+
+    env_credentials = EnvCredentials()
+    token_credentials = TokenCredentials("http://127.0.0.1", fetch_token)
+    print(f"{'auth headers':<32}{'us/call':>9}")
+    for name, get_headers in (
+        ("per request (before)", legacy_auth_headers),
+        ("EnvCredentials, cached", env_credentials.auth_headers),
+        ("TokenCredentials, cached", token_credentials.auth_headers),
+    ):
+        print(f"{name:<32}{await time_per_call(calls, get_headers) * 1e6:>9.2f}")
+
+
+async def rotation(app: Any, base_url: str, requests: int, lifetime: float) -> None:
+    import codebeamer_interface
+    from credentials import TokenCredentials
+
+    issued = {"count": 0}
+
+    async def fetch_token():
+        # The stub accepts only the most recently issued token
+        issued["count"] += 1
+        app.state.authorization = f"Bearer token-{issued['count']}"
+        return f"token-{issued['count']}", lifetime
+
+    provider = TokenCredentials(base_url, fetch_token, refresh_margin=lifetime / 4)
+    codebeamer_interface.set_credentials_provider(provider)
+    failed = 0
+    async with codebeamer_interface.codebeamer_client_pool():
+        start = time.perf_counter()
+        for n in range(requests):
+            if n == requests // 2:
+                # Revoke the current token on the server side
+                app.state.authorization = "Bearer revoked"
+            result = await codebeamer_interface.get_tracker_item(10100001 + n % 50)
+            failed += "result" not in result
+        elapsed = time.perf_counter() - start
+    stats = codebeamer_interface.get_request_stats()
+    print(
+        f"\n{requests} GETs in {elapsed:.2f} s with {lifetime:.1f} s tokens: "
+        f"{app.state.stats['unauthorized']} answered 401, "
+        f"{stats['credential_refreshes']} retried with renewed credentials, "
+        f"{provider.fetches} tokens fetched, {failed} failed"
+    )
+
+
+def main(calls: int, requests: int, lifetime: float, port: int) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    codebeamer_interface.set_response_cache(None)
+    asyncio.run(header_overhead(calls))
+    with run_stub_in_thread(
+        port=port, latency_ms=2.0, authorization="Bearer none"
+    ) as app:
+        asyncio.run(rotation(app, f"http://127.0.0.1:{port}", requests, lifetime))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--token-lifetime", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args.calls, args.requests, args.token_lifetime, args.port)
@@ -0,0 +1,105 @@
+"""
+Benchmark comparing tracker items across baselines with the diff tool.
+
+Compares every item of a tracker between two baselines of a stub Codebeamer
+with diff_tracker_items, cold and again with the historical reads in the
+history cache, then the first baseline against the current items, and finally
+the way an agent has to without the tool, reading both versions of each item
+in full. Prints the upstream requests, the approximate tokens of what the
+agent reads and the wall time of each.
+
+Usage:
+    python benchmarks/bench_item_diff.py --items 200 --latency-ms 5 --from-baseline 1 --to-baseline 3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def measure(app: Any, name: str, compare: Callable[[], Awaitable[Any]]) -> None:
+    from response_shaping import encoded_size, estimate_tokens
+
+    requests = app.state.stats["requests"]
+    start = time.perf_counter()
+    read = await compare()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<36}{app.state.stats['requests'] - requests:>10}"
+        f"{estimate_tokens(encoded_size(read)):>10}{elapsed * 1000:>10.0f}"
+    )
+
+
+async def compare_baselines(
+    app: Any, item_ids: list, from_baseline: int, to_baseline: int
+) -> None:
+    import codebeamer_interface
+    from item_diff import diff_tracker_items
+
+    async def read_both() -> Any:
+        with codebeamer_interface.upstream_only():
+            return await asyncio.gather(
+                *(
+                    codebeamer_interface.get_tracker_item(
+                        item_id, baseline_id=baseline_id
+                    )
+                    for item_id in item_ids
+                    for baseline_id in (from_baseline, to_baseline)
+                )
+            )
+
+    async def diff() -> Any:
+        return await diff_tracker_items(
+            item_ids, from_baseline_id=from_baseline, to_baseline_id=to_baseline
+        )
+
+    async def diff_current() -> Any:
+        return await diff_tracker_items(item_ids, from_baseline_id=from_baseline)
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        title = f"baseline {from_baseline} -> {to_baseline}"
+        print(f"{title:<36}{'requests':>10}{'tokens':>10}{'ms':>10}")
+        await measure(app, "diff_tracker_items, cold", diff)
+        await measure(app, "diff_tracker_items, history cached", diff)
+        await measure(app, "diff against current items", diff_current)
+        await measure(app, "read both versions of every item", read_both)
+        summary = (await diff())["summary"]
+    print(f"\n{summary}")
+
+
+def main(args: argparse.Namespace) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    dataset = StubDataset(items_per_tracker=args.items)
+    item_ids = dataset.item_ids(101)
+    with run_stub_in_thread(
+        port=args.port, dataset=dataset, latency_ms=args.latency_ms
+    ) as app:
+        asyncio.run(
+            compare_baselines(app, item_ids, args.from_baseline, args.to_baseline)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--from-baseline", type=int, default=1)
+    parser.add_argument("--to-baseline", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args)
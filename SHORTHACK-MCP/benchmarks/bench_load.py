@@ -0,0 +1,386 @@
+"""
+Load test the MCP server over streamable HTTP with concurrent MCP clients.
+
+Starts the Codebeamer stub and servers/mcp_server.py in their own processes,
+or targets running ones with --server-url and --stub-url, then runs --clients
+MCP client sessions for --duration seconds. Each session calls a weighted mix
+of tools on random projects, trackers and items, one call at a time as an
+agent would. Prints throughput, latency percentiles overall and per tool,
+failed calls and the upstream requests the stub received per endpoint. Calls
+made during --warmup are not counted. --output writes the results as JSON;
+with --baseline, a lower throughput or a higher p50, p99 or upstream requests
+per call beyond --tolerance is reported and the script exits with status 1.
+
+The load generator shares the machine with the server and the stub, so
+compare results from the same machine only.
+
+Usage:
+    python benchmarks/bench_load.py --clients 16 --duration 20 --output load.json
+    python benchmarks/bench_load.py --clients 16 --duration 20 --baseline load.json --tolerance 0.2
+    python benchmarks/bench_load.py --items-per-tracker 2000 --latency-ms 20 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Tools called by the clients with their relative weights and argument factories
+TOOL_MIX: List[
+    Tuple[str, int, Callable[[random.Random, "Dataset"], Dict[str, Any]]]
+] = [
+    ("mcp_get_projects", 1, lambda rng, data: {}),
+    (
+        "mcp_get_trackers_by_project_id",
+        2,
+        lambda rng, data: {"project_id": data.project(rng)},
+    ),
+    ("mcp_get_tracker_items", 2, lambda rng, data: {"tracker_id": data.tracker(rng)}),
+    ("mcp_get_tracker_item", 10, lambda rng, data: {"item_id": data.item(rng)}),
+    (
+        "mcp_get_tracker_items_bulk",
+        2,
+        lambda rng, data: {"item_ids": data.items(rng, 20)},
+    ),
+    ("mcp_get_tracker_item_comments", 3, lambda rng, data: {"item_id": data.item(rng)}),
+]
+
+# Results compared with a baseline: path in the results, and whether higher is better
+COMPARED = [
+    (("throughput",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p99"), False),
+    (("upstream", "per_call"), False),
+]
+
+
+class Dataset:
+    """IDs served by a stub started with the same dataset size, see StubDataset."""
+
+    def __init__(
+        self, projects: int, trackers_per_project: int, items_per_tracker: int
+    ):
+        self.projects = projects
+        self.trackers_per_project = trackers_per_project
+        self.items_per_tracker = items_per_tracker
+
+    def project(self, rng: random.Random) -> int:
+        return rng.randint(1, self.projects)
+
+    def tracker(self, rng: random.Random) -> int:
+        return self.project(rng) * 100 + rng.randint(1, self.trackers_per_project)
+
+    def item(self, rng: random.Random) -> int:
+        return self.tracker(rng) * 100000 + rng.randint(1, self.items_per_tracker)
+
+    def items(self, rng: random.Random, count: int) -> List[int]:
+        tracker_id = self.tracker(rng)
+        numbers = rng.sample(
+            range(1, self.items_per_tracker + 1), min(count, self.items_per_tracker)
+        )
+        return [tracker_id * 100000 + n for n in numbers]
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50, p90, p99 and max of latencies in seconds, in milliseconds."""
+    ordered = sorted(latencies) or [0.0]
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": pick(1.0)}
+
+
+async def run_client(
+    url: str,
+    dataset: Dataset,
+    seed: int,
+    warmup_until: float,
+    deadline: float,
+    calls: List[Tuple[str, float, bool]],
+) -> None:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamable_http_client
+
+    rng = random.Random(seed)
+    tools = [tool for tool, _, _ in TOOL_MIX]
+    weights = [weight for _, weight, _ in TOOL_MIX]
+    arguments = {tool: make_arguments for tool, _, make_arguments in TOOL_MIX}
+    async with streamable_http_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.perf_counter() < deadline:
+                tool = rng.choices(tools, weights)[0]
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(
+                        tool, arguments[tool](rng, dataset)
+                    )
+                    # Tools return Codebeamer errors as a dictionary, not a result
+                    returned = (result.structuredContent or {}).get("result")
+                    failed = result.isError or (
+                        isinstance(returned, dict) and "error" in returned
+                    )
+                except Exception:
+                    failed = True
+                if start >= warmup_until:
+                    calls.append((tool, time.perf_counter() - start, failed))
+
+
+async def generate_load(
+    args: argparse.Namespace,
+) -> Tuple[List[Tuple[str, float, bool]], float, Dict[str, Any]]:
+    """
+    Run the clients and return their calls after the warm-up, the duration of those
+    calls and the stub counters when they started.
+    """
+    dataset = Dataset(args.projects, args.trackers_per_project, args.items_per_tracker)
+    calls: List[Tuple[str, float, bool]] = []
+    warmup_until = time.perf_counter() + args.warmup
+    deadline = warmup_until + args.duration
+
+    async def read_counters_after_warmup() -> Dict[str, Any]:
+        await asyncio.sleep(args.warmup)
+        async with httpx.AsyncClient() as client:
+            return (await client.get(f"{args.stub_url}/stub/stats")).json()
+
+    counters = asyncio.ensure_future(read_counters_after_warmup())
+    await asyncio.gather(
+        *(
+            run_client(
+                f"{args.server_url}/mcp",
+                dataset,
+                args.seed + n,
+                warmup_until,
+                deadline,
+                calls,
+            )
+            for n in range(args.clients)
+        )
+    )
+    return calls, time.perf_counter() - warmup_until, await counters
+
+
+def wait_until_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def start_processes(args: argparse.Namespace) -> List[subprocess.Popen]:
+    """Start the stub and the MCP server unless URLs of running ones were given."""
+    processes = []
+    if not args.stub_url:
+        args.stub_url = f"http://127.0.0.1:{args.stub_port}"
+        stub_args = [
+            f"--port={args.stub_port}",
+            f"--projects={args.projects}",
+            f"--trackers-per-project={args.trackers_per_project}",
+            f"--items-per-tracker={args.items_per_tracker}",
+            f"--latency-ms={args.latency_ms}",
+            f"--tail-rate={args.tail_rate}",
+            f"--tail-latency-ms={args.tail_latency_ms}",
+            f"--error-rate={args.error_rate}",
+            f"--default-page-size={args.default_page_size}",
+            f"--seed={args.seed}",
+        ]
+        processes.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    str(ROOT / "benchmarks" / "codebeamer_stub.py"),
+                    *stub_args,
+                ]
+            )
+        )
+        wait_until_ready(f"{args.stub_url}/stub/stats")
+    if not args.server_url:
+        args.server_url = f"http://127.0.0.1:{args.port}"
+        env = {
+            **os.environ,
+            "CODEBEAMER_BASE_URL": args.stub_url,
+            "CODEBEAMER_MCP_TRANSPORT": "streamable-http",
+            "CODEBEAMER_MCP_WORKERS": str(args.workers),
+            "CODEBEAMER_RATE_LIMIT": os.getenv("CODEBEAMER_RATE_LIMIT", "0"),
+        }
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, str(ROOT / "servers" / "mcp_server.py")],
+                cwd=ROOT / "servers",
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+        wait_until_ready(f"{args.server_url}/metrics")
+    return processes
+
+
+def summarise(
+    calls: List[Tuple[str, float, bool]], elapsed: float, upstream: Dict[str, Any]
+) -> Dict[str, Any]:
+    by_tool: Dict[str, Dict[str, Any]] = {}
+    for tool in sorted({tool for tool, _, _ in calls}):
+        tool_calls = [
+            (latency, failed) for name, latency, failed in calls if name == tool
+        ]
+        by_tool[tool] = {
+            "calls": len(tool_calls),
+            "failed": sum(failed for _, failed in tool_calls),
+            **percentiles([latency for latency, _ in tool_calls]),
+        }
+    return {
+        "calls": len(calls),
+        "failed": sum(failed for _, _, failed in calls),
+        "throughput": round(len(calls) / elapsed, 1),
+        "latency_ms": percentiles([latency for _, latency, _ in calls]),
+        "tools": by_tool,
+        "upstream": {
+            **upstream,
+            "per_call": round(upstream["requests"] / max(1, len(calls)), 3),
+        },
+    }
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(
+        f"{'tool':<34}{'calls':>8}{'failed':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+    )
+    for tool, stats in [
+        *results["tools"].items(),
+        ("all tools", {**results, **results["latency_ms"]}),
+    ]:
+        print(
+            f"{tool:<34}{stats['calls']:>8}{stats['failed']:>8}"
+            f"{stats['p50']:>9.1f}{stats['p90']:>9.1f}{stats['p99']:>9.1f}"
+        )
+    upstream = results["upstream"]
+    print(
+        f"\n{results['throughput']:.1f} calls/s, "
+        f"{upstream['requests']} upstream requests "
+        f"({upstream['per_call']:.2f} per call, {upstream['errors']} answered with 503)"
+    )
+    for endpoint, count in sorted(
+        upstream["endpoints"].items(), key=lambda entry: -entry[1]
+    ):
+        print(f"  {endpoint:<40}{count:>8}")
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Print the results next to the baseline and return the names of regressions."""
+    regressions = []
+    print(f"\n{'compared with baseline':<28}{'now':>10}{'baseline':>10}{'change':>9}")
+    for path, higher_is_better in COMPARED:
+        name = ".".join(path)
+        value, reference = results, baseline
+        for key in path:
+            value, reference = value.get(key, {}), reference.get(key, {})
+        if not isinstance(reference, (int, float)) or not reference:
+            continue
+        change = value / reference - 1
+        print(f"{name:<28}{value:>10}{reference:>10}{change * 100:>+8.0f}%")
+        if (change < -tolerance) if higher_is_better else (change > tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    processes = start_processes(args)
+    try:
+        calls, elapsed, start = asyncio.run(generate_load(args))
+        after = httpx.get(f"{args.stub_url}/stub/stats").json()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    upstream = {
+        "requests": after["requests"] - start["requests"],
+        "errors": after["errors"] - start["errors"],
+        "endpoints": {
+            endpoint: count - start["endpoints"].get(endpoint, 0)
+            for endpoint, count in after["endpoints"].items()
+            if count > start["endpoints"].get(endpoint, 0)
+        },
+    }
+    results = summarise(calls, elapsed, upstream)
+    print(
+        f"{args.clients} MCP clients for {args.duration:.0f} s "
+        f"after {args.warmup:.0f} s warm-up\n"
+    )
+    print_results(results)
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        differing = [
+            key
+            for key, value in baseline.get("config", {}).items()
+            if key not in ("output", "baseline", "tolerance")
+            and vars(args).get(key) != value
+        ]
+        if differing:
+            print(
+                "\nNote: the baseline was run with different settings: "
+                f"{', '.join(differing)}"
+            )
+        regressions = compare(results, baseline, args.tolerance)
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({**results, "config": vars(args)}, indent=2)
+        )
+    if regressions:
+        print(
+            f"\nREGRESSION: {', '.join(regressions)} "
+            f"worse than the baseline by more than {args.tolerance:.0%}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--trackers-per-project", type=int, default=4)
+    parser.add_argument("--items-per-tracker", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--default-page-size", type=int, default=25)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--baseline", help="JSON file of results saved by an earlier --output"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--server-url", help="URL of a running MCP server, e.g. http://127.0.0.1:8080"
+    )
+    parser.add_argument(
+        "--stub-url", help="URL of a running stub, e.g. http://127.0.0.1:8765"
+    )
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--stub-port", type=int, default=8765)
+    sys.exit(main(parser.parse_args()))
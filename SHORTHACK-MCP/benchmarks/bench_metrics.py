@@ -0,0 +1,87 @@
+"""
+Benchmark the overhead of tool metrics on MCP tool calls.
+
+Calls a cached read tool of servers/mcp_server.py in process many times,
+alternating between the plain FastMCP call path and the instrumented one, so
+the per-call difference is the cost of recording metrics. The time to render
+/metrics after the run is printed as well.
+
+Usage:
+    python benchmarks/bench_metrics.py --calls 20000 --rounds 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def run(calls: int, rounds: int) -> None:
+    import codebeamer_interface
+    from mcp.server.fastmcp import FastMCP
+    from mcp_server import mcp
+    from metrics import REGISTRY
+
+    arguments = {"item_id": 10100001}
+    async with codebeamer_interface.codebeamer_client_pool():
+        # Warm the response cache so every call measures only the server side
+        await mcp.call_tool("mcp_get_tracker_item", arguments)
+        best = {"plain": float("inf"), "instrumented": float("inf")}
+        # Alternate the two paths and keep the best round of each to cancel out noise
+        for _ in range(rounds):
+            for name, call_tool in (
+                (
+                    "plain",
+                    lambda: FastMCP.call_tool(mcp, "mcp_get_tracker_item", arguments),
+                ),
+                (
+                    "instrumented",
+                    lambda: mcp.call_tool("mcp_get_tracker_item", arguments),
+                ),
+            ):
+                start = time.perf_counter()
+                for _ in range(calls // rounds):
+                    await call_tool()
+                best[name] = min(
+                    best[name], (time.perf_counter() - start) / (calls // rounds)
+                )
+    for name, seconds in best.items():
+        print(f"{name:<14}{seconds * 1e6:>8.1f} us/call")
+    print(
+        f"{'overhead':<14}{(best['instrumented'] - best['plain']) * 1e6:>8.1f} us/call"
+    )
+
+    start = time.perf_counter()
+    text = REGISTRY.render()
+    print(
+        f"render /metrics {(time.perf_counter() - start) * 1000:.2f} ms, "
+        f"{len(text)} bytes"
+    )
+
+
+def main(calls: int, rounds: int, port: int) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    with run_stub_in_thread(port=port):
+        asyncio.run(run(calls, rounds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args.calls, args.rounds, args.port)
@@ -0,0 +1,99 @@
+"""
+Benchmark the local SQLite mirror against reads over HTTP.
+
+Crawls the Codebeamer stub into a temporary mirror, compares get_tracker_item
+latency served from the API and from the mirror, then edits a few items in
+the stub and runs a delta sync, printing how many items and upstream requests
+it took and checking the edits reached the mirror.
+
+Usage:
+    python benchmarks/bench_mirror.py --items 500 --reads 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+import codebeamer_mirror  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def read_items(item_ids: list) -> float:
+    start = time.perf_counter()
+    for item_id in item_ids:
+        result = await codebeamer_interface.get_tracker_item(item_id)
+        assert "result" in result, result
+    return (time.perf_counter() - start) / len(item_ids)
+
+
+async def main(dataset: StubDataset, reads: int, path: str) -> None:
+    item_ids = [10100001 + n % dataset.items_per_tracker for n in range(reads)]
+    mirror = codebeamer_mirror.CodebeamerMirror(path)
+    async with codebeamer_interface.codebeamer_client_pool():
+        upstream = await read_items(item_ids[: reads // 10])
+
+        before = codebeamer_interface.get_request_stats()["upstream_requests"]
+        start = time.perf_counter()
+        totals = await codebeamer_mirror.sync(mirror)
+        crawl = time.perf_counter() - start
+        crawl_requests = (
+            codebeamer_interface.get_request_stats()["upstream_requests"] - before
+        )
+
+        codebeamer_interface.set_mirror(mirror, max_staleness=300)
+        local = await read_items(item_ids)
+
+        for item_id in item_ids[:5]:
+            dataset.touch(item_id, "2025-06-01T12:00:00.000")
+        before = codebeamer_interface.get_request_stats()["upstream_requests"]
+        start = time.perf_counter()
+        delta = await codebeamer_mirror.sync(mirror)
+        delta_elapsed = time.perf_counter() - start
+        delta_requests = (
+            codebeamer_interface.get_request_stats()["upstream_requests"] - before
+        )
+        edited = await codebeamer_interface.get_tracker_item(item_ids[0])
+        assert edited["result"]["version"] == dataset.latest_version(
+            item_ids[0]
+        ), "delta sync must pick up edits"
+    mirror.close()
+
+    print(f"read over HTTP:   {upstream * 1000:8.3f} ms/item")
+    print(f"read from mirror: {local * 1000:8.3f} ms/item")
+    print(
+        f"initial crawl:    {crawl:8.2f} s, {totals['updated']} items, "
+        f"{crawl_requests} requests"
+    )
+    print(
+        f"delta sync:       {delta_elapsed:8.2f} s, {delta['updated']} items, "
+        f"{delta_requests} requests"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500, help="items per tracker")
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.set_rate_limiter(None)
+    dataset = StubDataset(items_per_tracker=args.items)
+    with tempfile.TemporaryDirectory() as tmp, run_stub_in_thread(
+        port=args.port, dataset=dataset, latency_ms=args.latency_ms
+    ):
+        asyncio.run(main(dataset, args.reads, os.path.join(tmp, "mirror.db")))
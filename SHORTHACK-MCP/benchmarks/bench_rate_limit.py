@@ -0,0 +1,86 @@
+"""
+Benchmark many agents sharing one throttled Codebeamer instance.
+
+The stub answers 429 with Retry-After above its rate limit and fails a share
+of requests with 503. The same burst of agents is run without client-side
+protection and then with the adaptive rate limiter and jittered retries, and
+the share of calls that reached the agent as errors is printed for both.
+
+Usage:
+    python benchmarks/bench_rate_limit.py --agents 20 --calls 10 --server-rate 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+from resilience import AdaptiveRateLimiter  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def agent(agent_id: int, calls: int) -> int:
+    errors = 0
+    for n in range(calls):
+        result = await codebeamer_interface.get_tracker_item(
+            10100001 + agent_id * calls + n
+        )
+        errors += "error" in result
+    return errors
+
+
+async def run(agents: int, calls: int) -> dict:
+    start = time.perf_counter()
+    async with codebeamer_interface.codebeamer_client_pool():
+        errors = sum(await asyncio.gather(*(agent(a, calls) for a in range(agents))))
+    return {"errors": errors, "elapsed": time.perf_counter() - start}
+
+
+def main(agents: int, calls: int, server_rate: float, port: int) -> None:
+    codebeamer_interface.set_response_cache(None)
+    codebeamer_interface.get_validator_store().max_entries = 0
+    total = agents * calls
+    for name, limiter, attempts in (
+        ("unprotected", None, "1"),
+        (
+            "rate limited",
+            AdaptiveRateLimiter(rate=server_rate * 2, burst=server_rate),
+            "6",
+        ),
+    ):
+        codebeamer_interface.set_rate_limiter(limiter)
+        os.environ["CODEBEAMER_RETRY_MAX_ATTEMPTS"] = attempts
+        with run_stub_in_thread(
+            port=port,
+            dataset=StubDataset(items_per_tracker=total),
+            rate_limit=server_rate,
+            error_rate=0.05,
+        ) as app:
+            stats = asyncio.run(run(agents, calls))
+            print(
+                f"{name:<14}errors {stats['errors'] / total:>6.1%}   "
+                f"429s {app.state.stats['throttled']:>5}   "
+                f"upstream {app.state.stats['requests']:>5}   "
+                f"{stats['elapsed']:.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--server-rate", type=float, default=50.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args.agents, args.calls, args.server_rate, args.port)
@@ -0,0 +1,93 @@
+"""
+Benchmark field projection and token budgets on MCP tool results.
+
+Calls the read tools of servers/mcp_server.py in process, through FastMCP so
+the timing includes argument validation and JSON serialisation, against a
+stub tracker dump. Each tool is called unshaped, with a field projection and
+with two token budgets, and the serialised payload size, approximate token count
+and median end-to-end latency are printed for each call.
+
+Usage:
+    python benchmarks/bench_response_shaping.py --items 500 --repeat 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+FIELDS = ["id", "name", "status.name", "modifiedAt"]
+
+
+async def measure(mcp, tool: str, arguments: dict, repeat: int) -> tuple[int, float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content = await mcp.call_tool(tool, arguments)
+        latencies.append(time.perf_counter() - start)
+    size = sum(
+        len(block.text.encode()) for block in content[0] if hasattr(block, "text")
+    )
+    return size, statistics.median(latencies)
+
+
+async def run(items: int, repeat: int, max_tokens: int) -> None:
+    import codebeamer_interface
+    from mcp_server import mcp
+    from response_shaping import estimate_tokens
+
+    item_ids = [10100001 + n for n in range(items)]
+    scenarios = [
+        ("mcp_get_tracker_items_bulk", {"item_ids": item_ids}),
+        ("mcp_iter_tracker_items", {"tracker_id": 101, "limit": items}),
+        ("mcp_get_tracker_item", {"item_id": 10100007}),
+    ]
+    print(f"{'tool':<30}{'shaping':<28}{'bytes':>10}{'tokens':>9}{'p50 ms':>9}")
+    async with codebeamer_interface.codebeamer_client_pool():
+        for tool, arguments in scenarios:
+            # Warm the response cache so only shaping and serialisation differ
+            await mcp.call_tool(tool, arguments)
+            baseline = None
+            for label, extra in (
+                ("none", {}),
+                (f"fields={len(FIELDS)}", {"fields": FIELDS}),
+                (f"max_tokens={max_tokens}", {"max_tokens": max_tokens}),
+                (f"max_tokens={max_tokens // 16}", {"max_tokens": max_tokens // 16}),
+            ):
+                size, latency = await measure(mcp, tool, {**arguments, **extra}, repeat)
+                baseline = baseline or size
+                print(
+                    f"{tool:<30}{label:<28}{size:>10}"
+                    f"{estimate_tokens(size):>9}{latency * 1000:>9.2f}"
+                    f"   {size / baseline:>6.1%}"
+                )
+
+
+def main(items: int, repeat: int, max_tokens: int, port: int) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    with run_stub_in_thread(port=port, dataset=StubDataset(items_per_tracker=items)):
+        asyncio.run(run(items, repeat, max_tokens))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=4000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args.items, args.repeat, args.max_tokens, args.port)
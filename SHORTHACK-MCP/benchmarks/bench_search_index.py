@@ -0,0 +1,99 @@
+"""
+Benchmark building and querying the BM25 search index.
+
+Indexes synthetic tracker items (name, description and two comments drawn from
+a fixed vocabulary) directly, without HTTP, then measures query latency for
+one- to three-word queries and the cost of incrementally re-indexing items.
+
+Usage:
+    python benchmarks/bench_search_index.py --items 100000 --queries 1000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from search_index import SearchIndex  # noqa: E402
+
+DOMAIN_WORDS = (
+    "brake regulation pedal force sensor torque steering airbag battery voltage "
+    "charging thermal coolant door lock window wiper lamp headlight speed limit "
+    "braking distance emergency stop signal warning display software update diagnostic"
+).split()
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return DOMAIN_WORDS + [
+        "".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(size)
+    ]
+
+
+def sentence(words: int, vocabulary: List[str], rng: random.Random) -> str:
+    # Zipf-like skew so common words dominate as in real text
+    return " ".join(
+        vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)]
+        for _ in range(words)
+    )
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def main(items: int, queries: int) -> None:
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(20000, rng)
+    rng.shuffle(vocabulary)
+    documents = [
+        (
+            item_id,
+            100 + item_id % 20,
+            sentence(6, vocabulary, rng),
+            [
+                sentence(40, vocabulary, rng),
+                sentence(15, vocabulary, rng),
+                sentence(15, vocabulary, rng),
+            ],
+        )
+        for item_id in range(1, items + 1)
+    ]
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for item_id, tracker_id, name, texts in documents:
+        index.add(item_id, tracker_id, name, texts)
+    build = time.perf_counter() - start
+
+    latencies = []
+    for n in range(queries):
+        query = " ".join(rng.sample(vocabulary[:2000], rng.randint(1, 3)))
+        tracker_id = 100 + n % 20 if n % 2 else None
+        start = time.perf_counter()
+        index.search(query, tracker_id=tracker_id, top_k=10)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for item_id, tracker_id, name, texts in documents[:1000]:
+        index.add(item_id, tracker_id, name + " brake regulation", texts)
+    update = (time.perf_counter() - start) / 1000
+
+    print(f"items indexed:     {len(index)}")
+    print(f"build time:        {build:8.2f} s ({items / build:.0f} items/s)")
+    print(f"query p50:         {percentile(latencies, 50) * 1000:8.2f} ms")
+    print(f"query p99:         {percentile(latencies, 99) * 1000:8.2f} ms")
+    print(f"re-index one item: {update * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.items, args.queries)
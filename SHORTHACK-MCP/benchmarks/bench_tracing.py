@@ -0,0 +1,75 @@
+"""
+Benchmark the cost of tracing MCP tool calls at different sampling ratios.
+
+Calls a read tool of servers/mcp_server.py in process with tracing disabled
+and then with the file exporter at several sampling ratios, and prints the
+time per call and the number of spans written. The tool's response is cached
+after the first call, so each call creates a tool span and a request span and
+the differences are the cost of tracing.
+
+Usage:
+    python benchmarks/bench_tracing.py --calls 5000 --ratios 1.0 0.1 0.01
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "servers"))
+
+from codebeamer_stub import run_stub_in_thread  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def call_repeatedly(calls: int) -> float:
+    from mcp_server import mcp
+
+    arguments = {"item_id": 10100001}
+    start = time.perf_counter()
+    for _ in range(calls):
+        await mcp.call_tool("mcp_get_tracker_item", arguments)
+    return (time.perf_counter() - start) / calls
+
+
+async def run(calls: int, ratios: list[float]) -> None:
+    import codebeamer_interface
+    import tracing
+
+    async with codebeamer_interface.codebeamer_client_pool():
+        await call_repeatedly(1)
+        print(f"{'tracing':<22}{'us/call':>10}{'spans':>9}")
+        print(f"{'disabled':<22}{await call_repeatedly(calls) * 1e6:>10.1f}{0:>9}")
+        for ratio in ratios:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "traces.jsonl")
+                tracing.configure_tracing("file", path, ratio)
+                seconds = await call_repeatedly(calls)
+                tracing.shutdown_tracing()
+                with open(path, encoding="utf-8") as spans:
+                    written = sum(1 for _ in spans)
+            print(f"{f'file, ratio {ratio}':<22}{seconds * 1e6:>10.1f}{written:>9}")
+
+
+def main(calls: int, ratios: list[float], port: int) -> None:
+    import codebeamer_interface
+
+    codebeamer_interface.set_rate_limiter(None)
+    with run_stub_in_thread(port=port):
+        asyncio.run(run(calls, ratios))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--ratios", type=float, nargs="+", default=[1.0, 0.1, 0.01])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["CODEBEAMER_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    main(args.calls, args.ratios, args.port)
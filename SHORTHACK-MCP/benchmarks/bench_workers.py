@@ -0,0 +1,157 @@
+"""
+Load test the MCP server with different numbers of worker processes.
+
+For each worker count, starts servers/mcp_server.py with CODEBEAMER_MCP_WORKERS
+against a stub Codebeamer in its own process, then drives it from several load
+generator processes, each keeping a number of JSON-RPC tools/call requests in
+flight over streamable HTTP. Throughput, latency percentiles and the call count
+reported by the merged /metrics (including warm-up calls) are printed per
+worker count. Throughput only scales while there are idle CPU cores for the
+extra workers.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 4 --concurrency 16 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+}
+
+
+async def generate_load(url: str, concurrency: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            payload = {
+                "jsonrpc": "2.0",
+                "id": n,
+                "method": "tools/call",
+                "params": {
+                    "name": "mcp_get_tracker_item",
+                    "arguments": {"item_id": 10100001 + (worker_id + n) % 50},
+                },
+            }
+            start = time.perf_counter()
+            response = await client.post(url, headers=HEADERS, json=payload)
+            if response.status_code == 200 and '"isError":false' in response.text:
+                latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return latencies
+
+
+def load_process(url: str, concurrency: int, duration: float) -> list[float]:
+    return asyncio.run(generate_load(url, concurrency, duration))
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def run(workers: int, args: argparse.Namespace) -> None:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "CODEBEAMER_BASE_URL": f"http://127.0.0.1:{args.stub_port}",
+        "CODEBEAMER_MCP_WORKERS": str(workers),
+        "CODEBEAMER_RATE_LIMIT": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "servers" / "mcp_server.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"{base_url}/metrics")
+        # Warm every worker's response cache before measuring
+        load_process(f"{base_url}/mcp", args.concurrency, 2.0)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(
+                load_process,
+                [(f"{base_url}/mcp", args.concurrency, args.duration)] * args.clients,
+            )
+        latencies = sorted(latency for result in results for latency in result)
+        metrics = httpx.get(f"{base_url}/metrics").text
+        calls = re.search(
+            r'mcp_tool_calls_total\{tool="mcp_get_tracker_item"\} (\d+)', metrics
+        )
+        print(
+            f"{workers:>7}{len(latencies) / args.duration:>10.0f}"
+            f"{latencies[len(latencies) // 2] * 1000:>9.1f}"
+            f"{latencies[int(len(latencies) * 0.99)] * 1000:>9.1f}"
+            f"{calls.group(1) if calls else '-':>12}"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args: argparse.Namespace) -> None:
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "benchmarks" / "codebeamer_stub.py"),
+            "--port",
+            str(args.stub_port),
+            "--latency-ms",
+            str(args.latency_ms),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.stub_port}/v3/projects")
+        print(
+            f"{os.cpu_count()} CPU cores, "
+            f"{args.clients} load processes x {args.concurrency} concurrent calls"
+        )
+        print(
+            f"{'workers':>7}{'calls/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'/metrics':>12}"
+        )
+        for workers in args.workers:
+            run(workers, args)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--stub-port", type=int, default=8765)
+    main(parser.parse_args())
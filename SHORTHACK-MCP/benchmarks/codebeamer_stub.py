@@ -0,0 +1,455 @@
+"""
+Local stand-in for the Codebeamer REST API used by the benchmarks.
+
+Serves deterministic fake data for the /v3 endpoints wrapped by
+servers/codebeamer_interface.py so the MCP server can be exercised without a
+live Codebeamer instance. Latency, faults, page sizes and the dataset size are
+configurable, and GET /stub/stats returns the request counters, including
+requests per endpoint, so load tests in other processes can read them.
+
+Run standalone:
+    python benchmarks/codebeamer_stub.py --port 8765 --latency-ms 5
+    python benchmarks/codebeamer_stub.py --items-per-tracker 2000 --error-rate 0.01 --tail-rate 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Collection, Dict, Iterator, List
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Numeric path segments, replaced by {id} when counting requests per endpoint
+ID_SEGMENT = re.compile(r"/\d+")
+
+
+class StubDataset:
+    """
+    Deterministic projects, trackers, items and comments.
+
+    Items have one to four versions, older ones with a different status,
+    shorter description and one custom field changed. Baseline N holds every
+    item at version N or its latest version, except that items whose ID ends
+    in 0 were only created after baseline 1.
+    """
+
+    def __init__(
+        self,
+        projects: int = 3,
+        trackers_per_project: int = 4,
+        items_per_tracker: int = 50,
+    ):
+        self.projects = projects
+        self.trackers_per_project = trackers_per_project
+        self.items_per_tracker = items_per_tracker
+        self.comments: Dict[int, List[Dict[str, Any]]] = {}
+        self.modified: Dict[int, Dict[str, Any]] = {}
+
+    def touch(self, item_id: int, modified_at: str) -> None:
+        """Simulate an edit of an item, bumping its version and modification time."""
+        version = self.latest_version(item_id) + 1
+        self.modified[item_id] = {"version": version, "modifiedAt": modified_at}
+
+    def project(self, project_id: int) -> Dict[str, Any]:
+        return {
+            "id": project_id,
+            "name": f"Project {project_id}",
+            "type": "ProjectReference",
+        }
+
+    def tracker(self, tracker_id: int) -> Dict[str, Any]:
+        return {
+            "id": tracker_id,
+            "name": f"Tracker {tracker_id}",
+            "type": "TrackerReference",
+        }
+
+    def user(self, user_id: int) -> Dict[str, Any]:
+        return {
+            "id": user_id,
+            "name": f"user{user_id}",
+            "email": f"user{user_id}@example.com",
+            "type": "UserReference",
+        }
+
+    def status(self, n: int) -> Dict[str, Any]:
+        return {
+            "id": 1 + n % 4,
+            "name": ("New", "In Progress", "Accepted", "Closed")[n % 4],
+        }
+
+    def latest_version(self, item_id: int) -> int:
+        return self.modified.get(item_id, {}).get("version", 1 + item_id % 4)
+
+    def baseline_version(self, item_id: int, baseline_id: int) -> int | None:
+        """Version of an item in a baseline, or None if the item did not exist yet."""
+        if baseline_id < 2 and item_id % 10 == 0:
+            return None
+        return min(self.latest_version(item_id), max(1, baseline_id))
+
+    def item(self, item_id: int, version: int | None = None) -> Dict[str, Any]:
+        tracker_id = item_id // 100000
+        item = {
+            "id": item_id,
+            "name": f"Requirement {item_id}",
+            "description": f"The system shall satisfy requirement {item_id}. "
+            * (1 + item_id % 8),
+            "descriptionFormat": "Wiki",
+            "version": self.latest_version(item_id),
+            "tracker": self.tracker(tracker_id),
+            "status": self.status(item_id),
+            "priority": {"id": 2, "name": "Normal"},
+            "createdBy": self.user(1 + item_id % 7),
+            "modifiedBy": self.user(1 + item_id % 5),
+            "assignedTo": [self.user(1 + item_id % 3)],
+            "createdAt": "2024-06-01T09:00:00.000",
+            "modifiedAt": (
+                datetime(2025, 1, 1) + timedelta(minutes=item_id % 100000)
+            ).isoformat(timespec="milliseconds"),
+            **self.modified.get(item_id, {}),
+            "customFields": [
+                {
+                    "fieldId": 1000 + n,
+                    "name": f"Field {n}",
+                    "value": f"value {n}",
+                    "type": "TextFieldValue",
+                }
+                for n in range(12)
+            ],
+        }
+        behind = item["version"] - version if version is not None else 0
+        if behind > 0:
+            item.update(
+                name=(
+                    f"Requirement {item_id}"
+                    if version > 1
+                    else f"Draft requirement {item_id}"
+                ),
+                description=f"The system shall satisfy requirement {item_id}. "
+                * max(1, 1 + item_id % 8 - behind),
+                status=self.status(item_id - behind),
+                version=version,
+                modifiedAt=(
+                    datetime(2025, 1, 1)
+                    + timedelta(minutes=item_id % 100000, days=-behind)
+                ).isoformat(timespec="milliseconds"),
+            )
+            item["customFields"][behind]["value"] = f"value {behind} (draft)"
+        return item
+
+    def has_item(self, item_id: int) -> bool:
+        return 1 <= item_id % 100000 <= self.items_per_tracker
+
+    def tracker_ids(self, project_id: int) -> List[int]:
+        return [project_id * 100 + n for n in range(1, self.trackers_per_project + 1)]
+
+    def item_ids(self, tracker_id: int) -> List[int]:
+        return [tracker_id * 100000 + n for n in range(1, self.items_per_tracker + 1)]
+
+
+def create_app(
+    dataset: StubDataset | None = None,
+    latency_ms: float = 0.0,
+    items_query: bool = True,
+    error_rate: float = 0.0,
+    rate_limit: float | None = None,
+    tail_rate: float = 0.0,
+    tail_latency_ms: float = 0.0,
+    authorization: str | None = None,
+    lost_response_rate: float = 0.0,
+    default_page_size: int = 25,
+    max_page_size: int = 500,
+    etags: bool = True,
+    forbidden_paths: Collection[str] = (),
+) -> Starlette:
+    """
+    Create the stub Starlette application.
+
+    Args:
+        dataset: Data to serve (default: StubDataset())
+        latency_ms: Delay added to every request
+        items_query: Whether /v3/items/query is available
+        error_rate: Fraction of requests answered with 503
+        rate_limit: Requests per second above which requests get 429 with Retry-After
+        tail_rate: Fraction of requests delayed by tail_latency_ms instead of latency_ms
+        tail_latency_ms: Delay of the slow tail of requests
+        authorization: Authorization header value required, else 401; changing
+            app.state.authorization while serving simulates rotated credentials
+        lost_response_rate: Fraction of comment POSTs that are applied but answered
+            with 504, as if the response was lost on the way back
+        default_page_size: Page size of paged endpoints when the request sets none
+        max_page_size: Largest page size served, larger requests get this many records
+        etags: Whether responses carry an ETag; items always carry Last-Modified
+        forbidden_paths: Paths answered with 403, e.g. "/v3/trackers/101/items"
+    """
+    dataset = dataset or StubDataset()
+    stats = {
+        "requests": 0,
+        "not_modified": 0,
+        "errors": 0,
+        "throttled": 0,
+        "unauthorized": 0,
+        "lost_responses": 0,
+    }
+    endpoints: Dict[str, int] = {}
+    bucket = {"tokens": rate_limit or 0.0, "updated_at": time.monotonic()}
+
+    async def faults(request: Request, call_next) -> Response:
+        if request.url.path.startswith("/stub/"):
+            return await call_next(request)
+        stats["requests"] += 1
+        endpoint = f"{request.method} {ID_SEGMENT.sub('/{id}', request.url.path)}"
+        endpoints[endpoint] = endpoints.get(endpoint, 0) + 1
+        expected = request.app.state.authorization
+        if expected is not None and request.headers.get("authorization") != expected:
+            stats["unauthorized"] += 1
+            return JSONResponse({"message": "Unauthorized"}, status_code=401)
+        if request.url.path in forbidden_paths:
+            return JSONResponse({"message": "Forbidden"}, status_code=403)
+        if tail_rate and random.random() < tail_rate:
+            await asyncio.sleep(tail_latency_ms / 1000)
+        elif latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if rate_limit:
+            now = time.monotonic()
+            bucket["tokens"] = min(
+                rate_limit, bucket["tokens"] + (now - bucket["updated_at"]) * rate_limit
+            )
+            bucket["updated_at"] = now
+            if bucket["tokens"] < 1:
+                stats["throttled"] += 1
+                return JSONResponse(
+                    {"message": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": "1"},
+                )
+            bucket["tokens"] -= 1
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"message": "Service unavailable"}, status_code=503)
+        return await call_next(request)
+
+    def respond(
+        request: Request, data: Any, modified_at: str | None = None
+    ) -> Response:
+        """
+        JSON response with a strong ETag and, given `modified_at`, a Last-Modified date,
+        answering 304 when the client's copy is current. If-None-Match takes precedence
+        over If-Modified-Since, as in RFC 9110.
+        """
+        body = json.dumps(data).encode()
+        headers = {}
+        if etags:
+            headers["ETag"] = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if modified_at is not None:
+            last_modified = datetime.fromisoformat(modified_at).replace(
+                microsecond=0, tzinfo=timezone.utc
+            )
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = if_none_match == headers.get("ETag")
+        else:
+            not_modified = (
+                if_modified_since is not None
+                and modified_at is not None
+                and parsedate_to_datetime(if_modified_since) >= last_modified
+            )
+        if not_modified:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def projects(request: Request) -> Response:
+        return respond(
+            request, [dataset.project(n) for n in range(1, dataset.projects + 1)]
+        )
+
+    async def trackers(request: Request) -> Response:
+        project_id = int(request.path_params["project_id"])
+        return respond(
+            request, [dataset.tracker(t) for t in dataset.tracker_ids(project_id)]
+        )
+
+    async def tracker_items(request: Request) -> Response:
+        tracker_id = int(request.path_params["tracker_id"])
+        page = int(request.query_params.get("page", 1))
+        page_size = min(
+            int(request.query_params.get("pageSize", default_page_size)), max_page_size
+        )
+        ids = dataset.item_ids(tracker_id)
+        refs = [
+            {"id": i, "name": f"Requirement {i}", "type": "TrackerItemReference"}
+            for i in ids[(page - 1) * page_size : page * page_size]
+        ]
+        return respond(
+            request,
+            {"page": page, "pageSize": page_size, "total": len(ids), "itemRefs": refs},
+        )
+
+    async def item(request: Request) -> Response:
+        item_id = int(request.path_params["item_id"])
+        if not dataset.has_item(item_id):
+            return JSONResponse(
+                {"message": f"Item {item_id} not found"}, status_code=404
+            )
+        version = request.query_params.get("version")
+        baseline_id = request.query_params.get("baselineId")
+        if baseline_id is not None:
+            version = dataset.baseline_version(item_id, int(baseline_id))
+            if version is None:
+                return JSONResponse(
+                    {"message": f"Item {item_id} not in baseline {baseline_id}"},
+                    status_code=404,
+                )
+        elif version is not None:
+            version = int(version)
+            if not 1 <= version <= dataset.latest_version(item_id):
+                return JSONResponse(
+                    {"message": f"Item {item_id} has no version {version}"},
+                    status_code=404,
+                )
+        item = dataset.item(item_id, version)
+        return respond(request, item, item["modifiedAt"])
+
+    async def query_items(request: Request) -> Response:
+        if not items_query:
+            return JSONResponse({"message": "Not found"}, status_code=404)
+        query = request.query_params.get("queryString", "")
+        page = int(request.query_params.get("page", 1))
+        page_size = min(
+            int(request.query_params.get("pageSize", default_page_size)), max_page_size
+        )
+        by_id = re.fullmatch(r"item\.id IN \(([\d,\s]*)\)", query)
+        by_tracker = re.fullmatch(
+            r"tracker\.id IN \((\d+)\)(?: AND modifiedAt >= '([^']+)')?", query
+        )
+        if by_id:
+            ids = [int(i) for i in by_id.group(1).split(",") if i.strip()]
+            items = [dataset.item(i) for i in ids if dataset.has_item(i)]
+        elif by_tracker:
+            since = (by_tracker.group(2) or "").replace(" ", "T")
+            items = [
+                dataset.item(i) for i in dataset.item_ids(int(by_tracker.group(1)))
+            ]
+            items = [i for i in items if i["modifiedAt"] >= since]
+        else:
+            return JSONResponse({"message": "Unsupported query"}, status_code=400)
+        total = len(items)
+        items = items[(page - 1) * page_size : page * page_size]
+        return respond(
+            request,
+            {"page": page, "pageSize": page_size, "total": total, "items": items},
+        )
+
+    async def comments(request: Request) -> Response:
+        item_id = int(request.path_params["item_id"])
+        if request.method == "POST":
+            form = await request.form()
+            comment = {
+                "id": len(dataset.comments.get(item_id, [])) + 1,
+                "comment": form.get("comment"),
+                "commentFormat": form.get("commentFormat"),
+                "createdAt": datetime.now(timezone.utc)
+                .replace(tzinfo=None)
+                .isoformat(timespec="milliseconds"),
+            }
+            dataset.comments.setdefault(item_id, []).append(comment)
+            if lost_response_rate and random.random() < lost_response_rate:
+                stats["lost_responses"] += 1
+                return JSONResponse({"message": "Gateway timeout"}, status_code=504)
+            return JSONResponse(comment, status_code=201)
+        return respond(request, dataset.comments.get(item_id, []))
+
+    async def stub_stats(request: Request) -> Response:
+        return JSONResponse({**stats, "endpoints": endpoints})
+
+    app = Starlette(
+        routes=[
+            Route("/stub/stats", stub_stats),
+            Route("/v3/projects", projects),
+            Route("/v3/projects/{project_id:int}/trackers", trackers),
+            Route("/v3/trackers/{tracker_id:int}/items", tracker_items),
+            Route("/v3/items/query", query_items),
+            Route("/v3/items/{item_id:int}", item),
+            Route(
+                "/v3/items/{item_id:int}/comments", comments, methods=["GET", "POST"]
+            ),
+        ],
+        middleware=[Middleware(BaseHTTPMiddleware, dispatch=faults)],
+    )
+    app.state.stats = stats
+    app.state.endpoints = endpoints
+    app.state.authorization = authorization
+    app.state.dataset = dataset
+    return app
+
+
+@contextmanager
+def run_stub_in_thread(port: int = 8765, **app_kwargs: Any) -> Iterator[Starlette]:
+    """Serve the stub on 127.0.0.1:<port> from a background thread."""
+    app = create_app(**app_kwargs)
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield app
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Codebeamer API stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--trackers-per-project", type=int, default=4)
+    parser.add_argument("--items-per-tracker", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--lost-response-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--default-page-size", type=int, default=25)
+    parser.add_argument("--max-page-size", type=int, default=500)
+    parser.add_argument(
+        "--no-items-query", action="store_true", help="Answer /v3/items/query with 404"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed for the random faults"
+    )
+    args = parser.parse_args()
+    random.seed(args.seed)
+    app = create_app(
+        StubDataset(args.projects, args.trackers_per_project, args.items_per_tracker),
+        latency_ms=args.latency_ms,
+        items_query=not args.no_items_query,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        tail_rate=args.tail_rate,
+        tail_latency_ms=args.tail_latency_ms,
+        lost_response_rate=args.lost_response_rate,
+        default_page_size=args.default_page_size,
+        max_page_size=args.max_page_size,
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
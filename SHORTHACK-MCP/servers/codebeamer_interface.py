@@ -1,10 +1,33 @@
-import base64
+import asyncio
+import hashlib
 import logging
+import math
 import os
-from typing import Any, Dict
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, List, Protocol, Tuple
+from urllib.parse import quote
 
+import codec
 import httpx
-from dotenv import load_dotenv
+from config import load_config
+from credentials import CredentialsProvider, credentials_from_env
+from metrics import REGISTRY, Counter, Gauge, track_upstream_request
+from resilience import (
+    AdaptiveRateLimiter,
+    CircuitBreaker,
+    LatencyTracker,
+    WriteQueue,
+    backoff_delay,
+    endpoint_class,
+    parse_retry_after,
+)
+from response_cache import IMMUTABLE_ENDPOINT, CacheBackend, TTLLRUCache, ValidatorStore
+from tracing import inject_trace_context, start_span
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -12,74 +35,870 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Largest page size accepted by the /v3/trackers/{trackerId}/items endpoint
+MAX_PAGE_SIZE = 500
+
+# Set to False once the server has rejected /v3/items/query, so bulk fetches skip it
+_items_query_supported = True
+
+# Shared client used by every request while a pool is open (see codebeamer_client_pool).
+_client: httpx.AsyncClient | None = None
+
+# Credentials and prebuilt auth headers, created by get_credentials_provider
+_credentials: CredentialsProvider | None = None
+
+# Cache for GET responses, created on first use (see get_response_cache)
+_response_cache: CacheBackend | None = None
+_response_cache_configured = False
+
+# Cache for item versions and baselines, which never change (see get_history_cache)
+_history_cache: CacheBackend | None = None
+_history_cache_configured = False
+
+# ETag / Last-Modified validators used to revalidate GETs (see get_validator_store)
+_validator_store: ValidatorStore | None = None
+_validator_store_configured = False
+
+# Token bucket shared by every upstream request (see get_rate_limiter)
+_rate_limiter: AdaptiveRateLimiter | None = None
+_rate_limiter_configured = False
+
+# Seconds the Codebeamer clock may lag ours when a comment is found by its creation time
+COMMENT_CLOCK_SKEW = 30.0
+
+# Responses worth retrying for idempotent requests
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+RETRY_ERRORS = {"Request timeout", "Connection error"}
+
+# Circuit breakers and recent latencies per resilience.endpoint_class
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_latency_trackers: Dict[str, LatencyTracker] = {}
+_resilience_settings: Dict[str, Any] | None = None
+
+# Set inside upstream_only() to bypass the response cache and the mirror
+_upstream_only: ContextVar[bool] = ContextVar("upstream_only", default=False)
+
+# Cleared inside without_storing() to keep responses out of the caches
+_store_responses: ContextVar[bool] = ContextVar("store_responses", default=True)
+
+# Upstream GETs currently in flight, keyed by endpoint, shared by concurrent callers
+_in_flight: Dict[str, asyncio.Task] = {}
+
+# Shared queue for comment writes while open (see codebeamer_write_queue)
+_write_queue: WriteQueue | None = None
+
+# Results of completed comment writes by idempotency key, created on first use,
+# and the writes still in progress
+_completed_writes: TTLLRUCache | None = None
+_pending_writes: Dict[str, asyncio.Future] = {}
+
+_request_stats = {
+    "upstream_requests": 0,
+    "coalesced_requests": 0,
+    "not_modified": 0,
+    "bytes_saved": 0,
+    "retries": 0,
+    "circuit_rejected": 0,
+    "hedged_requests": 0,
+    "hedge_wins": 0,
+    "credential_refreshes": 0,
+}
+
+
+class CodebeamerError(Exception):
+    """Raised by iterator APIs when Codebeamer returns an error dictionary."""
+
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(error.get("error"))
+        self.error = error
+
+
+class MirrorReader(Protocol):
+    """Local copy of Codebeamer data that read functions may serve from."""
 
-def _get_codebeamer_credentials():
-    """Load and return Codebeamer credentials from environment variables."""
-    load_dotenv()
+    def get_projects(self, max_staleness: float) -> List[Dict[str, Any]] | None: ...
+
+    def get_trackers(
+        self, project_id: int, max_staleness: float
+    ) -> List[Dict[str, Any]] | None: ...
+
+    def get_tracker_item_refs(
+        self, tracker_id: int, max_staleness: float
+    ) -> List[Dict[str, Any]] | None: ...
+
+    def get_item(self, item_id: int, max_staleness: float) -> Dict[str, Any] | None: ...
+
+
+# Mirror used by read functions while its data is fresher than _mirror_max_staleness
+_mirror: MirrorReader | None = None
+_mirror_max_staleness = 0.0
+
+
+def _get_client_settings() -> Dict[str, Any]:
+    """Load HTTP connection pool settings from environment variables."""
+    load_config()
     return {
-        "base_url": os.getenv("CODEBEAMER_BASE_URL", ""),
-        "username": os.getenv("CODEBEAMER_USERNAME", ""),
-        "password": os.getenv("CODEBEAMER_PASSWORD", ""),
+        "timeout": float(os.getenv("CODEBEAMER_HTTP_TIMEOUT", "30.0")),
+        "max_connections": int(os.getenv("CODEBEAMER_HTTP_MAX_CONNECTIONS", "100")),
+        "max_keepalive_connections": int(
+            os.getenv("CODEBEAMER_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+        ),
+        "keepalive_expiry": float(
+            os.getenv("CODEBEAMER_HTTP_KEEPALIVE_EXPIRY", "30.0")
+        ),
+        "http2": os.getenv("CODEBEAMER_HTTP2", "false").lower() in ("1", "true", "yes"),
     }
 
 
+def _create_client(settings: Dict[str, Any]) -> httpx.AsyncClient:
+    """Create an AsyncClient from pool settings, falling back to HTTP/1.1 without h2."""
+    http2 = settings["http2"]
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    return httpx.AsyncClient(timeout=settings["timeout"], limits=limits, http2=http2)
+
+
+async def open_client_pool(**overrides: Any) -> httpx.AsyncClient:
+    """
+    Open the shared Codebeamer HTTP client pool.
+
+    Settings are read from environment variables:
+    - CODEBEAMER_HTTP_TIMEOUT: Request timeout in seconds (default: 30.0)
+    - CODEBEAMER_HTTP_MAX_CONNECTIONS: Maximum open connections (default: 100)
+    - CODEBEAMER_HTTP_MAX_KEEPALIVE_CONNECTIONS: Maximum idle connections (default: 20)
+    - CODEBEAMER_HTTP_KEEPALIVE_EXPIRY: Seconds idle connections are kept (default: 30)
+    - CODEBEAMER_HTTP2: Enable HTTP/2 if the 'h2' package is installed (default: false)
+
+    Args:
+        overrides: Optional values that take precedence over the environment settings
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _client
+    if _client is None:
+        settings = {**_get_client_settings(), **overrides}
+        _client = _create_client(settings)
+        logger.info(
+            "Opened Codebeamer client pool (max_connections=%s, http2=%s)",
+            settings["max_connections"],
+            settings["http2"],
+        )
+    return _client
+
+
+async def close_client_pool() -> None:
+    """Close the shared Codebeamer HTTP client pool and release its connections."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+        logger.info("Closed Codebeamer client pool")
+
+
+@asynccontextmanager
+async def codebeamer_client_pool(**overrides: Any) -> AsyncIterator[httpx.AsyncClient]:
+    """Keep the shared Codebeamer client pool open for the duration of the context."""
+    client = await open_client_pool(**overrides)
+    try:
+        yield client
+    finally:
+        await close_client_pool()
+
+
+@asynccontextmanager
+async def _get_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client if a pool is open, otherwise a one-off client."""
+    if _client is not None:
+        yield _client
+    else:
+        async with _create_client(_get_client_settings()) as client:
+            yield client
+
+
+@contextmanager
+def upstream_only() -> Iterator[None]:
+    """Send requests made within the context to Codebeamer, not the cache or mirror."""
+    token = _upstream_only.set(True)
+    try:
+        yield
+    finally:
+        _upstream_only.reset(token)
+
+
+@contextmanager
+def without_storing() -> Iterator[None]:
+    """
+    Keep responses of requests made within the context out of the response cache and
+    the validator store, e.g. pages streamed once; cached responses are still served.
+    """
+    token = _store_responses.set(False)
+    try:
+        yield
+    finally:
+        _store_responses.reset(token)
+
+
+def set_mirror(mirror: MirrorReader | None, max_staleness: float = 300.0) -> None:
+    """
+    Serve read functions from a local mirror when possible, or stop with None.
+
+    Args:
+        mirror: The mirror to read from, e.g. a codebeamer_mirror.CodebeamerMirror
+        max_staleness: Maximum seconds since the data was synced for it to be served
+    """
+    global _mirror, _mirror_max_staleness
+    _mirror = mirror
+    _mirror_max_staleness = max_staleness
+
+
+def _read_mirror() -> MirrorReader | None:
+    """Return the mirror if reads may be served from it in the current context."""
+    return None if _upstream_only.get() else _mirror
+
+
+def get_response_cache() -> CacheBackend | None:
+    """
+    Return the cache used for GET responses, creating the default one on first use.
+
+    The default cache is a TTLLRUCache sized by CODEBEAMER_CACHE_MAX_ENTRIES
+    (default: 1024); setting it to 0 disables caching.
+    """
+    global _response_cache, _response_cache_configured
+    if not _response_cache_configured:
+        load_config()
+        max_entries = int(os.getenv("CODEBEAMER_CACHE_MAX_ENTRIES", "1024"))
+        _response_cache = (
+            TTLLRUCache(max_entries=max_entries) if max_entries > 0 else None
+        )
+        _response_cache_configured = True
+    return _response_cache
+
+
+def set_response_cache(cache: CacheBackend | None) -> None:
+    """Replace the GET response cache with a custom backend, or disable it with None."""
+    global _response_cache, _response_cache_configured
+    _response_cache = cache
+    _response_cache_configured = True
+
+
+def get_history_cache() -> CacheBackend | None:
+    """
+    Return the cache for items read at a version or baseline, creating it on first use.
+
+    Historical reads never change, so they are kept apart from the response cache:
+    they never expire, writes do not invalidate them and short-lived responses do
+    not evict them. The default cache is sized by CODEBEAMER_HISTORY_CACHE_MAX_ENTRIES
+    (default: 4096); setting it to 0 leaves historical reads to the response cache.
+    """
+    global _history_cache, _history_cache_configured
+    if not _history_cache_configured:
+        load_config()
+        max_entries = int(os.getenv("CODEBEAMER_HISTORY_CACHE_MAX_ENTRIES", "4096"))
+        _history_cache = (
+            TTLLRUCache(
+                max_entries=max_entries, ttl_rules=[(IMMUTABLE_ENDPOINT, math.inf)]
+            )
+            if max_entries > 0
+            else None
+        )
+        _history_cache_configured = True
+    return _history_cache
+
+
+def set_history_cache(cache: CacheBackend | None) -> None:
+    """Replace the cache of historical reads; None leaves them to the response cache."""
+    global _history_cache, _history_cache_configured
+    _history_cache = cache
+    _history_cache_configured = True
+
+
+def _cache_for(endpoint: str) -> CacheBackend | None:
+    """Return the cache holding responses of an endpoint."""
+    if re.search(IMMUTABLE_ENDPOINT, endpoint):
+        history = get_history_cache()
+        if history is not None:
+            return history
+    return get_response_cache()
+
+
+def get_validator_store() -> ValidatorStore | None:
+    """
+    Return the store of response validators, creating it on first use.
+
+    The store is sized by CODEBEAMER_VALIDATOR_MAX_ENTRIES (default: 1024);
+    setting it to 0 disables conditional GETs.
+    """
+    global _validator_store, _validator_store_configured
+    if not _validator_store_configured:
+        load_config()
+        max_entries = int(os.getenv("CODEBEAMER_VALIDATOR_MAX_ENTRIES", "1024"))
+        _validator_store = (
+            ValidatorStore(max_entries=max_entries) if max_entries > 0 else None
+        )
+        _validator_store_configured = True
+    return _validator_store
+
+
+def set_validator_store(store: ValidatorStore | None) -> None:
+    """Replace the store of response validators; None disables conditional GETs."""
+    global _validator_store, _validator_store_configured
+    _validator_store = store
+    _validator_store_configured = True
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter | None:
+    """
+    Return the rate limiter shared by all requests, creating it on first use.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_RATE_LIMIT: Maximum requests per second, 0 disables it (default: 20)
+    - CODEBEAMER_RATE_BURST: Requests sent at once after idling (default: 20)
+    """
+    global _rate_limiter, _rate_limiter_configured
+    if not _rate_limiter_configured:
+        load_config()
+        rate = float(os.getenv("CODEBEAMER_RATE_LIMIT", "20"))
+        burst = float(os.getenv("CODEBEAMER_RATE_BURST", "20"))
+        _rate_limiter = (
+            AdaptiveRateLimiter(rate=rate, burst=burst) if rate > 0 else None
+        )
+        _rate_limiter_configured = True
+    return _rate_limiter
+
+
+def set_rate_limiter(limiter: AdaptiveRateLimiter | None) -> None:
+    """Replace the shared rate limiter, or disable rate limiting with None."""
+    global _rate_limiter, _rate_limiter_configured
+    _rate_limiter = limiter
+    _rate_limiter_configured = True
+
+
+def _get_retry_settings() -> Dict[str, float]:
+    """
+    Load retry settings for idempotent requests from environment variables.
+
+    - CODEBEAMER_RETRY_MAX_ATTEMPTS: Attempts per request, 1 disables them (default: 4)
+    - CODEBEAMER_RETRY_DEADLINE: Seconds after which no retry is started (default: 60)
+    """
+    load_config()
+    return {
+        "max_attempts": int(os.getenv("CODEBEAMER_RETRY_MAX_ATTEMPTS", "4")),
+        "deadline": float(os.getenv("CODEBEAMER_RETRY_DEADLINE", "60")),
+    }
+
+
+def _get_resilience_settings() -> Dict[str, Any]:
+    """
+    Load circuit breaker and hedging settings from environment variables once.
+
+    - CODEBEAMER_BREAKER_FAILURE_THRESHOLD: Failures in a row that open a circuit,
+      0 disables circuit breakers (default: 5)
+    - CODEBEAMER_BREAKER_RESET_TIMEOUT: Seconds before an open circuit is probed
+      (default: 30)
+    - CODEBEAMER_HEDGE_REQUESTS: Send a second GET when the first is slower than the
+      p95 latency (default: false)
+    - CODEBEAMER_HEDGE_MIN_DELAY: Minimum seconds before a hedged GET (default: 0.05)
+    """
+    global _resilience_settings
+    if _resilience_settings is None:
+        load_config()
+        _resilience_settings = {
+            "failure_threshold": int(
+                os.getenv("CODEBEAMER_BREAKER_FAILURE_THRESHOLD", "5")
+            ),
+            "reset_timeout": float(os.getenv("CODEBEAMER_BREAKER_RESET_TIMEOUT", "30")),
+            "hedge": os.getenv("CODEBEAMER_HEDGE_REQUESTS", "false").lower()
+            in ("1", "true", "yes"),
+            "hedge_min_delay": float(os.getenv("CODEBEAMER_HEDGE_MIN_DELAY", "0.05")),
+        }
+    return _resilience_settings
+
+
+def _get_circuit_breaker(endpoint: str) -> CircuitBreaker | None:
+    """Return the circuit breaker for the endpoint's class, or None if disabled."""
+    settings = _get_resilience_settings()
+    if settings["failure_threshold"] <= 0:
+        return None
+    key = endpoint_class(endpoint)
+    breaker = _circuit_breakers.get(key)
+    if breaker is None:
+        breaker = _circuit_breakers[key] = CircuitBreaker(
+            settings["failure_threshold"], settings["reset_timeout"]
+        )
+    return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Return state and counters of every circuit breaker, keyed by endpoint class."""
+    return {key: breaker.stats() for key, breaker in _circuit_breakers.items()}
+
+
+def _response_to_result(response: httpx.Response) -> Dict[str, Any]:
+    """Return only the data if successful, otherwise return error info."""
+    data = (
+        codec.loads(response.content)
+        if response.content
+        and response.headers.get("content-type", "").startswith("application/json")
+        else response.text
+    )
+    if response.status_code in [200, 201]:
+        return {"result": data}
+    return {"status_code": response.status_code, "error": data}
+
+
+def get_credentials_provider() -> CredentialsProvider:
+    """Return the credentials provider, configured from the environment on first use."""
+    global _credentials
+    if _credentials is None:
+        _credentials = credentials_from_env()
+    return _credentials
+
+
+def set_credentials_provider(provider: CredentialsProvider | None) -> None:
+    """Replace the credentials provider; None reconfigures it from the environment."""
+    global _credentials
+    _credentials = provider
+
+
+def get_request_stats() -> Dict[str, int]:
+    """
+    Return request counters.
+
+    - upstream_requests: Requests actually sent to Codebeamer
+    - coalesced_requests: GETs that joined an identical in-flight request instead
+    - not_modified: Revalidations answered with 304 Not Modified
+    - bytes_saved: Response body bytes not downloaded thanks to 304 answers
+    - retries: Requests sent again after a 429, 5xx, timeout or connection error
+    - circuit_rejected: Requests failed fast because their circuit was open
+    - hedged_requests: Second GETs sent because the first exceeded the p95 latency
+    - hedge_wins: Hedged GETs that answered before the original request
+    - credential_refreshes: Requests sent again with renewed credentials after a 401
+    """
+    return dict(_request_stats)
+
+
+CLIENT_EVENTS = REGISTRY.register(
+    Counter(
+        "codebeamer_client_events_total",
+        "Codebeamer client counters, see get_request_stats().",
+        ("event",),
+    )
+)
+CACHE_EVENTS = REGISTRY.register(
+    Counter(
+        "codebeamer_cache_events_total",
+        "Response cache hits, misses, evictions and expirations.",
+        ("event",),
+    )
+)
+CACHE_ENTRIES = REGISTRY.register(
+    Gauge("codebeamer_cache_entries", "Entries in the response cache.")
+)
+HISTORY_CACHE_EVENTS = REGISTRY.register(
+    Counter(
+        "codebeamer_history_cache_events_total",
+        "History cache hits, misses and evictions.",
+        ("event",),
+    )
+)
+HISTORY_CACHE_ENTRIES = REGISTRY.register(
+    Gauge(
+        "codebeamer_history_cache_entries",
+        "Item versions and baselines in the history cache.",
+    )
+)
+RATE_LIMIT = REGISTRY.register(
+    Gauge(
+        "codebeamer_rate_limit", "Current adaptive rate limit in requests per second."
+    )
+)
+CIRCUIT_STATE = REGISTRY.register(
+    Gauge(
+        "codebeamer_circuit_breaker_state",
+        "Circuit state per endpoint class: 0 closed, 1 half open, 2 open.",
+        ("endpoint",),
+        merge_max=True,
+    )
+)
+CIRCUIT_STATE_VALUES = {
+    CircuitBreaker.CLOSED: 0,
+    CircuitBreaker.HALF_OPEN: 1,
+    CircuitBreaker.OPEN: 2,
+}
+
+
+def _collect_metrics() -> None:
+    """Copy client, cache, rate limiter and circuit breaker state into the metrics."""
+    for event, value in _request_stats.items():
+        CLIENT_EVENTS.set(event, value=value)
+    for cache, events, entries in (
+        (get_response_cache(), CACHE_EVENTS, CACHE_ENTRIES),
+        (get_history_cache(), HISTORY_CACHE_EVENTS, HISTORY_CACHE_ENTRIES),
+    ):
+        for event, value in (cache.stats() if cache is not None else {}).items():
+            if event == "size":
+                entries.set(value=value)
+            else:
+                events.set(event, value=value)
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        RATE_LIMIT.set(value=limiter.rate)
+    for endpoint, breaker in _circuit_breakers.items():
+        CIRCUIT_STATE.set(endpoint, value=CIRCUIT_STATE_VALUES[breaker.state])
+
+
+REGISTRY.add_collector(_collect_metrics)
+
+
 async def _make_codebeamer_request(
     endpoint: str, method: str = "GET", payload: Dict[str, Any] | None = None
+) -> Dict[str, Any]:
+    """
+    Make a generic HTTP request to Codebeamer API.
+
+    GETs are served from the response cache when possible, concurrent GETs
+    for the same endpoint share a single upstream request, and refreshes are
+    conditional on the validators of the previous response.
+    """
+    with start_span(
+        f"codebeamer {method.upper()} {endpoint_class(endpoint)}",
+        attributes={
+            "codebeamer.endpoint": endpoint_class(endpoint),
+            "http.request.method": method.upper(),
+        },
+    ) as span:
+        result = await _make_traced_codebeamer_request(endpoint, method, payload, span)
+        span.set_attribute("codebeamer.error", result.get("error") is not None)
+        return result
+
+
+async def _make_traced_codebeamer_request(
+    endpoint: str, method: str, payload: Dict[str, Any] | None, span: Any
+) -> Dict[str, Any]:
+    cache = _cache_for(endpoint)
+    if method.upper() != "GET":
+        result = await _send_codebeamer_request(endpoint, method, payload)
+        if "result" in result:
+            _invalidate(endpoint.split("?", 1)[0])
+        return result
+
+    if cache is not None and not _upstream_only.get():
+        cached = cache.get(endpoint)
+        span.set_attribute("codebeamer.cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+
+    task = _in_flight.get(endpoint)
+    span.set_attribute("codebeamer.coalesced", task is not None)
+    if task is not None:
+        _request_stats["coalesced_requests"] += 1
+    else:
+        task = asyncio.ensure_future(_fetch_and_cache(endpoint))
+        _in_flight[endpoint] = task
+
+        def release(done: asyncio.Task) -> None:
+            if _in_flight.get(endpoint) is done:
+                del _in_flight[endpoint]
+
+        task.add_done_callback(release)
+    # Shield so a cancelled caller does not cancel the request for the others
+    return await asyncio.shield(task)
+
+
+def _invalidate(endpoint: str) -> None:
+    """Drop cached responses and validators for an endpoint after a write."""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.invalidate(endpoint)
+    validators = get_validator_store()
+    if validators is not None:
+        validators.invalidate(endpoint)
+
+
+async def _fetch_and_cache(endpoint: str) -> Dict[str, Any]:
+    """Send a (conditional) GET request and store a successful result in the caches."""
+    validators = get_validator_store()
+    stored = validators.get(endpoint) if validators is not None else None
+    headers = {}
+    if stored is not None:
+        etag, last_modified, _, _ = stored
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = await _send_http_request(endpoint, headers=headers)
+    if isinstance(response, dict):
+        return response
+
+    if response.status_code == 304 and stored is not None:
+        _, _, body_size, result = stored
+        _request_stats["not_modified"] += 1
+        _request_stats["bytes_saved"] += body_size
+    else:
+        result = _response_to_result(response)
+        if validators is not None and "result" in result and _store_responses.get():
+            validators.set(
+                endpoint,
+                response.headers.get("etag"),
+                response.headers.get("last-modified"),
+                len(response.content),
+                result,
+            )
+
+    cache = _cache_for(endpoint)
+    if cache is not None and "result" in result and _store_responses.get():
+        cache.set(endpoint, result)
+    return result
+
+
+async def _send_codebeamer_request(
+    endpoint: str, method: str = "GET", payload: Dict[str, Any] | None = None
 ) -> Dict[str, Any]:
     """Make a generic HTTP request to Codebeamer API with error handling (async)."""
-    credentials = _get_codebeamer_credentials()
+    response = await _send_http_request(endpoint, method, payload)
+    if isinstance(response, dict):
+        return response
+    return _response_to_result(response)
+
+
+async def _send_http_request(
+    endpoint: str,
+    method: str = "GET",
+    payload: Dict[str, Any] | None = None,
+    headers: Dict[str, str] | None = None,
+    files: Dict[str, Any] | None = None,
+) -> httpx.Response | Dict[str, Any]:
+    """
+    Send an HTTP request to Codebeamer API, returning the response or error information.
+
+    Every attempt waits for the shared rate limiter and is refused while the circuit
+    breaker for its endpoint class is open. GETs that fail with 429, 502, 503, 504,
+    a timeout or a connection error are retried with exponential jittered backoff,
+    honouring Retry-After, until the attempts or the deadline run out.
+    """
+    limiter = get_rate_limiter()
+    breaker = _get_circuit_breaker(endpoint)
+    is_get = method.upper() == "GET"
+    retry = _get_retry_settings() if is_get else {"max_attempts": 1}
+    deadline = time.monotonic() + retry.get("deadline", 0)
+    attempt = 0
+    while True:
+        if breaker is not None and not breaker.allow():
+            _request_stats["circuit_rejected"] += 1
+            return {
+                "error": "Circuit open",
+                "details": f"Codebeamer is failing for {endpoint_class(endpoint)}, "
+                f"retry in {breaker.retry_in():.0f}s",
+            }
+        if limiter is not None:
+            await limiter.acquire()
+        if is_get:
+            response = await _send_get_with_hedging(endpoint, headers)
+        else:
+            response = await _send_http_request_once(
+                endpoint, method, payload, headers, files
+            )
+
+        retry_after = None
+        if isinstance(response, httpx.Response):
+            retryable = response.status_code in RETRY_STATUS_CODES
+            failed = response.status_code >= 500
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if limiter is not None:
+                if response.status_code == 429:
+                    limiter.on_throttled(retry_after)
+                elif response.status_code < 500:
+                    limiter.on_success()
+        else:
+            retryable = failed = response.get("error") in RETRY_ERRORS
+        if breaker is not None and failed:
+            breaker.on_failure()
+        elif breaker is not None:
+            breaker.on_success()
+
+        attempt += 1
+        if not retryable or attempt >= retry["max_attempts"]:
+            return response
+        delay = max(retry_after or 0.0, backoff_delay(attempt - 1))
+        if time.monotonic() + delay > deadline:
+            return response
+        _request_stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+
+async def _send_get_with_hedging(
+    endpoint: str, headers: Dict[str, str] | None
+) -> httpx.Response | Dict[str, Any]:
+    """
+    Send a GET request, hedging it with a second identical request when enabled.
+
+    The hedge is sent once the first request has been pending longer than the p95
+    latency of its endpoint class, if the rate limiter has a token to spare, and
+    whichever request answers first wins.
+    """
+    settings = _get_resilience_settings()
+    key = endpoint_class(endpoint)
+    tracker = _latency_trackers.get(key)
+    if tracker is None:
+        tracker = _latency_trackers[key] = LatencyTracker()
+    hedge_delay = tracker.percentile(95) if settings["hedge"] else None
+
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(
+        _send_http_request_once(endpoint, "GET", None, headers, None)
+    )
+    tasks = [primary]
     try:
-        # Construct the full API URL
-        api_url = f"{credentials['base_url'].rstrip('/')}/v3/{endpoint}"
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait(
+                tasks, timeout=max(hedge_delay, settings["hedge_min_delay"])
+            )
+            limiter = get_rate_limiter()
+            if not done and (limiter is None or limiter.try_acquire()):
+                _request_stats["hedged_requests"] += 1
+                tasks.append(
+                    asyncio.ensure_future(
+                        _send_http_request_once(endpoint, "GET", None, headers, None)
+                    )
+                )
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        winner = primary if primary in done else tasks[-1]
+        if winner is not primary:
+            _request_stats["hedge_wins"] += 1
+        response = winner.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if isinstance(response, httpx.Response) and response.status_code < 500:
+        tracker.record(time.perf_counter() - started)
+    return response
 
-        # Create basic auth header
-        auth_string = f"{credentials['username']}:{credentials['password']}"
-        encoded_credentials = base64.b64encode(auth_string.encode()).decode()
+
+async def _send_http_request_once(
+    endpoint: str,
+    method: str,
+    payload: Dict[str, Any] | None,
+    headers: Dict[str, str] | None,
+    files: Dict[str, Any] | None,
+) -> httpx.Response | Dict[str, Any]:
+    """Send a single HTTP request to Codebeamer API, recording its latency."""
+    _request_stats["upstream_requests"] += 1
+    with (
+        track_upstream_request(endpoint_class(endpoint), method.upper()) as outcome,
+        start_span(
+            f"HTTP {method.upper()}",
+            kind="client",
+            attributes={
+                "codebeamer.endpoint": endpoint_class(endpoint),
+                "http.request.method": method.upper(),
+            },
+        ) as span,
+    ):
+        headers = dict(headers or {})
+        inject_trace_context(headers)
+        response = await _send_http_request_attempt(
+            endpoint, method, payload, headers, files
+        )
+        if isinstance(response, httpx.Response):
+            outcome["status"] = response.status_code
+            span.set_attributes(
+                {
+                    "http.response.status_code": response.status_code,
+                    "http.response.body.size": len(response.content),
+                }
+            )
+        else:
+            outcome["status"] = response["error"]
+            span.set_attribute("error.type", response["error"])
+    return response
+
+
+async def _send_http_request_attempt(
+    endpoint: str,
+    method: str,
+    payload: Dict[str, Any] | None,
+    headers: Dict[str, str] | None,
+    files: Dict[str, Any] | None,
+) -> httpx.Response | Dict[str, Any]:
+    """
+    Send a single HTTP request to Codebeamer API with error handling (async).
+
+    When Codebeamer answers 401 and the credentials provider has renewed credentials,
+    the request is sent once more with them.
+    """
+    provider = get_credentials_provider()
+    try:
+        auth_headers = await provider.auth_headers()
+    except Exception as e:
+        return {"error": "Authentication error", "details": str(e)}
+    request = (endpoint, method, payload, headers, files)
+    response = await _send_authenticated_request(
+        provider.base_url, auth_headers, *request
+    )
+    if isinstance(response, httpx.Response) and response.status_code == 401:
+        try:
+            if not await provider.refresh(auth_headers):
+                return response
+            auth_headers = await provider.auth_headers()
+        except Exception as e:
+            return {"error": "Authentication error", "details": str(e)}
+        _request_stats["credential_refreshes"] += 1
+        response = await _send_authenticated_request(
+            provider.base_url, auth_headers, *request
+        )
+    return response
+
+
+async def _send_authenticated_request(
+    base_url: str,
+    auth_headers: Dict[str, str],
+    endpoint: str,
+    method: str,
+    payload: Dict[str, Any] | None,
+    headers: Dict[str, str] | None,
+    files: Dict[str, Any] | None,
+) -> httpx.Response | Dict[str, Any]:
+    """Send a request with the given auth headers, or return error information."""
+    try:
+        # Construct the full API URL
+        api_url = f"{base_url}/v3/{endpoint}"
 
         headers = {
-            "Authorization": f"Basic {encoded_credentials}",
+            **auth_headers,
             "Accept": "application/json",
-            "Content-Type": "application/json",
+            # Multipart requests leave Content-Type to httpx, which adds the boundary
+            **({} if files else {"Content-Type": "application/json"}),
+            **(headers or {}),
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with _get_client() as client:
             if method.upper() == "GET":
-                response = await client.get(api_url, headers=headers)
+                return await client.get(api_url, headers=headers)
+            elif method.upper() == "POST" and files:
+                return await client.post(api_url, headers=headers, files=files)
             elif method.upper() == "POST":
-                response = await client.post(api_url, headers=headers, json=payload)
+                return await client.post(api_url, headers=headers, json=payload)
             elif method.upper() == "PUT":
-                response = await client.put(api_url, headers=headers, json=payload)
+                return await client.put(api_url, headers=headers, json=payload)
             elif method.upper() == "DELETE":
-                response = await client.delete(api_url, headers=headers)
+                return await client.delete(api_url, headers=headers)
             else:
                 return {
                     "error": "Unsupported HTTP method",
                     "details": f"Method {method} is not supported",
                 }
-
-            # Return only the data if successful, otherwise return error info
-            if response.status_code in [200, 201]:
-                data = (
-                    response.json()
-                    if response.content
-                    and response.headers.get("content-type", "").startswith(
-                        "application/json"
-                    )
-                    else response.text
-                )
-                return {"result": data}
-            else:
-                return {
-                    "status_code": response.status_code,
-                    "error": (
-                        response.json()
-                        if response.content
-                        and response.headers.get("content-type", "").startswith(
-                            "application/json"
-                        )
-                        else response.text
-                    ),
-                }
     except httpx.TimeoutException:
         return {
             "error": "Request timeout",
@@ -101,6 +920,11 @@ async def get_projects() -> Dict[str, Any]:
     Returns:
         Dictionary containing the API response with projects list or error information
     """
+    mirror = _read_mirror()
+    if mirror is not None:
+        projects = mirror.get_projects(_mirror_max_staleness)
+        if projects is not None:
+            return {"result": projects}
     return await _make_codebeamer_request("projects")
 
 
@@ -114,20 +938,129 @@ async def get_trackers_by_project_id(project_id: int) -> Dict[str, Any]:
     Returns:
         Dictionary containing the trackers list or error information
     """
+    mirror = _read_mirror()
+    if mirror is not None:
+        trackers = mirror.get_trackers(project_id, _mirror_max_staleness)
+        if trackers is not None:
+            return {"result": trackers}
     return await _make_codebeamer_request(f"projects/{project_id}/trackers")
 
 
-async def get_tracker_items(tracker_id: int) -> Dict[str, Any]:
+async def get_tracker_items(
+    tracker_id: int, page: int | None = None, page_size: int | None = None
+) -> Dict[str, Any]:
     """
     Get tracker items within a tracker from Codebeamer using the /v3/trackers/{trackerId}/items API endpoint.
 
     Args:
         tracker_id: The ID of the tracker to retrieve items for
+        page: Optional 1-based page number (optional)
+        page_size: Optional number of items per page, at most 500 (optional)
 
     Returns:
         Dictionary containing the tracker information or error information
     """
-    return await _make_codebeamer_request(f"trackers/{tracker_id}/items")
+    mirror = _read_mirror()
+    if mirror is not None and page is None and page_size is None:
+        refs = mirror.get_tracker_item_refs(tracker_id, _mirror_max_staleness)
+        if refs is not None:
+            return {
+                "result": {
+                    "page": 1,
+                    "pageSize": len(refs),
+                    "total": len(refs),
+                    "itemRefs": refs,
+                }
+            }
+
+    endpoint = f"trackers/{tracker_id}/items"
+
+    query_params = []
+    if page is not None:
+        query_params.append(f"page={page}")
+    if page_size is not None:
+        query_params.append(f"pageSize={page_size}")
+
+    if query_params:
+        endpoint += "?" + "&".join(query_params)
+
+    return await _make_codebeamer_request(endpoint)
+
+
+async def iter_tracker_items(
+    tracker_id: int,
+    page_size: int = MAX_PAGE_SIZE,
+    prefetch: int = 4,
+    start_page: int = 1,
+    max_pages: int | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over every item reference of a tracker, page by page.
+
+    The first page is fetched to learn the total, then up to `prefetch` further
+    pages are kept in flight while the caller consumes items, so at most
+    `prefetch + 1` pages are held in memory regardless of tracker size. Pages
+    are not stored in the response cache, which they would otherwise fill.
+
+    Args:
+        tracker_id: The ID of the tracker to retrieve items for
+        page_size: Number of items per page, at most 500 (default: 500)
+        prefetch: Maximum number of pages requested ahead of the consumer (default: 4)
+        start_page: 1-based page to start from (default: 1)
+        max_pages: Stop after this many pages (optional)
+
+    Yields:
+        Item reference dictionaries in tracker order
+
+    Raises:
+        CodebeamerError: If any page request returns error information
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    with without_storing():
+        first = await get_tracker_items(
+            tracker_id, page=start_page, page_size=page_size
+        )
+    if "error" in first:
+        raise CodebeamerError(first)
+
+    total = first["result"].get("total", 0)
+    last_page = max(start_page, math.ceil(total / page_size))
+    if max_pages is not None:
+        last_page = min(last_page, start_page + max_pages - 1)
+
+    pending: deque[asyncio.Task] = deque()
+    next_page = start_page + 1
+
+    def schedule() -> None:
+        nonlocal next_page
+        while len(pending) < max(1, prefetch) and next_page <= last_page:
+            # The task copies the context, so the page is fetched without storing it
+            with without_storing():
+                pending.append(
+                    asyncio.ensure_future(
+                        get_tracker_items(
+                            tracker_id, page=next_page, page_size=page_size
+                        )
+                    )
+                )
+            next_page += 1
+
+    try:
+        schedule()
+        for item in first["result"].get("itemRefs", []):
+            yield item
+        del first
+
+        while pending:
+            result = await pending.popleft()
+            schedule()
+            if "error" in result:
+                raise CodebeamerError(result)
+            for item in result["result"].get("itemRefs", []):
+                yield item
+    finally:
+        for task in pending:
+            task.cancel()
 
 
 async def get_tracker_item(
@@ -144,6 +1077,12 @@ async def get_tracker_item(
     Returns:
         Dictionary containing the tracker item information or error information
     """
+    mirror = _read_mirror()
+    if mirror is not None and version is None and baseline_id is None:
+        item = mirror.get_item(item_id, _mirror_max_staleness)
+        if item is not None:
+            return {"result": item}
+
     # Build the endpoint with query parameters
     endpoint = f"items/{item_id}"
 
@@ -160,6 +1099,180 @@ async def get_tracker_item(
     return await _make_codebeamer_request(endpoint)
 
 
+async def query_tracker_items(
+    query: str, page: int = 1, page_size: int = MAX_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Find tracker items with a cbQL query using the /v3/items/query API endpoint.
+
+    Args:
+        query: The cbQL query, e.g. "tracker.id IN (123)"
+        page: 1-based page number (default: 1)
+        page_size: Number of items per page, at most 500 (default: 500)
+
+    Returns:
+        Dictionary containing the page of matching items or error information
+    """
+    return await _make_codebeamer_request(
+        f"items/query?page={page}&pageSize={page_size}&queryString={quote(query)}"
+    )
+
+
+async def iter_tracker_item_query(query: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over every item matching a cbQL query, one result page at a time.
+
+    Args:
+        query: The cbQL query
+
+    Yields:
+        Tracker item dictionaries
+
+    Raises:
+        CodebeamerError: If a page request returns error information
+    """
+    page = 1
+    while True:
+        response = await query_tracker_items(query, page=page)
+        if "error" in response:
+            raise CodebeamerError(response)
+        for item in response["result"].get("items", []):
+            yield item
+        if page * MAX_PAGE_SIZE >= response["result"].get("total", 0):
+            return
+        page += 1
+
+
+def _project_fields(item: Dict[str, Any], fields: List[str] | None) -> Dict[str, Any]:
+    """Keep only the requested top-level fields of an item."""
+    if not fields:
+        return item
+    return {key: item[key] for key in fields if key in item}
+
+
+async def _query_items_by_id(item_ids: List[int]) -> Dict[int, Dict[str, Any]] | None:
+    """
+    Fetch items with one cbQL query per page of ids using /v3/items/query.
+
+    Returns:
+        Items keyed by ID, or None if the query endpoint is unavailable
+    """
+    global _items_query_supported
+    found: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(item_ids), MAX_PAGE_SIZE):
+        chunk = item_ids[start : start + MAX_PAGE_SIZE]
+        query = f"item.id IN ({','.join(str(i) for i in chunk)})"
+        response = await query_tracker_items(query, page_size=len(chunk))
+        if "error" in response:
+            if response.get("status_code") in (400, 404, 405, 501):
+                _items_query_supported = False
+                logger.info(
+                    "Codebeamer items query unavailable, using per-item requests"
+                )
+            return None
+        for item in response["result"].get("items", []):
+            found[item["id"]] = item
+    return found
+
+
+async def get_tracker_items_bulk(
+    item_ids: List[int],
+    fields: List[str] | None = None,
+    concurrency: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Get many tracker items at once.
+
+    Items are first requested through the /v3/items/query endpoint when the server
+    supports it; any remaining items are fetched with /v3/items/{itemId}, running at
+    most `concurrency` requests at a time. A failing item does not fail the batch.
+
+    Reads the default concurrency from the CODEBEAMER_BULK_CONCURRENCY environment
+    variable (default: 8).
+
+    Args:
+        item_ids: The IDs of the tracker items to retrieve
+        fields: Optional list of top-level fields to keep for each item (optional)
+        concurrency: Maximum number of concurrent per-item requests (optional)
+
+    Returns:
+        Dictionary with one entry per requested ID, in the same order, each holding
+        either the item under "result" or its error information
+    """
+    if concurrency is None:
+        load_config()
+        concurrency = int(os.getenv("CODEBEAMER_BULK_CONCURRENCY", "8"))
+    unique_ids = list(dict.fromkeys(item_ids))
+
+    found: Dict[int, Dict[str, Any]] = {}
+    if _items_query_supported and len(unique_ids) > 1:
+        found = await _query_items_by_id(unique_ids) or {}
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: Dict[int, Dict[str, Any]] = {
+        item_id: {"result": item} for item_id, item in found.items()
+    }
+
+    async def fetch(item_id: int) -> None:
+        async with semaphore:
+            results[item_id] = await get_tracker_item(item_id)
+
+    await asyncio.gather(*(fetch(i) for i in unique_ids if i not in found))
+
+    entries = []
+    for item_id in item_ids:
+        result = results[item_id]
+        if "result" in result:
+            entries.append(
+                {
+                    "item_id": item_id,
+                    "result": _project_fields(result["result"], fields),
+                }
+            )
+        else:
+            entries.append({"item_id": item_id, **result})
+    return {"result": entries}
+
+
+def _cbql_timestamp(modified_at: str) -> str:
+    """Convert an API timestamp such as 2025-01-01T10:00:00.000 to cbQL format."""
+    return modified_at[:19].replace("T", " ")
+
+
+async def get_tracker_changes(
+    tracker_id: int, since: str | None = None
+) -> Tuple[List[int], List[Dict[str, Any]]]:
+    """
+    Read the items of a tracker modified since a modifiedAt timestamp from Codebeamer.
+
+    The changed items are found with a cbQL query; servers without cbQL support
+    return every item instead. Without `since` every item is read. The IDs of all
+    items are listed too, so callers keeping a copy can drop deleted items. The
+    cache and the mirror are bypassed.
+
+    Args:
+        tracker_id: The ID of the tracker
+        since: The newest modifiedAt already read (optional)
+
+    Returns:
+        The IDs of every item of the tracker and the items modified since `since`
+
+    Raises:
+        CodebeamerError: If the item references cannot be listed
+    """
+    with upstream_only():
+        item_ids = [ref["id"] async for ref in iter_tracker_items(tracker_id)]
+        query = f"tracker.id IN ({tracker_id})"
+        if since:
+            query += f" AND modifiedAt >= '{_cbql_timestamp(since)}'"
+        try:
+            items = [item async for item in iter_tracker_item_query(query)]
+        except CodebeamerError:
+            bulk = await get_tracker_items_bulk(item_ids)
+            items = [entry["result"] for entry in bulk["result"] if "result" in entry]
+    return item_ids, items
+
+
 async def get_tracker_item_comments(item_id: int) -> Dict[str, Any]:
     """
     Get comments of tracker item by item id
@@ -188,50 +1301,264 @@ async def post_tracker_item_comment(
     Returns:
         Dictionary containing the result of the comment posting or error information
     """
-    credentials = _get_codebeamer_credentials()
-    api_url = f"{credentials['base_url'].rstrip('/')}/v3/items/{item_id}/comments"
-    auth_string = f"{credentials['username']}:{credentials['password']}"
-    encoded_credentials = base64.b64encode(auth_string.encode()).decode()
-    headers = {
-        "Authorization": f"Basic {encoded_credentials}",
-        "accept": "application/json",
-        # Do NOT set Content-Type, httpx will set it with boundary
-    }
+    endpoint = f"items/{item_id}/comments"
     files = {"comment": (None, comment_text), "commentFormat": (None, comment_format)}
+    response = await _send_http_request(endpoint, "POST", files=files)
+    result = response if isinstance(response, dict) else _response_to_result(response)
+    if "result" in result:
+        _invalidate(endpoint)
+    return result
+
+
+def _get_write_settings() -> Dict[str, Any]:
+    """Load comment write queue settings from environment variables."""
+    load_config()
+    return {
+        "concurrency": int(os.getenv("CODEBEAMER_WRITE_CONCURRENCY", "4")),
+        "max_pending": int(os.getenv("CODEBEAMER_WRITE_QUEUE_SIZE", "100")),
+        "max_attempts": int(os.getenv("CODEBEAMER_WRITE_MAX_ATTEMPTS", "3")),
+        "idempotency_ttl": float(os.getenv("CODEBEAMER_IDEMPOTENCY_TTL", "86400")),
+    }
+
+
+async def open_write_queue(**overrides: Any) -> WriteQueue:
+    """
+    Open the shared queue that comment writes from all callers go through.
+
+    Settings are read from environment variables:
+    - CODEBEAMER_WRITE_CONCURRENCY: Comment POSTs sent at the same time (default: 4)
+    - CODEBEAMER_WRITE_QUEUE_SIZE: Comments queued before callers wait (default: 100)
+
+    Args:
+        overrides: Optional concurrency or max_pending values overriding the environment
+
+    Returns:
+        The shared WriteQueue
+    """
+    global _write_queue
+    if _write_queue is None:
+        settings = {**_get_write_settings(), **overrides}
+        _write_queue = WriteQueue(settings["concurrency"], settings["max_pending"])
+        _write_queue.start()
+    return _write_queue
+
+
+async def close_write_queue() -> None:
+    """Finish the queued comment writes and close the shared write queue."""
+    global _write_queue
+    if _write_queue is not None:
+        queue, _write_queue = _write_queue, None
+        await queue.close()
+
+
+@asynccontextmanager
+async def codebeamer_write_queue(**overrides: Any) -> AsyncIterator[WriteQueue]:
+    """Keep the shared comment write queue open for the duration of the context."""
+    queue = await open_write_queue(**overrides)
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(api_url, headers=headers, files=files)
-            if response.status_code in [200, 201]:
-                data = (
-                    response.json()
-                    if response.content
-                    and response.headers.get("content-type", "").startswith(
-                        "application/json"
-                    )
-                    else response.text
+        yield queue
+    finally:
+        await close_write_queue()
+
+
+@asynccontextmanager
+async def _get_write_queue(concurrency: int | None) -> AsyncIterator[WriteQueue]:
+    """Yield the shared write queue if one is open, otherwise a queue for this call."""
+    if _write_queue is not None and concurrency is None:
+        yield _write_queue
+    else:
+        settings = _get_write_settings()
+        async with WriteQueue(
+            concurrency or settings["concurrency"], settings["max_pending"]
+        ) as queue:
+            yield queue
+
+
+def comment_idempotency_key(
+    item_id: int, comment_text: str, comment_format: str = "PlainText"
+) -> str:
+    """Default idempotency key of a comment, derived from its item, format and text."""
+    digest = hashlib.sha256(
+        f"{item_id}\n{comment_format}\n{comment_text}".encode()
+    ).hexdigest()
+    return f"comment:{digest[:32]}"
+
+
+def _created_at(comment: Dict[str, Any]) -> datetime | None:
+    """Creation time of a comment, read as UTC when Codebeamer gives no offset."""
+    try:
+        created_at = datetime.fromisoformat(comment["createdAt"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+
+
+async def _find_comment(
+    item_id: int, comment_text: str, comment_format: str, since: datetime
+) -> Dict[str, Any] | None:
+    """
+    Return a comment of the item with exactly this text and format, created at or after
+    `since`, read from Codebeamer itself. Older comments with the same text, and
+    comments without a creation time, never match.
+    """
+    with upstream_only():
+        response = await get_tracker_item_comments(item_id)
+    for comment in response.get("result") or []:
+        if not isinstance(comment, dict) or comment.get("comment") != comment_text:
+            continue
+        if comment.get("commentFormat", comment_format) != comment_format:
+            continue
+        created_at = _created_at(comment)
+        if created_at is not None and created_at >= since:
+            return comment
+    return None
+
+
+async def _post_comment_with_retries(
+    item_id: int, comment_text: str, comment_format: str, max_attempts: int
+) -> Dict[str, Any]:
+    """
+    Post a comment, retrying timeouts, connection errors, 429 and 5xx answers.
+
+    A POST whose answer was lost may still have been applied, so before each retry
+    the item's comments are read back and an identical comment created since just
+    before the first attempt counts as posted.
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=COMMENT_CLOCK_SKEW)
+    for attempt in range(max(1, max_attempts)):
+        if attempt:
+            await asyncio.sleep(backoff_delay(attempt - 1))
+            existing = await _find_comment(item_id, comment_text, comment_format, since)
+            if existing is not None:
+                return {"result": existing}
+        result = await post_tracker_item_comment(item_id, comment_text, comment_format)
+        if "status_code" in result:
+            retryable = result["status_code"] in RETRY_STATUS_CODES
+        else:
+            # Errors without a status code never reached Codebeamer or got no answer
+            retryable = result.get("error") in RETRY_ERRORS
+        if "result" in result or not retryable:
+            return result
+    return result
+
+
+async def post_tracker_item_comments(
+    comments: List[Dict[str, Any]], concurrency: int | None = None
+) -> Dict[str, Any]:
+    """
+    Post many comments to tracker items through a bounded write queue.
+
+    A comment whose idempotency key was already posted successfully, or is being
+    posted by another call, is not posted again but reported as a duplicate with the
+    original result. Without a key, one is derived from the item, format and text,
+    which only deduplicates the comments of this call, so the same text can be posted
+    again by a later call. Failures that may be transient are retried without
+    creating duplicate comments. A failing comment does not fail the batch.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_WRITE_MAX_ATTEMPTS: Attempts per comment (default: 3)
+    - CODEBEAMER_IDEMPOTENCY_TTL: Seconds a given key is remembered (default: 86400)
+    - The settings of open_write_queue when no shared queue is open
+
+    Args:
+        comments: Dictionaries with "item_id" and "comment_text", and optionally
+            "comment_format" ("PlainText" or "HTML", default: "PlainText") and
+            "idempotency_key" (default: derived from item, format and text, only
+            within this call)
+        concurrency: Maximum number of concurrent POSTs for this call only (optional)
+
+    Returns:
+        Dictionary with one entry per comment under "result", in the same order. Each
+        entry has "item_id", "idempotency_key", "status" ("created", "duplicate" or
+        "failed") and the posted comment under "result" or error information. Counts per
+        status are under "summary".
+    """
+    global _completed_writes
+    settings = _get_write_settings()
+    if _completed_writes is None:
+        _completed_writes = TTLLRUCache(
+            max_entries=10000, ttl_rules=[("", settings["idempotency_ttl"])]
+        )
+    loop = asyncio.get_running_loop()
+    # Writes of this call under keys derived from their content
+    call_writes: Dict[str, asyncio.Future] = {}
+
+    async def post(queue: WriteQueue, comment: Dict[str, Any]) -> Dict[str, Any]:
+        item_id, comment_text = comment.get("item_id"), comment.get("comment_text")
+        if (
+            not isinstance(item_id, int)
+            or not isinstance(comment_text, str)
+            or not comment_text
+        ):
+            return {
+                "item_id": item_id,
+                "status": "failed",
+                "error": "Invalid comment",
+                "details": "item_id (integer) and comment_text (string) are required",
+            }
+        comment_format = comment.get("comment_format") or "PlainText"
+        key = comment.get("idempotency_key")
+        # Only keys given by the caller are shared with other calls and remembered
+        shared = bool(key)
+        pending = _pending_writes if shared else call_writes
+        key = key or comment_idempotency_key(item_id, comment_text, comment_format)
+        entry = {"item_id": item_id, "idempotency_key": key}
+        completed = _completed_writes.get(key) if shared else None
+        if completed is not None:
+            return {**entry, "status": "duplicate", **completed}
+        if key in pending:
+            # Share the outcome of the same comment posted by another call or entry
+            result = await asyncio.shield(pending[key])
+            return {
+                **entry,
+                "status": "duplicate" if "result" in result else "failed",
+                **result,
+            }
+
+        future = pending[key] = loop.create_future()
+
+        async def write() -> None:
+            result = {
+                "error": "Cancelled",
+                "details": "The write was cancelled and may not have been posted",
+            }
+            try:
+                result = await _post_comment_with_retries(
+                    item_id, comment_text, comment_format, settings["max_attempts"]
                 )
-                return {"result": data}
-            else:
-                return {
-                    "status_code": response.status_code,
-                    "error": (
-                        response.json()
-                        if response.content
-                        and response.headers.get("content-type", "").startswith(
-                            "application/json"
-                        )
-                        else response.text
-                    ),
+            except Exception as e:
+                result = {"error": "Unexpected error", "details": str(e)}
+            finally:
+                # Also runs when the worker is cancelled, so no caller is left waiting
+                if shared and "result" in result:
+                    _completed_writes.set(key, result)
+                if shared and _pending_writes.get(key) is future:
+                    del _pending_writes[key]
+                if not future.done():
+                    future.set_result(result)
+
+        try:
+            await queue.submit(write)
+        except BaseException:
+            if pending.get(key) is future:
+                del pending[key]
+            future.set_result(
+                {
+                    "error": "Cancelled",
+                    "details": "The comment was cancelled before it was queued",
                 }
-    except httpx.TimeoutException:
+            )
+            raise
+        result = await asyncio.shield(future)
         return {
-            "error": "Request timeout",
-            "details": "The request to the Codebeamer API timed out",
-        }
-    except httpx.ConnectError:
-        return {
-            "error": "Connection error",
-            "details": "Could not connect to the Codebeamer instance",
+            **entry,
+            "status": "created" if "result" in result else "failed",
+            **result,
         }
-    except Exception as e:
-        return {"error": "Unexpected error", "details": str(e)}
+
+    async with _get_write_queue(concurrency) as queue:
+        entries = await asyncio.gather(*(post(queue, comment) for comment in comments))
+    summary = {"created": 0, "duplicate": 0, "failed": 0}
+    for entry in entries:
+        summary[entry["status"]] += 1
+    return {"result": entries, "summary": summary}
@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List
+
+import codebeamer_interface
+import codec
+from codebeamer_interface import CodebeamerError
+from codec import TRACKER_ITEM_REFERENCE
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trackers (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trackers_project ON trackers (project_id);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    tracker_id INTEGER NOT NULL,
+    version INTEGER,
+    modified_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_tracker ON items (tracker_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_lease (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class CodebeamerMirror:
+    """
+    Local SQLite copy of Codebeamer projects, trackers and items.
+
+    Every read takes a `max_staleness` in seconds and returns None when the
+    relevant scope (the project list, a project's trackers, or a tracker's items)
+    was last synced longer ago than that, so callers fall back to the API.
+
+    Several server processes may share one mirror file: one of them holds the
+    sync lease and syncs, the others read what it wrote.
+    """
+
+    def __init__(self, path: str = "codebeamer_mirror.db"):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._synced_at: Dict[str, float] = {
+            scope: synced_at
+            for scope, synced_at in self._db.execute(
+                "SELECT scope, synced_at FROM sync_state"
+            )
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _is_fresh(self, scope: str, max_staleness: float) -> bool:
+        synced_at = self._synced_at.get(scope)
+        if synced_at is None or time.time() - synced_at > max_staleness:
+            # Another process may have synced the scope since
+            row = self._db.execute(
+                "SELECT synced_at FROM sync_state WHERE scope = ?", (scope,)
+            ).fetchone()
+            if row is None:
+                return False
+            synced_at = self._synced_at[scope] = row[0]
+        return time.time() - synced_at <= max_staleness
+
+    def acquire_sync_lease(self, owner: str, ttl: float) -> bool:
+        """Take or renew the sync lease for `ttl` seconds if no other owner holds it."""
+        now = time.time()
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO sync_lease (name, owner, expires_at) "
+                "VALUES ('sync', ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE sync_lease.owner = excluded.owner OR sync_lease.expires_at < ?",
+                (owner, now + ttl, now),
+            )
+        return cursor.rowcount > 0
+
+    def _mark_synced(self, scope: str, last_modified: str | None = None) -> None:
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO sync_state (scope, synced_at, last_modified) VALUES (?, ?, ?) "
+            "ON CONFLICT(scope) DO UPDATE SET synced_at = excluded.synced_at, "
+            "last_modified = "
+            "COALESCE(excluded.last_modified, sync_state.last_modified)",
+            (scope, now, last_modified),
+        )
+        self._synced_at[scope] = now
+
+    def last_modified(self, tracker_id: int) -> str | None:
+        """Return the newest modifiedAt seen for a tracker's items."""
+        row = self._db.execute(
+            "SELECT last_modified FROM sync_state WHERE scope = ?",
+            (f"tracker:{tracker_id}",),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_projects(self, max_staleness: float) -> List[Dict[str, Any]] | None:
+        if not self._is_fresh("projects", max_staleness):
+            return None
+        return [
+            codec.loads(data)
+            for (data,) in self._db.execute("SELECT data FROM projects ORDER BY id")
+        ]
+
+    def get_trackers(
+        self, project_id: int, max_staleness: float
+    ) -> List[Dict[str, Any]] | None:
+        if not self._is_fresh(f"project:{project_id}", max_staleness):
+            return None
+        rows = self._db.execute(
+            "SELECT data FROM trackers WHERE project_id = ? ORDER BY id", (project_id,)
+        )
+        return [codec.loads(data) for (data,) in rows]
+
+    def get_tracker_item_refs(
+        self, tracker_id: int, max_staleness: float
+    ) -> List[Dict[str, Any]] | None:
+        if not self._is_fresh(f"tracker:{tracker_id}", max_staleness):
+            return None
+        rows = self._db.execute(
+            "SELECT id, data FROM items WHERE tracker_id = ? ORDER BY id", (tracker_id,)
+        )
+        # Decode only the names, not the full stored items
+        refs = [
+            (item_id, codec.loads_as(data, TRACKER_ITEM_REFERENCE))
+            for item_id, data in rows
+        ]
+        return [
+            {"id": item_id, "name": ref.get("name"), "type": "TrackerItemReference"}
+            for item_id, ref in refs
+        ]
+
+    def get_item(self, item_id: int, max_staleness: float) -> Dict[str, Any] | None:
+        row = self._db.execute(
+            "SELECT tracker_id, data FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is None or not self._is_fresh(f"tracker:{row[0]}", max_staleness):
+            return None
+        return codec.loads(row[1])
+
+    def store_projects(self, projects: Iterable[Dict[str, Any]]) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM projects")
+            self._db.executemany(
+                "INSERT INTO projects (id, data) VALUES (?, ?)",
+                [(p["id"], codec.dumps(p)) for p in projects],
+            )
+            self._mark_synced("projects")
+
+    def store_trackers(
+        self, project_id: int, trackers: Iterable[Dict[str, Any]]
+    ) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM trackers WHERE project_id = ?", (project_id,))
+            self._db.executemany(
+                "INSERT INTO trackers (id, project_id, data) VALUES (?, ?, ?)",
+                [(t["id"], project_id, codec.dumps(t)) for t in trackers],
+            )
+            self._mark_synced(f"project:{project_id}")
+
+    def store_items(
+        self, tracker_id: int, items: Iterable[Dict[str, Any]]
+    ) -> str | None:
+        """Insert or update items, returning the newest modifiedAt among them."""
+        rows = [
+            (i["id"], tracker_id, i.get("version"), i.get("modifiedAt"), codec.dumps(i))
+            for i in items
+        ]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items "
+                "(id, tracker_id, version, modified_at, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return max((row[3] for row in rows if row[3]), default=None)
+
+    def remove_items_except(self, tracker_id: int, item_ids: Iterable[int]) -> int:
+        """Delete mirrored items of a tracker that are no longer in Codebeamer."""
+        keep = set(item_ids)
+        stale = [
+            (item_id,)
+            for (item_id,) in self._db.execute(
+                "SELECT id FROM items WHERE tracker_id = ?", (tracker_id,)
+            )
+            if item_id not in keep
+        ]
+        with self._db:
+            self._db.executemany("DELETE FROM items WHERE id = ?", stale)
+        return len(stale)
+
+    def mark_tracker_synced(self, tracker_id: int, last_modified: str | None) -> None:
+        with self._db:
+            self._mark_synced(f"tracker:{tracker_id}", last_modified)
+
+
+async def sync_tracker(mirror: CodebeamerMirror, tracker_id: int) -> Dict[str, int]:
+    """
+    Bring a tracker's mirrored items up to date.
+
+    Only items modified since the newest modifiedAt already mirrored are
+    downloaded (see codebeamer_interface.get_tracker_changes); the first sync
+    downloads all of them. Items deleted in Codebeamer are dropped.
+
+    Returns:
+        Dictionary with the number of items updated and removed
+    """
+    since = mirror.last_modified(tracker_id)
+    item_ids, items = await codebeamer_interface.get_tracker_changes(tracker_id, since)
+
+    last_modified = mirror.store_items(tracker_id, items)
+    removed = mirror.remove_items_except(tracker_id, item_ids)
+    mirror.mark_tracker_synced(
+        tracker_id, max(filter(None, [since, last_modified]), default=None)
+    )
+    return {"updated": len(items), "removed": removed}
+
+
+async def sync(
+    mirror: CodebeamerMirror, project_ids: List[int] | None = None
+) -> Dict[str, Any]:
+    """
+    Sync projects, their trackers and every tracker's items into the mirror.
+
+    The first call is the initial crawl; later calls only transfer changes. A
+    project whose trackers cannot be listed, or a tracker that fails to sync, is
+    logged and skipped so the rest of the mirror stays current, and is tried
+    again on the next call.
+
+    Args:
+        mirror: The mirror to fill
+        project_ids: Optional projects to limit the sync to (optional)
+
+    Returns:
+        Dictionary with totals of trackers synced and items updated and removed,
+        and under "failed" the error information of the skipped projects and trackers
+    """
+    totals: Dict[str, Any] = {"trackers": 0, "updated": 0, "removed": 0, "failed": []}
+    with codebeamer_interface.upstream_only():
+        projects = await codebeamer_interface.get_projects()
+    if "error" in projects:
+        raise CodebeamerError(projects)
+    mirror.store_projects(projects["result"])
+
+    for project in projects["result"]:
+        if project_ids is not None and project["id"] not in project_ids:
+            continue
+        with codebeamer_interface.upstream_only():
+            trackers = await codebeamer_interface.get_trackers_by_project_id(
+                project["id"]
+            )
+        if "error" in trackers:
+            logger.error(f"Mirror sync of project {project['id']} failed: {trackers}")
+            totals["failed"].append({"project_id": project["id"], **trackers})
+            continue
+        mirror.store_trackers(project["id"], trackers["result"])
+        for tracker in trackers["result"]:
+            try:
+                counts = await sync_tracker(mirror, tracker["id"])
+            except CodebeamerError as e:
+                logger.error(
+                    f"Mirror sync of tracker {tracker['id']} failed: {e.error}"
+                )
+                totals["failed"].append({"tracker_id": tracker["id"], **e.error})
+                continue
+            totals["trackers"] += 1
+            totals["updated"] += counts["updated"]
+            totals["removed"] += counts["removed"]
+    return totals
+
+
+async def run_sync_loop(
+    mirror: CodebeamerMirror, interval: float, project_ids: List[int] | None = None
+) -> None:
+    """
+    Sync the mirror every `interval` seconds until cancelled, while this process
+    holds the sync lease, so processes sharing the mirror do not all sync.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        started = time.perf_counter()
+        try:
+            if mirror.acquire_sync_lease(owner, 3 * interval):
+                totals = await sync(mirror, project_ids)
+                logger.info(
+                    "Mirror sync finished in %.1fs: %s",
+                    time.perf_counter() - started,
+                    totals,
+                )
+        except Exception as e:
+            logger.error(f"Mirror sync failed: {e}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def codebeamer_mirror_from_env() -> AsyncIterator[CodebeamerMirror | None]:
+    """
+    Open the mirror configured by environment variables and keep it synced for the
+    duration of the context, serving codebeamer_interface reads from it.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_MIRROR_PATH: SQLite file of the mirror, unset disables the mirror
+    - CODEBEAMER_MIRROR_MAX_STALENESS: Maximum seconds since a sync (default: 300)
+    - CODEBEAMER_MIRROR_SYNC_INTERVAL: Seconds between delta syncs (default: 60)
+    - CODEBEAMER_MIRROR_PROJECT_IDS: Comma-separated projects to mirror (default: all)
+    """
+    load_config()
+    path = os.getenv("CODEBEAMER_MIRROR_PATH", "")
+    if not path:
+        yield None
+        return
+
+    project_ids = [
+        int(p)
+        for p in os.getenv("CODEBEAMER_MIRROR_PROJECT_IDS", "").split(",")
+        if p.strip()
+    ]
+    mirror = CodebeamerMirror(path)
+    codebeamer_interface.set_mirror(
+        mirror, float(os.getenv("CODEBEAMER_MIRROR_MAX_STALENESS", "300"))
+    )
+    sync_task = asyncio.create_task(
+        run_sync_loop(
+            mirror,
+            float(os.getenv("CODEBEAMER_MIRROR_SYNC_INTERVAL", "60")),
+            project_ids or None,
+        )
+    )
+    logger.info(f"Serving Codebeamer reads from mirror {path}")
+    try:
+        yield mirror
+    finally:
+        sync_task.cancel()
+        codebeamer_interface.set_mirror(None)
+        mirror.close()
@@ -0,0 +1,171 @@
+import importlib
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Preferred backends, fastest first; "json" (the standard library) is always available
+CODECS = ("orjson", "msgspec", "json")
+
+_codec: str | None = None
+# Accelerated codecs are optional and imported on first use, None when not installed
+_modules: Dict[str, Any] = {}
+
+
+def _import(name: str) -> Any:
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+
+class Schema:
+    """
+    Top-level fields of a Codebeamer record that a consumer needs. When msgspec is
+    installed, decoding into a schema skips every other field instead of building it.
+    """
+
+    def __init__(self, name: str, fields: Tuple[str, ...]):
+        self.name = name
+        self.fields = fields
+        self._decoders: Dict[bool, Any] = {}
+
+    def decoder(self, many: bool) -> Any:
+        """Return a msgspec decoder of one record, or of a list of records if `many`."""
+        if many not in self._decoders:
+            msgspec = _import("msgspec")
+            struct = msgspec.defstruct(
+                self.name, [(field, Any, msgspec.UNSET) for field in self.fields]
+            )
+            self._decoders[many] = msgspec.json.Decoder(
+                List[struct] if many else struct
+            )
+        return self._decoders[many]
+
+    def select(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: record[field] for field in self.fields if field in record}
+
+
+TRACKER_ITEM_REFERENCE = Schema("TrackerItemReference", ("id", "name"))
+
+
+def _dumps_msgspec(value: Any, indent: bool) -> str:
+    msgspec = _modules["msgspec"]
+    data = msgspec.json.encode(value, enc_hook=str)
+    return (msgspec.json.format(data, indent=2) if indent else data).decode()
+
+
+def _dumps_orjson(value: Any, indent: bool) -> str:
+    orjson = _modules["orjson"]
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(value, default=str, option=option).decode()
+
+
+def _dumps_json(value: Any, indent: bool) -> str:
+    return json.dumps(
+        value, default=str, ensure_ascii=False, indent=2 if indent else None
+    )
+
+
+# Functions of the backend in use, the standard library's until set_codec() runs
+_loads: Callable[[bytes | str], Any] = json.loads
+_dumps: Callable[[Any, bool], str] = _dumps_json
+
+
+def set_codec(name: str = "auto") -> str:
+    """
+    Select the JSON backend used for Codebeamer responses, the mirror and tool results.
+
+    Args:
+        name: "msgspec", "orjson", "json", or "auto" for the fastest one (default: auto)
+
+    Returns:
+        The backend in use, the next one if the requested library is not installed
+    """
+    global _codec, _loads, _dumps
+    if name not in ("auto", *CODECS):
+        raise ValueError(f"Unknown JSON codec {name!r}")
+    if name not in ("auto", "json") and _import(name) is None:
+        logger.warning(
+            f"{name} is not installed, falling back to the fastest available JSON codec"
+        )
+        name = "auto"
+    candidates = CODECS if name == "auto" else (name,)
+    _codec = next(
+        codec for codec in candidates if codec == "json" or _import(codec) is not None
+    )
+    if _codec == "msgspec":
+        _loads, _dumps = _modules["msgspec"].json.decode, _dumps_msgspec
+    elif _codec == "orjson":
+        _loads, _dumps = _modules["orjson"].loads, _dumps_orjson
+    else:
+        _loads, _dumps = json.loads, _dumps_json
+    return _codec
+
+
+def get_codec() -> str:
+    """
+    Return the JSON backend in use, configuring it on first use.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_JSON_CODEC: "msgspec", "orjson", "json" or "auto" (default: auto)
+    """
+    if _codec is None:
+        load_config()
+        set_codec(os.getenv("CODEBEAMER_JSON_CODEC", "auto"))
+    return _codec
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode a JSON document."""
+    if _codec is None:
+        get_codec()
+    return _loads(data)
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    """
+    Encode a value as JSON, leaving non-ASCII characters unescaped.
+
+    Args:
+        value: Value to encode; objects JSON does not know are written as their str()
+        indent: Indent by two spaces like FastMCP's tool result text (default: compact)
+
+    Returns:
+        The JSON text
+    """
+    if _codec is None:
+        get_codec()
+    return _dumps(value, indent)
+
+
+def loads_as(
+    data: bytes | str, schema: Schema
+) -> Dict[str, Any] | List[Dict[str, Any]]:
+    """
+    Decode a JSON record, or a list of records, keeping only the fields of `schema`.
+
+    Args:
+        data: JSON object or array of objects
+        schema: Fields to keep, e.g. TRACKER_ITEM_REFERENCE
+
+    Returns:
+        The record or records as dicts holding the schema fields present in `data`
+    """
+    msgspec = _import("msgspec")
+    if msgspec is not None:
+        many = data.lstrip()[:1] in (b"[", "[")
+        # Converting back to builtins leaves out the fields missing from `data`
+        return msgspec.to_builtins(schema.decoder(many).decode(data))
+    decoded = loads(data)
+    return (
+        [schema.select(record) for record in decoded]
+        if isinstance(decoded, list)
+        else schema.select(decoded)
+    )
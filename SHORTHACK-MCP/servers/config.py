@@ -0,0 +1,36 @@
+import os
+from typing import Iterable
+
+_loaded = False
+
+
+def load_config() -> None:
+    """
+    Load settings from the .env file into the environment, once per process.
+
+    Settings are read with os.getenv wherever they are used; only the first call
+    searches for and parses .env, later ones return at once. Variables that are
+    already set in the environment are never overridden.
+    """
+    global _loaded
+    if _loaded:
+        return
+    # python-dotenv is imported on first use to keep it off the startup path
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _loaded = True
+
+
+def reload_settings(names: Iterable[str]) -> None:
+    """
+    Read the given settings from the .env file again, e.g. after credentials were
+    rotated there. Values found in .env replace the ones loaded before; settings
+    that .env does not define keep their current value.
+    """
+    from dotenv import dotenv_values, find_dotenv
+
+    values = dotenv_values(find_dotenv())
+    for name in names:
+        if values.get(name) is not None:
+            os.environ[name] = values[name]
@@ -0,0 +1,187 @@
+import asyncio
+import base64
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Protocol, Tuple
+
+import httpx
+from config import load_config, reload_settings
+
+logger = logging.getLogger(__name__)
+
+# Settings re-read from .env when Codebeamer rejects the credentials built from them
+CREDENTIAL_SETTINGS = (
+    "CODEBEAMER_BASE_URL",
+    "CODEBEAMER_USERNAME",
+    "CODEBEAMER_PASSWORD",
+    "CODEBEAMER_API_TOKEN",
+)
+
+# Fetches a new access token, returned with its lifetime in seconds or None if unlimited
+TokenFetcher = Callable[[], Awaitable[Tuple[str, float | None]]]
+
+
+class CredentialsProvider(Protocol):
+    """
+    Interface a credentials provider must provide to be used by codebeamer_interface.
+
+    auth_headers() returns the headers authenticating a request, built once and reused
+    while valid. refresh() is called when Codebeamer answered 401 to a request sent with
+    `rejected` headers and returns whether different credentials are now available, so
+    the request is worth sending again.
+    """
+
+    base_url: str
+
+    async def auth_headers(self) -> Dict[str, str]: ...
+
+    async def refresh(self, rejected: Dict[str, str]) -> bool: ...
+
+
+def basic_auth_headers(username: str, password: str) -> Dict[str, str]:
+    """Return the Authorization header for HTTP Basic authentication."""
+    encoded = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return {"Authorization": f"Basic {encoded}"}
+
+
+class EnvCredentials:
+    """
+    Credentials read from environment variables, sent as an API token if one is
+    set and otherwise as username and password. The header is built once; when
+    Codebeamer rejects it, the settings are read from .env again so credentials
+    rotated there are picked up without a restart.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_BASE_URL: URL of the Codebeamer instance
+    - CODEBEAMER_API_TOKEN: Token sent as "Authorization: Bearer <token>" (optional)
+    - CODEBEAMER_USERNAME, CODEBEAMER_PASSWORD: Basic authentication without a token
+    """
+
+    def __init__(self):
+        load_config()
+        self._load()
+
+    def _load(self) -> None:
+        self.base_url = os.getenv("CODEBEAMER_BASE_URL", "").rstrip("/")
+        token = os.getenv("CODEBEAMER_API_TOKEN", "")
+        if token:
+            self._headers = {"Authorization": f"Bearer {token}"}
+        else:
+            username, password = os.getenv("CODEBEAMER_USERNAME", ""), os.getenv(
+                "CODEBEAMER_PASSWORD", ""
+            )
+            self._headers = basic_auth_headers(username, password)
+
+    async def auth_headers(self) -> Dict[str, str]:
+        return self._headers
+
+    async def refresh(self, rejected: Dict[str, str]) -> bool:
+        if rejected != self._headers:
+            # Another request already picked up new credentials
+            return True
+        reload_settings(CREDENTIAL_SETTINGS)
+        self._load()
+        if self._headers == rejected:
+            return False
+        logger.info("Codebeamer rejected the credentials, using the ones now in .env")
+        return True
+
+
+class TokenCredentials:
+    """
+    Bearer token credentials from a pluggable fetcher, e.g. an OAuth token endpoint.
+
+    The token is cached until shortly before it expires, or until Codebeamer
+    rejects it, and concurrent requests wait for a single fetch.
+    """
+
+    def __init__(
+        self, base_url: str, fetch_token: TokenFetcher, refresh_margin: float = 30.0
+    ):
+        """
+        Args:
+            base_url: URL of the Codebeamer instance
+            fetch_token: Coroutine function returning a token and its lifetime
+            refresh_margin: Seconds before expiry to renew the token (default: 30)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.fetches = 0
+        self._headers: Dict[str, str] | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def auth_headers(self) -> Dict[str, str]:
+        if self._headers is not None and time.monotonic() < self._expires_at:
+            return self._headers
+        async with self._lock:
+            # Another request may have fetched a token while this one waited
+            if self._headers is None or time.monotonic() >= self._expires_at:
+                token, lifetime = await self.fetch_token()
+                self.fetches += 1
+                self._headers = {"Authorization": f"Bearer {token}"}
+                # Renew ahead of expiry, but use at least half of a short token lifetime
+                valid_for = (
+                    max(lifetime - self.refresh_margin, lifetime / 2)
+                    if lifetime
+                    else float("inf")
+                )
+                self._expires_at = time.monotonic() + valid_for
+            return self._headers
+
+    async def refresh(self, rejected: Dict[str, str]) -> bool:
+        if rejected == self._headers:
+            self._headers = None
+        return True
+
+
+def oauth_client_credentials(
+    token_url: str, client_id: str, client_secret: str
+) -> TokenFetcher:
+    """
+    Return a token fetcher for the OAuth 2.0 client credentials grant.
+
+    Args:
+        token_url: Token endpoint of the identity provider
+        client_id: OAuth client ID
+        client_secret: OAuth client secret
+
+    Returns:
+        Coroutine function for TokenCredentials
+    """
+
+    async def fetch_token() -> Tuple[str, float | None]:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(
+                token_url,
+                data={"grant_type": "client_credentials"},
+                auth=(client_id, client_secret),
+            )
+        response.raise_for_status()
+        data = response.json()
+        return data["access_token"], data.get("expires_in")
+
+    return fetch_token
+
+
+def credentials_from_env() -> CredentialsProvider:
+    """
+    Create the credentials provider configured by environment variables.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_TOKEN_URL: OAuth token endpoint. When set, tokens are fetched with the
+      client credentials grant, using CODEBEAMER_CLIENT_ID and CODEBEAMER_CLIENT_SECRET
+    - Otherwise the settings of EnvCredentials are used
+    """
+    load_config()
+    token_url = os.getenv("CODEBEAMER_TOKEN_URL", "")
+    if token_url:
+        fetch_token = oauth_client_credentials(
+            token_url,
+            os.getenv("CODEBEAMER_CLIENT_ID", ""),
+            os.getenv("CODEBEAMER_CLIENT_SECRET", ""),
+        )
+        return TokenCredentials(os.getenv("CODEBEAMER_BASE_URL", ""), fetch_token)
+    return EnvCredentials()
@@ -0,0 +1,260 @@
+import asyncio
+import difflib
+import os
+from typing import Any, Collection, Dict, List
+
+import codebeamer_interface
+from config import load_config
+
+# Fields that change with every edit without saying what changed, skipped by default
+DEFAULT_IGNORED_FIELDS = ("version", "modifiedAt", "modifiedBy")
+
+# Keys identifying objects in a list, e.g. users in assignedTo or fields in customFields
+IDENTITY_KEYS = ("id", "fieldId")
+
+# Strings longer than this are compared word by word instead of returned whole
+TEXT_DIFF_MIN_CHARS = 200
+
+# Words of unchanged text kept before each edit of a long string
+CONTEXT_WORDS = 5
+
+
+def _identity_key(old: List[Any], new: List[Any]) -> str | None:
+    """Return the key identifying every object in both lists, if there is one."""
+    elements = old + new
+    for key in IDENTITY_KEYS:
+        if elements and all(isinstance(e, dict) and key in e for e in elements):
+            return key
+    return None
+
+
+def _text_edits(old: str, new: str) -> List[Dict[str, str]]:
+    """Word-level edits turning `old` into `new`, each with the words preceding it."""
+    old_words, new_words = old.split(), new.split()
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    edits = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        edit = {"after": " ".join(old_words[max(0, i1 - CONTEXT_WORDS) : i1])}
+        if i2 > i1:
+            edit["removed"] = " ".join(old_words[i1:i2])
+        if j2 > j1:
+            edit["added"] = " ".join(new_words[j1:j2])
+        edits.append(edit)
+    return edits
+
+
+def diff_values(
+    old: Any, new: Any, ignore: Collection[str] = (), path: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    Return the changes turning `old` into `new`.
+
+    Objects are compared key by key and lists of objects element by element,
+    matched by "id" or "fieldId", so a change is reported at the deepest path
+    that differs, e.g. "status.name" or "customFields[fieldId=1003].value".
+    Long strings are reported as word-level edits rather than in full.
+
+    Args:
+        old: Earlier value
+        new: Later value
+        ignore: Dotted paths of object keys to skip, e.g. ["modifiedAt", "tracker.name"]
+        path: Path of the values inside the compared document
+
+    Returns:
+        List of {"path", "change", ...} entries: "changed" with "from" and "to",
+        "added" with "to", "removed" with "from", or "edited" with "edits"
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: List[Dict[str, Any]] = []
+        for key in [*old, *(key for key in new if key not in old)]:
+            key_path = f"{path}.{key}" if path else str(key)
+            if key_path in ignore:
+                continue
+            if key not in new:
+                changes.append(
+                    {"path": key_path, "change": "removed", "from": old[key]}
+                )
+            elif key not in old:
+                changes.append({"path": key_path, "change": "added", "to": new[key]})
+            else:
+                changes.extend(diff_values(old[key], new[key], ignore, key_path))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        key = _identity_key(old, new)
+        if key is not None:
+            old_by_id = {element[key]: element for element in old}
+            new_by_id = {element[key]: element for element in new}
+            changes = []
+            for element_id in [
+                *old_by_id,
+                *(i for i in new_by_id if i not in old_by_id),
+            ]:
+                element_path = f"{path}[{key}={element_id}]"
+                if element_id not in new_by_id:
+                    changes.append(
+                        {
+                            "path": element_path,
+                            "change": "removed",
+                            "from": old_by_id[element_id],
+                        }
+                    )
+                elif element_id not in old_by_id:
+                    changes.append(
+                        {
+                            "path": element_path,
+                            "change": "added",
+                            "to": new_by_id[element_id],
+                        }
+                    )
+                else:
+                    changes.extend(
+                        diff_values(
+                            old_by_id[element_id],
+                            new_by_id[element_id],
+                            ignore,
+                            element_path,
+                        )
+                    )
+            return changes
+    if (
+        isinstance(old, str)
+        and isinstance(new, str)
+        and max(len(old), len(new)) > TEXT_DIFF_MIN_CHARS
+    ):
+        edits = _text_edits(old, new)
+        if edits:
+            return [{"path": path, "change": "edited", "edits": edits}]
+        return [
+            {"path": path, "change": "edited", "edits": [], "whitespace_only": True}
+        ]
+    return [{"path": path, "change": "changed", "from": old, "to": new}]
+
+
+def _select(item: Dict[str, Any], fields: List[str] | None) -> Dict[str, Any]:
+    if not fields:
+        return item
+    return {key: item[key] for key in fields if key in item}
+
+
+async def diff_tracker_items(
+    item_ids: List[int],
+    from_version: int | None = None,
+    from_baseline_id: int | None = None,
+    to_version: int | None = None,
+    to_baseline_id: int | None = None,
+    fields: List[str] | None = None,
+    ignore_fields: List[str] | None = None,
+    concurrency: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Compare tracker items between two versions or baselines.
+
+    Historical reads come from the history cache once fetched, so repeated
+    comparisons against the same baseline only read the other side. When no
+    "to" version or baseline is given, the current items are read in bulk.
+
+    Reads the default concurrency from the CODEBEAMER_BULK_CONCURRENCY environment
+    variable (default: 8).
+
+    Args:
+        item_ids: The IDs of the tracker items to compare
+        from_version: Version of the items to compare from (optional)
+        from_baseline_id: Baseline to compare from (optional if from_version is set)
+        to_version: Version of the items to compare to (optional)
+        to_baseline_id: Baseline to compare to (optional, default: the current items)
+        fields: Optional list of top-level fields to compare (optional, default: all)
+        ignore_fields: Dotted paths of fields to skip (default: DEFAULT_IGNORED_FIELDS)
+        concurrency: Maximum number of concurrent per-item requests (optional)
+
+    Returns:
+        Dictionary with one entry per changed, added, removed or failed item, in the
+        order requested, holding its item_id, status, name and changes or error
+        information, plus a summary counting the items by status
+    """
+    if from_version is None and from_baseline_id is None:
+        return {
+            "error": "Invalid arguments",
+            "details": "from_version or from_baseline_id is required",
+        }
+    if concurrency is None:
+        load_config()
+        concurrency = int(os.getenv("CODEBEAMER_BULK_CONCURRENCY", "8"))
+    ignore = set(DEFAULT_IGNORED_FIELDS if ignore_fields is None else ignore_fields)
+    unique_ids = list(dict.fromkeys(item_ids))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def read(
+        item_id: int, version: int | None, baseline_id: int | None
+    ) -> Dict[str, Any]:
+        async with semaphore:
+            return await codebeamer_interface.get_tracker_item(
+                item_id, version, baseline_id
+            )
+
+    async def read_side(
+        version: int | None, baseline_id: int | None
+    ) -> List[Dict[str, Any]]:
+        if version is None and baseline_id is None:
+            bulk = await codebeamer_interface.get_tracker_items_bulk(
+                unique_ids, concurrency=concurrency
+            )
+            return bulk["result"]
+        return await asyncio.gather(
+            *(read(item_id, version, baseline_id) for item_id in unique_ids)
+        )
+
+    old_side, new_side = await asyncio.gather(
+        read_side(from_version, from_baseline_id), read_side(to_version, to_baseline_id)
+    )
+
+    summary = {"changed": 0, "unchanged": 0, "added": 0, "removed": 0, "failed": 0}
+    entries: Dict[int, Dict[str, Any]] = {}
+    for item_id, old, new in zip(unique_ids, old_side, new_side):
+        if "result" in old and "result" in new:
+            changes = diff_values(
+                _select(old["result"], fields), _select(new["result"], fields), ignore
+            )
+            status = "changed" if changes else "unchanged"
+            entry = {
+                "item_id": item_id,
+                "status": status,
+                "name": new["result"].get("name"),
+                "changes": changes,
+            }
+        elif old.get("status_code") == 404 and "result" in new:
+            entry = {
+                "item_id": item_id,
+                "status": "added",
+                "name": new["result"].get("name"),
+            }
+        elif "result" in old and new.get("status_code") == 404:
+            entry = {
+                "item_id": item_id,
+                "status": "removed",
+                "name": old["result"].get("name"),
+            }
+        else:
+            failed = new if "result" in old else old
+            entry = {
+                "item_id": item_id,
+                "status": "failed",
+                "error": failed.get("error"),
+            }
+            if "status_code" in failed:
+                entry["status_code"] = failed["status_code"]
+            if "details" in failed:
+                entry["details"] = failed["details"]
+        summary[entry["status"]] += 1
+        entries[item_id] = entry
+
+    # Unchanged items are only counted, which is what keeps the result small
+    changed = [
+        entries[item_id]
+        for item_id in unique_ids
+        if entries[item_id]["status"] != "unchanged"
+    ]
+    return {"result": changed, "summary": summary}
@@ -1,16 +1,44 @@
+import asyncio
 import logging
+import math
+import os
+import shutil
+import signal
 import sys
-from typing import Any, Dict
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Mapping
 
+import codec
 from codebeamer_interface import (
+    MAX_PAGE_SIZE,
+    CodebeamerError,
+    codebeamer_client_pool,
+    codebeamer_write_queue,
     get_projects,
     get_tracker_item,
     get_tracker_item_comments,
     get_tracker_items,
+    get_tracker_items_bulk,
     get_trackers_by_project_id,
+    iter_tracker_items,
     post_tracker_item_comment,
+    post_tracker_item_comments,
 )
-from mcp.server.fastmcp import FastMCP
+from codebeamer_mirror import codebeamer_mirror_from_env
+from config import load_config
+from item_diff import diff_tracker_items
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.tools import Tool
+from mcp.types import TextContent
+from metrics import render_metrics, track_tool_call, worker_metrics_from_env
+from response_shaping import shape_response
+from search_index import SearchIndex, search_index_updates_from_env
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from tracing import start_span, tracing_from_env
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -19,27 +47,122 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 logger.info("Starting MCP Server...")
 
-mcp = FastMCP("server", stateless_http=True, port=8080, host="0.0.0.0")
+
+class InstrumentedFastMCP(FastMCP):
+    """
+    FastMCP server recording call counts, latencies, errors and response sizes of
+    every tool, and tracing each call as a child of the caller's traceparent header.
+    """
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        tool = self._tool_manager.get_tool(name)
+        if tool is None:
+            return await super().call_tool(name, arguments)
+        context = self.get_context()
+        with (
+            start_span(
+                f"tool {name}",
+                kind="server",
+                attributes={"mcp.tool.name": name},
+                carrier=_request_headers(context),
+            ) as span,
+            track_tool_call(name) as call,
+        ):
+            result = await tool.run(arguments, context=context)
+            started = time.perf_counter()
+            content = _convert_result(tool, result)
+            serialization_seconds = time.perf_counter() - started
+            blocks = content[0] if isinstance(content, tuple) else content
+            size = sum(len(getattr(block, "text", "").encode()) for block in blocks)
+            call.record_result(result, size, serialization_seconds)
+            span.set_attributes(
+                {
+                    "mcp.tool.response_bytes": size,
+                    "mcp.tool.upstream_seconds": call.clock.total,
+                    "mcp.tool.serialization_seconds": serialization_seconds,
+                }
+            )
+            if call.error_type:
+                span.set_attribute("error.type", call.error_type)
+        return content
+
+
+def _convert_result(tool: Tool, result: Any) -> Any:
+    """
+    Turn a tool's return value into MCP content.
+
+    With an accelerated JSON codec, dict results are plain decoded JSON. They are
+    encoded by the codec and used as structured content as they are, without the
+    validating copy FastMCP makes of them.
+    """
+    metadata = tool.fn_metadata
+    if (
+        codec.get_codec() == "json"
+        or not isinstance(result, dict)
+        or metadata.output_schema is None
+        or not metadata.wrap_output
+    ):
+        return metadata.convert_result(result)
+    return [TextContent(type="text", text=codec.dumps(result, indent=True))], {
+        "result": result
+    }
+
+
+def _request_headers(context: Context) -> Mapping[str, str] | None:
+    """Return the HTTP headers of the MCP request being handled, if any."""
+    try:
+        request = context.request_context.request
+    except (LookupError, ValueError):
+        return None
+    return getattr(request, "headers", None)
+
+
+mcp = InstrumentedFastMCP("server", stateless_http=True, port=8080, host="0.0.0.0")
+
+search_index = SearchIndex()
 
 
 @mcp.tool()
-async def mcp_get_projects() -> Dict[str, Any]:
+async def mcp_get_projects(
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
     """
     Get projects from Codebeamer using the /v3/projects API endpoint.
 
+    Args:
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
+
     Returns:
         Dictionary containing the API response with projects list or error information
     """
-    return await get_projects()
+    return shape_response(
+        await get_projects(), fields, max_tokens, max_bytes, continuation
+    )
 
 
 @mcp.tool()
-async def mcp_get_trackers_by_project_id(project_id: int) -> Dict[str, Any]:
+async def mcp_get_trackers_by_project_id(
+    project_id: int,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
     """
     Get trackers for a specific project from Codebeamer using the /v3/projects/{projectId}/trackers API endpoint.
 
     Args:
         project_id: The ID of the project to retrieve trackers for
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
 
     Reads credentials from environment variables:
     - CODEBEAMER_BASE_URL: The base URL of the Codebeamer instance
@@ -49,16 +172,32 @@ async def mcp_get_trackers_by_project_id(project_id: int) -> Dict[str, Any]:
     Returns:
         Dictionary containing the trackers list or error information
     """
-    return await get_trackers_by_project_id(project_id)
+    return shape_response(
+        await get_trackers_by_project_id(project_id),
+        fields,
+        max_tokens,
+        max_bytes,
+        continuation,
+    )
 
 
 @mcp.tool()
-async def mcp_get_tracker_items(tracker_id: int) -> Dict[str, Any]:
+async def mcp_get_tracker_items(
+    tracker_id: int,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
     """
     Get tracker items within a tracker from Codebeamer using the /v3/trackers/{trackerId}/items API endpoint.
 
     Args:
         tracker_id: The ID of the tracker to retrieve items for
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
 
     Reads credentials from environment variables:
     - CODEBEAMER_BASE_URL: The base URL of the Codebeamer instance
@@ -68,16 +207,103 @@ async def mcp_get_tracker_items(tracker_id: int) -> Dict[str, Any]:
     Returns:
         Dictionary containing the tracker information or error information
     """
-    return await get_tracker_items(tracker_id)
+    return shape_response(
+        await get_tracker_items(tracker_id), fields, max_tokens, max_bytes, continuation
+    )
 
 
 @mcp.tool()
-async def mcp_get_tracker_item(item_id: int) -> Dict[str, Any]:
+async def mcp_iter_tracker_items(
+    tracker_id: int,
+    cursor: str | None = None,
+    limit: int = MAX_PAGE_SIZE,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Get tracker items in batches, for trackers too large to fetch at once.
+
+    Args:
+        tracker_id: The ID of the tracker to retrieve items for
+        cursor: The next_cursor value of the previous call, omitted for the first batch
+        limit: Maximum number of items to return in this batch (default: 500)
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: The continuation value of a truncated call, passed with the same
+            cursor to read the rest of that batch (optional)
+
+    Returns:
+        Dictionary with the batch of items and next_cursor, or error information.
+        next_cursor is null once every item has been returned.
+    """
+    limit = max(1, limit)
+    page_size = min(limit, MAX_PAGE_SIZE)
+    # A cursor is "page:page_size", plus ":skip" when the batch ended inside that page
+    start_page, skip = 1, 0
+    if cursor:
+        try:
+            parts = [int(part) for part in cursor.split(":")]
+            if len(parts) not in (2, 3):
+                raise ValueError(cursor)
+            start_page, page_size, skip = parts if len(parts) == 3 else (*parts, 0)
+            if start_page < 1 or page_size < 1 or not 0 <= skip < page_size:
+                raise ValueError(cursor)
+        except ValueError:
+            return {
+                "error": "Invalid cursor",
+                "details": f"Cursor {cursor!r} is not valid",
+            }
+    max_pages = math.ceil((skip + limit) / page_size)
+
+    try:
+        items = [
+            item
+            async for item in iter_tracker_items(
+                tracker_id,
+                page_size=page_size,
+                start_page=start_page,
+                max_pages=max_pages,
+            )
+        ]
+    except CodebeamerError as e:
+        return e.error
+
+    # A cursor from a call with a larger limit may point at pages larger than this batch
+    batch = items[skip : skip + limit]
+    next_cursor = None
+    if len(items) == max_pages * page_size:
+        position = (start_page - 1) * page_size + skip + len(batch)
+        next_cursor = f"{position // page_size + 1}:{page_size}"
+        if position % page_size:
+            next_cursor += f":{position % page_size}"
+    return shape_response(
+        {"result": {"items": batch, "next_cursor": next_cursor}},
+        fields,
+        max_tokens,
+        max_bytes,
+        continuation,
+    )
+
+
+@mcp.tool()
+async def mcp_get_tracker_item(
+    item_id: int,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+) -> Dict[str, Any]:
     """
     Get a specific tracker item from Codebeamer using the /v3/items/{itemId} API endpoint.
 
     Args:
         item_id: The ID of the tracker item to retrieve
+        fields: Dotted paths of fields to return, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget; larger items come back with long
+            fields shortened or omitted, listed in omitted_fields (optional)
+        max_bytes: Optional byte budget for the result (optional)
 
     Reads credentials from environment variables:
     - CODEBEAMER_BASE_URL: The base URL of the Codebeamer instance
@@ -87,19 +313,179 @@ async def mcp_get_tracker_item(item_id: int) -> Dict[str, Any]:
     Returns:
         Dictionary containing the tracker information or error information
     """
-    return await get_tracker_item(item_id)
+    return shape_response(
+        await get_tracker_item(item_id), fields, max_tokens, max_bytes
+    )
+
+
+@mcp.tool()
+async def mcp_get_tracker_items_bulk(
+    item_ids: List[int],
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Get many tracker items from Codebeamer in one call. Prefer this over calling
+    mcp_get_tracker_item repeatedly.
+
+    Args:
+        item_ids: The IDs of the tracker items to retrieve
+        fields: Dotted paths of fields to keep per item, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
+
+    Returns:
+        Dictionary with one entry per requested ID, in the same order, each holding
+        either the item or its error information
+    """
+    if fields:
+        # Each entry holds the item under "result", next to its ID or error information
+        fields = [
+            "item_id",
+            "status_code",
+            "error",
+            "details",
+            *(f"result.{field}" for field in fields),
+        ]
+    return shape_response(
+        await get_tracker_items_bulk(item_ids),
+        fields,
+        max_tokens,
+        max_bytes,
+        continuation,
+    )
 
 
 @mcp.tool()
-async def mcp_get_tracker_item_comments(item_id: int) -> Dict[str, Any]:
+async def mcp_diff_tracker_items(
+    item_ids: List[int],
+    from_version: int | None = None,
+    from_baseline_id: int | None = None,
+    to_version: int | None = None,
+    to_baseline_id: int | None = None,
+    fields: List[str] | None = None,
+    ignore_fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Compare tracker items between two versions or baselines and return what changed.
+    Prefer this over reading both versions of each item and comparing them.
+
+    Args:
+        item_ids: The IDs of the tracker items to compare
+        from_version: Version of the items to compare from (optional)
+        from_baseline_id: Baseline to compare from (optional if from_version is set)
+        to_version: Version of the items to compare to (optional)
+        to_baseline_id: Baseline to compare to (optional, default: the current items)
+        fields: Top-level fields to compare, e.g. ["name", "status"] (optional)
+        ignore_fields: Dotted paths of fields to skip (optional, default: ["version",
+            "modifiedAt", "modifiedBy"])
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
+
+    Returns:
+        Dictionary with one entry per item that changed, was added, was removed or could
+        not be read. Each entry holds its status and changes: the path of every changed
+        field with its old and new value, or word-level edits for long texts. Unchanged
+        items are only counted in the summary.
+    """
+    response = await diff_tracker_items(
+        item_ids,
+        from_version,
+        from_baseline_id,
+        to_version,
+        to_baseline_id,
+        fields,
+        ignore_fields,
+    )
+    shaped = shape_response(
+        response, max_tokens=max_tokens, max_bytes=max_bytes, continuation=continuation
+    )
+    if "summary" in response:
+        shaped["summary"] = response["summary"]
+    return shaped
+
+
+@mcp.tool()
+async def mcp_get_tracker_item_comments(
+    item_id: int,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
     """
     Get comments of tracker item by item id
     Args:
         item_id: The ID of the tracker item to retrieve comments for
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+        continuation: Continuation value of a truncated call, to resume it (optional)
     Returns:
         Dictionary containing the comments or error information
     """
-    return await get_tracker_item_comments(item_id)
+    return shape_response(
+        await get_tracker_item_comments(item_id),
+        fields,
+        max_tokens,
+        max_bytes,
+        continuation,
+    )
+
+
+@mcp.tool()
+async def mcp_search_items(
+    query: str,
+    tracker_id: int | None = None,
+    top_k: int = 10,
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Search tracker items by keywords in their name, description and comments.
+    Use this instead of reading whole trackers to find relevant items.
+
+    Args:
+        query: Keywords to search for, e.g. "brake regulation"
+        tracker_id: Only search items of this tracker (optional). A tracker not indexed
+            yet is indexed in the background and can be searched on a later call.
+        top_k: Maximum number of results, best matches first (default: 10)
+        fields: Dotted paths of fields to keep per record, e.g. "status.name" (optional)
+        max_tokens: Optional approximate token budget for the result (optional)
+        max_bytes: Optional byte budget for the result (optional)
+
+    Returns:
+        Dictionary containing the matching items with their scores or error information
+    """
+    if tracker_id is not None and tracker_id not in search_index.last_modified:
+        # A failed indexing is reported once, the next search requests the tracker again
+        failure = search_index.failures.pop(tracker_id, None)
+        if failure is not None:
+            return failure
+        search_index.request(tracker_id)
+        return {
+            "error": "Index not built",
+            "details": f"Tracker {tracker_id} is being indexed, search again later",
+        }
+    if not search_index.tracker_ids():
+        return {
+            "error": "No trackers indexed",
+            "details": "Pass a tracker_id to start indexing that tracker",
+        }
+    return shape_response(
+        {"result": search_index.search(query, tracker_id, top_k)},
+        fields,
+        max_tokens,
+        max_bytes,
+    )
 
 
 @mcp.tool()
@@ -118,10 +504,142 @@ async def mcp_post_tracker_item_comment(
     return await post_tracker_item_comment(item_id, comment_text, comment_format)
 
 
+@mcp.tool()
+async def mcp_post_tracker_item_comments(
+    comments: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Post many comments to tracker items at once
+    Args:
+        comments: The comments to post, each a dictionary with
+            - item_id: The ID of the tracker item to post the comment to
+            - comment_text: The text of the comment
+            - comment_format: "PlainText" or "HTML" (optional, default: "PlainText")
+            - idempotency_key: A unique key for this comment (optional)
+            Posting a key that was already posted, e.g. when retrying after an error,
+            does not create a second comment. Without a key, identical comments are
+            only posted once within the same call; a later call posts them again.
+    Returns:
+        Dictionary with one entry per comment, in the same order, and a summary of the
+        counts. Each entry holds its item_id, idempotency_key, status ("created",
+        "duplicate" or "failed") and the posted comment or error information.
+    """
+    return await post_tracker_item_comments(comments)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """Serve tool and Codebeamer client metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def serving_contexts() -> AsyncIterator[None]:
+    """
+    Run tracing, shared metrics, the Codebeamer client pool and write queue, and the
+    mirror and search index updates.
+    """
+    async with (
+        tracing_from_env(),
+        worker_metrics_from_env(),
+        codebeamer_client_pool(),
+        codebeamer_write_queue(),
+        codebeamer_mirror_from_env(),
+        search_index_updates_from_env(search_index),
+    ):
+        yield
+
+
+def create_app() -> Starlette:
+    """Build the ASGI app of a worker process, which starts its own serving contexts."""
+    app = mcp.streamable_http_app()
+    session_manager_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with serving_contexts(), session_manager_lifespan(app):
+            yield
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+async def run_streamable_http() -> None:
+    """Run the HTTP server in this process."""
+    async with serving_contexts():
+        await mcp.run_streamable_http_async()
+
+
+async def run_stdio() -> None:
+    """Serve one client over stdin and stdout, as when an editor launches the server."""
+    async with serving_contexts():
+        await mcp.run_stdio_async()
+
+
+def run_workers(workers: int) -> None:
+    """
+    Run the HTTP server in several worker processes sharing one listening socket.
+
+    Every worker has its own Codebeamer client pool and rate limiter, so the
+    configured rate and connection limits are divided between the workers.
+    /metrics merges the metrics of all workers. Sending SIGHUP to this process
+    replaces the workers one at a time, each after its successor is ready.
+
+    Args:
+        workers: Number of worker processes
+    """
+    load_config()
+    for name, default in (
+        ("CODEBEAMER_RATE_LIMIT", "20"),
+        ("CODEBEAMER_RATE_BURST", "20"),
+    ):
+        share = float(os.getenv(name, default)) / workers
+        os.environ[name] = str(max(1.0, share) if share else 0)
+    for name, default in (
+        ("CODEBEAMER_HTTP_MAX_CONNECTIONS", "100"),
+        ("CODEBEAMER_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"),
+    ):
+        os.environ[name] = str(max(1, int(os.getenv(name, default)) // workers))
+    # Only the worker supervisor needs uvicorn's entry point, so import it only here
+    import uvicorn
+
+    metrics_dir = tempfile.mkdtemp(prefix="mcp-metrics-")
+    os.environ["CODEBEAMER_MCP_METRICS_DIR"] = metrics_dir
+    try:
+        uvicorn.run(
+            "mcp_server:create_app",
+            factory=True,
+            host=mcp.settings.host,
+            port=mcp.settings.port,
+            workers=workers,
+            log_level=mcp.settings.log_level.lower(),
+        )
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
+    # uvicorn re-raises SIGTERM after shutting down; handle it like Ctrl+C so the
+    # client pool, mirror and tracing contexts are closed and pending spans flushed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    load_config()
+    transport = os.getenv("CODEBEAMER_MCP_TRANSPORT", "streamable-http")
+    workers = int(os.getenv("CODEBEAMER_MCP_WORKERS", "1"))
     try:
-        logger.info("Starting MCP server in HTTP mode on 0.0.0.0:8080")
-        mcp.run(transport="streamable-http")
+        if transport == "stdio":
+            logger.info("Starting MCP server in stdio mode")
+            asyncio.run(run_stdio())
+        elif workers > 1:
+            logger.info(
+                "Starting MCP server in HTTP mode on 0.0.0.0:8080 "
+                f"with {workers} worker(s)"
+            )
+            run_workers(workers)
+        else:
+            logger.info("Starting MCP server in HTTP mode on 0.0.0.0:8080")
+            asyncio.run(run_streamable_http())
+    except KeyboardInterrupt:
+        logger.info("MCP server stopped")
     except Exception as e:
         logging.error(f"An error occurred while running the MCP server: {e}")
         sys.exit(1)
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Seconds between snapshots written by each worker process when metrics are shared
+WORKER_SNAPSHOT_INTERVAL = 1.0
+
+# Directory where worker processes share metrics snapshots, see worker_metrics_from_env
+_worker_metrics_dir: Path | None = None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(
+    names: Tuple[str, ...], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return (
+        repr(float(value))
+        if isinstance(value, float) and not value.is_integer()
+        else str(int(value))
+    )
+
+
+class Counter:
+    """Monotonic counter, one value per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def set(self, *label_values: str, value: float) -> None:
+        """Set the value directly, for collectors mirroring a total kept elsewhere."""
+        self.values[label_values] = value
+
+    def merge(
+        self,
+        merged: Dict[Tuple[str, ...], Any],
+        label_values: Tuple[str, ...],
+        value: Any,
+    ) -> None:
+        """Combine one worker process's value into the values of all workers."""
+        merged[label_values] = merged.get(label_values, 0) + value
+
+    def samples(self, values: Dict[Tuple[str, ...], float]) -> Iterator[str]:
+        for label_values, value in sorted(values.items()):
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down. Values of several worker processes are
+    added up, or with `merge_max` the highest one is reported.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        merge_max: bool = False,
+    ):
+        super().__init__(name, description, labels)
+        self.merge_max = merge_max
+
+    def merge(
+        self,
+        merged: Dict[Tuple[str, ...], Any],
+        label_values: Tuple[str, ...],
+        value: Any,
+    ) -> None:
+        if self.merge_max:
+            merged[label_values] = max(merged.get(label_values, value), value)
+        else:
+            super().merge(merged, label_values, value)
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Distribution of observations over fixed buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # Per label values: [count per bucket..., count above the last bucket, sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts = self.values.get(label_values)
+        if counts is None:
+            counts = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def merge(
+        self,
+        merged: Dict[Tuple[str, ...], Any],
+        label_values: Tuple[str, ...],
+        value: Any,
+    ) -> None:
+        counts = merged.get(label_values)
+        merged[label_values] = (
+            list(value) if counts is None else [a + b for a, b in zip(counts, value)]
+        )
+
+    def samples(self, values: Dict[Tuple[str, ...], List[float]]) -> Iterator[str]:
+        for label_values, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _format_labels(
+                    self.labels, label_values, f'le="{_format_value(bound)}"'
+                )
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Metrics exposed on /metrics in the Prometheus text format.
+
+    Recording is a dictionary update on the event loop thread, so metrics stay
+    on in production. Collectors run at scrape time to copy state kept elsewhere,
+    such as cache statistics, into gauges.
+
+    With several worker processes, each one writes snapshots of its values to a
+    shared directory and /metrics merges them (see worker_metrics_from_env).
+    """
+
+    def __init__(self):
+        self.metrics: List[Counter | Histogram] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, List[Tuple[Tuple[str, ...], Any]]]:
+        """Return the current values of every metric, in a JSON-serialisable form."""
+        for collector in self._collectors:
+            collector()
+        return {metric.name: list(metric.values.items()) for metric in self.metrics}
+
+    def render(self, snapshots: List[Dict[str, Any]] | None = None) -> str:
+        """
+        Render this process's metrics, or the merge of several processes' snapshots.
+
+        Args:
+            snapshots: Snapshots of worker processes; gauges of snapshots marked
+                {"alive": False} are left out (optional)
+
+        Returns:
+            The metrics in the Prometheus text format
+        """
+        if snapshots is None:
+            snapshots = [{"alive": True, "metrics": self.snapshot()}]
+        lines = []
+        for metric in self.metrics:
+            values: Dict[Tuple[str, ...], Any] = {}
+            for snapshot in snapshots:
+                if metric.kind == "gauge" and not snapshot["alive"]:
+                    continue
+                for label_values, value in snapshot["metrics"].get(metric.name, []):
+                    metric.merge(values, tuple(label_values), value)
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(values))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_CALLS = REGISTRY.register(
+    Counter("mcp_tool_calls_total", "MCP tool calls.", ("tool",))
+)
+TOOL_ERRORS = REGISTRY.register(
+    Counter(
+        "mcp_tool_errors_total",
+        "MCP tool calls that returned or raised an error.",
+        ("tool", "type"),
+    )
+)
+TOOL_IN_FLIGHT = REGISTRY.register(
+    Gauge("mcp_tool_in_flight", "MCP tool calls in progress.", ("tool",))
+)
+TOOL_DURATION = REGISTRY.register(
+    Histogram(
+        "mcp_tool_duration_seconds", "End-to-end MCP tool call latency.", ("tool",)
+    )
+)
+TOOL_UPSTREAM = REGISTRY.register(
+    Histogram(
+        "mcp_tool_upstream_seconds",
+        "Time during a tool call with at least one Codebeamer request outstanding.",
+        ("tool",),
+    )
+)
+TOOL_SERIALIZATION = REGISTRY.register(
+    Histogram(
+        "mcp_tool_serialization_seconds",
+        "Time spent converting tool results to MCP content.",
+        ("tool",),
+    )
+)
+TOOL_RESPONSE_BYTES = REGISTRY.register(
+    Histogram(
+        "mcp_tool_response_bytes",
+        "Size of serialised tool results.",
+        ("tool",),
+        SIZE_BUCKETS,
+    )
+)
+UPSTREAM_DURATION = REGISTRY.register(
+    Histogram(
+        "codebeamer_request_duration_seconds",
+        "Codebeamer HTTP request latency by endpoint class.",
+        ("endpoint", "method", "status"),
+    )
+)
+
+
+class _UpstreamClock:
+    """Wall time during which at least one upstream request of a tool call is open."""
+
+    __slots__ = ("outstanding", "started", "total")
+
+    def __init__(self):
+        self.outstanding = 0
+        self.started = 0.0
+        self.total = 0.0
+
+
+_upstream_clock: ContextVar[_UpstreamClock | None] = ContextVar(
+    "upstream_clock", default=None
+)
+
+
+class ToolCall:
+    """
+    Context manager counting and timing one tool call, including the upstream
+    share of its latency. The server reports the result through record_result().
+    """
+
+    __slots__ = ("tool", "clock", "error_type", "_started", "_token")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.clock = _UpstreamClock()
+        self.error_type: str | None = None
+
+    def __enter__(self) -> "ToolCall":
+        self._token = _upstream_clock.set(self.clock)
+        TOOL_CALLS.inc(self.tool)
+        TOOL_IN_FLIGHT.inc(self.tool)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        TOOL_DURATION.observe(time.perf_counter() - self._started, self.tool)
+        TOOL_UPSTREAM.observe(self.clock.total, self.tool)
+        TOOL_IN_FLIGHT.dec(self.tool)
+        if exc is not None:
+            self.error_type = type(exc.__cause__ or exc).__name__
+        if self.error_type:
+            TOOL_ERRORS.inc(self.tool, self.error_type)
+        _upstream_clock.reset(self._token)
+
+    def record_result(
+        self, result: Any, size: int, serialization_seconds: float
+    ) -> None:
+        """Record the serialised size and time of a result and classify its errors."""
+        TOOL_SERIALIZATION.observe(serialization_seconds, self.tool)
+        TOOL_RESPONSE_BYTES.observe(size, self.tool)
+        if isinstance(result, dict) and "error" in result:
+            status_code = result.get("status_code")
+            self.error_type = (
+                f"http_{status_code}" if status_code else str(result["error"])
+            )
+
+
+def track_tool_call(tool: str) -> ToolCall:
+    """Return a context manager that records metrics for one call of a tool."""
+    return ToolCall(tool)
+
+
+@contextmanager
+def track_upstream_request(endpoint: str, method: str) -> Iterator[Dict[str, Any]]:
+    """
+    Time one Codebeamer request. The caller sets "status" in the yielded dictionary.
+
+    Concurrent requests of the same tool call (bulk fetches, hedges) are counted
+    once towards its upstream time.
+    """
+    clock = _upstream_clock.get()
+    outcome: Dict[str, Any] = {"status": "error"}
+    start = time.perf_counter()
+    if clock is not None:
+        if clock.outstanding == 0:
+            clock.started = start
+        clock.outstanding += 1
+    try:
+        yield outcome
+    finally:
+        end = time.perf_counter()
+        UPSTREAM_DURATION.observe(end - start, endpoint, method, str(outcome["status"]))
+        if clock is not None:
+            clock.outstanding -= 1
+            if clock.outstanding == 0:
+                clock.total += end - clock.started
+
+
+def write_worker_snapshot(directory: Path) -> None:
+    """Atomically replace this process's metrics snapshot in the shared directory."""
+    path = directory / f"{os.getpid()}.json"
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(
+        json.dumps({"pid": os.getpid(), "metrics": REGISTRY.snapshot()}),
+        encoding="utf-8",
+    )
+    os.replace(temporary, path)
+
+
+def read_worker_snapshots(directory: Path, max_age: float) -> List[Dict[str, Any]]:
+    """
+    Read the snapshots of every worker process, marking those not updated within
+    `max_age` seconds as no longer alive. Their counters and histograms still
+    count towards the totals, so totals do not drop when a worker is replaced.
+    """
+    snapshots = []
+    now = time.time()
+    for path in directory.glob("*.json"):
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+            snapshot["alive"] = now - path.stat().st_mtime <= max_age
+        except (OSError, ValueError):
+            continue
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def render_metrics() -> str:
+    """Render the metrics for /metrics, merged across workers sharing a directory."""
+    if _worker_metrics_dir is None:
+        return REGISTRY.render()
+    write_worker_snapshot(_worker_metrics_dir)
+    return REGISTRY.render(
+        read_worker_snapshots(_worker_metrics_dir, 3 * WORKER_SNAPSHOT_INTERVAL)
+    )
+
+
+async def run_worker_snapshot_loop(directory: Path) -> None:
+    """Write this process's metrics snapshot every WORKER_SNAPSHOT_INTERVAL seconds."""
+    while True:
+        try:
+            write_worker_snapshot(directory)
+        except OSError as e:
+            logger.error(f"Writing metrics snapshot failed: {e}")
+        await asyncio.sleep(WORKER_SNAPSHOT_INTERVAL)
+
+
+@asynccontextmanager
+async def worker_metrics_from_env() -> AsyncIterator[Path | None]:
+    """
+    Share this worker process's metrics with the other workers within the context.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_MCP_METRICS_DIR: Directory for metrics snapshots of worker processes,
+      set by the multi-worker server; unset serves this process's metrics only
+    """
+    global _worker_metrics_dir
+    load_config()
+    directory = os.getenv("CODEBEAMER_MCP_METRICS_DIR", "")
+    if not directory:
+        yield None
+        return
+
+    _worker_metrics_dir = Path(directory)
+    snapshot_task = asyncio.create_task(run_worker_snapshot_loop(_worker_metrics_dir))
+    try:
+        yield _worker_metrics_dir
+    finally:
+        snapshot_task.cancel()
+        # A final snapshot keeps this worker's totals after it exits
+        write_worker_snapshot(_worker_metrics_dir)
+        _worker_metrics_dir = None
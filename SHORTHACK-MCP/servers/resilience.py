@@ -0,0 +1,279 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter shared by all Codebeamer requests.
+
+    The refill rate adapts to the server: each throttled (429) response halves it,
+    down to `min_rate`, and each successful response raises it by `increase_step`
+    back up to `max_rate`. A Retry-After value blocks every caller until it passes.
+    """
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: float = 20.0,
+        min_rate: float = 1.0,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._counters = {"acquired": 0, "waited": 0, "throttled": 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        waited = False
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                delay = self._blocked_until - now
+            else:
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self._counters["acquired"] += 1
+                    self._counters["waited"] += waited
+                    return
+                delay = (1 - self._tokens) / self.rate
+            waited = True
+            await asyncio.sleep(delay)
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now."""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return False
+        self._refill(now)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self._counters["acquired"] += 1
+        return True
+
+    def on_success(self) -> None:
+        """Additively raise the rate after a response that was not throttled."""
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self, retry_after: float | None = None) -> None:
+        """Multiplicatively lower the rate after a 429 and honour Retry-After."""
+        self._counters["throttled"] += 1
+        self._refill(time.monotonic())
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        if retry_after:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + retry_after
+            )
+            self._tokens = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {**self._counters, "rate": self.rate}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 10.0) -> float:
+    """Exponential backoff with full jitter for the given 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Group endpoints by shape, e.g. 'items/123/comments' -> 'items/{id}/comments'."""
+    path = endpoint.split("?", 1)[0]
+    return re.sub(r"(?<=/)\d+(?=/|$)", "{id}", path)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one class of Codebeamer endpoints.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    fail fast for `reset_timeout` seconds. Then it is half-open: a single probe
+    request is let through, which closes the circuit on success or reopens it on
+    failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: float | None = None
+        self._counters = {"opened": 0, "rejected": 0}
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self.state == self.OPEN and self.retry_in() == 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back, e.g. when cancelled, expires in time
+            now = time.monotonic()
+            if (
+                self._probe_started_at is None
+                or now - self._probe_started_at > self.reset_timeout
+            ):
+                self._probe_started_at = now
+                return True
+        self._counters["rejected"] += 1
+        return False
+
+    def on_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_started_at = None
+
+    def on_failure(self) -> None:
+        self._failures += 1
+        self._probe_started_at = None
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self._counters["opened"] += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self._counters,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+        }
+
+
+class LatencyTracker:
+    """Recent successful request latencies, used to derive hedging delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the given percentile, or None until enough samples are recorded."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class WriteQueue:
+    """
+    Bounded queue of writes drained by a fixed number of worker tasks.
+
+    Writes from concurrent callers share one concurrency limit, and once
+    `max_pending` writes are waiting, submitting blocks until there is room
+    instead of piling up more requests.
+    """
+
+    def __init__(self, concurrency: int = 4, max_pending: int = 100):
+        self.concurrency = max(1, concurrency)
+        self._queue: asyncio.Queue = asyncio.Queue(max(1, max_pending))
+        self._workers: List[asyncio.Task] = []
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0}
+
+    async def __aenter__(self) -> "WriteQueue":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """Start the workers; call this from the event loop that will run the writes."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work()) for _ in range(self.concurrency)
+            ]
+
+    async def close(self) -> None:
+        """Wait for the queued writes to finish, then stop the workers."""
+        if self._workers:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, write: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        """
+        Queue a write, waiting while the queue is full.
+
+        Args:
+            write: Coroutine function performing the write
+
+        Returns:
+            Future resolved with the write's result or exception
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((write, future))
+        self._counters["submitted"] += 1
+        return future
+
+    async def _work(self) -> None:
+        while True:
+            write, future = await self._queue.get()
+            try:
+                result = await write()
+            except Exception as e:
+                self._counters["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self._counters["completed"] += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "pending": self._queue.qsize()}
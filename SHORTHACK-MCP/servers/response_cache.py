@@ -0,0 +1,151 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Protocol, Tuple
+
+# Historical reads of an item at a version or baseline, which never change
+IMMUTABLE_ENDPOINT = r"^items/\d+\?(.*&)?(version|baselineId)="
+
+# Default time-to-live in seconds for GET endpoints, first match wins.
+# math.inf entries never expire and are only removed by LRU eviction.
+DEFAULT_TTL_RULES: List[Tuple[str, float]] = [
+    (IMMUTABLE_ENDPOINT, math.inf),
+    (r"^items/\d+/comments$", 30.0),
+    (r"^items/\d+$", 60.0),
+    (r"^trackers/\d+/items(\?.*)?$", 60.0),
+    (r"^projects/\d+/trackers$", 300.0),
+    (r"^projects$", 300.0),
+]
+
+
+class CacheBackend(Protocol):
+    """Interface a response cache must provide to be used by codebeamer_interface."""
+
+    def get(self, key: str) -> Dict[str, Any] | None: ...
+
+    def set(self, key: str, value: Dict[str, Any]) -> None: ...
+
+    def invalidate(self, key: str) -> None: ...
+
+    def stats(self) -> Dict[str, int]: ...
+
+
+class TTLLRUCache:
+    """
+    In-memory response cache with per-endpoint TTLs and size-bounded LRU eviction.
+
+    Keys are Codebeamer endpoint strings (path relative to /v3 plus query string).
+    Endpoints that match no TTL rule are not cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_rules: List[Tuple[str, float]] | None = None,
+    ):
+        self.max_entries = max_entries
+        self._rules = [
+            (re.compile(pattern), ttl)
+            for pattern, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        ]
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def ttl_for(self, key: str) -> float:
+        """Return the TTL for an endpoint, or 0 if it should not be cached."""
+        for pattern, ttl in self._rules:
+            if pattern.search(key):
+                return ttl
+        return 0.0
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        ttl = self.ttl_for(key)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, key: str) -> None:
+        """Remove an endpoint and all of its query-string variants."""
+        self._entries.pop(key, None)
+        prefix = key + "?"
+        for cached_key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[cached_key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "size": len(self._entries)}
+
+
+class ValidatorStore:
+    """
+    Size-bounded LRU store of ETag / Last-Modified validators for GET responses.
+
+    Each entry keeps the validators together with the last successful result so
+    a 304 Not Modified answer can be served from it. It is independent of the
+    response cache backend, which may have expired or evicted the same entry.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[
+            str, Tuple[str | None, str | None, int, Dict[str, Any]]
+        ] = OrderedDict()
+
+    def get(
+        self, key: str
+    ) -> Tuple[str | None, str | None, int, Dict[str, Any]] | None:
+        """Return (etag, last_modified, body_size, result) of an endpoint, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(
+        self,
+        key: str,
+        etag: str | None,
+        last_modified: str | None,
+        body_size: int,
+        value: Dict[str, Any],
+    ) -> None:
+        if etag is None and last_modified is None:
+            self._entries.pop(key, None)
+            return
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (etag, last_modified, body_size, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """Remove an endpoint and all of its query-string variants."""
+        self._entries.pop(key, None)
+        prefix = key + "?"
+        for stored_key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[stored_key]
+
+    def clear(self) -> None:
+        self._entries.clear()
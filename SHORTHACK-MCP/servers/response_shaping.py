@@ -0,0 +1,203 @@
+import math
+import os
+from typing import Any, Dict, List, Tuple
+
+import codec
+from config import load_config
+
+# Keys under which Codebeamer paged results hold their list of records
+RECORD_KEYS = ("itemRefs", "items")
+
+# Rough size of the {"result": ..., "continuation": ...} envelope around records
+ENVELOPE_BYTES = 256
+
+# Strings longer than this are shortened first when a single object is over budget
+MAX_STRING_CHARS = 256
+
+BYTES_PER_TOKEN = 4
+
+
+def encoded_size(data: Any, depth: int = 0) -> int:
+    """
+    Size in bytes of a value in a tool result, which FastMCP sends as JSON indented
+    by two spaces; `depth` is the nesting level of the value inside the result.
+    """
+    text = codec.dumps(data, indent=True)
+    return len(text.encode()) + text.count("\n") * 2 * depth
+
+
+def estimate_tokens(size_bytes: int) -> int:
+    """Approximate LLM token count of a JSON payload (about 4 bytes per token)."""
+    return math.ceil(size_bytes / BYTES_PER_TOKEN)
+
+
+def _field_tree(fields: List[str]) -> Dict[str, Any]:
+    """
+    Turn dotted paths into a tree of fields.
+
+    For example, ["id", "tracker.name"] becomes {"id": {}, "tracker": {"name": {}}}.
+    """
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        for part in field.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _project(value: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {
+            key: _project(value[key], sub) for key, sub in tree.items() if key in value
+        }
+    return value
+
+
+def _records(result: Any) -> Tuple[List[Any] | None, str | None]:
+    """Return the list of records in a result and the key holding it, if any."""
+    if isinstance(result, list):
+        return result, None
+    if isinstance(result, dict):
+        for key in RECORD_KEYS:
+            if isinstance(result.get(key), list):
+                return result[key], key
+    return None, None
+
+
+def _with_records(result: Any, key: str | None, records: List[Any]) -> Any:
+    return records if key is None else {**result, key: records}
+
+
+def _shorten_strings(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + "…"
+    if isinstance(value, list):
+        return [_shorten_strings(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _shorten_strings(v) for k, v in value.items()}
+    return value
+
+
+def _summarise(value: Dict[str, Any], budget: int) -> Tuple[Dict[str, Any], List[str]]:
+    """Fit an object into the budget by shortening strings, then dropping big fields."""
+    value = _shorten_strings(value)
+    omitted: List[str] = []
+    sizes = sorted(
+        ((encoded_size(v, depth=2), k) for k, v in value.items()), reverse=True
+    )
+    for size, key in sizes:
+        if encoded_size(value) + ENVELOPE_BYTES <= budget:
+            break
+        note = f"<omitted {size} bytes, request fields=['{key}'] to read it>"
+        if size <= len(note):
+            # Small fields such as id and name are kept even when the budget is not met
+            break
+        value = {**value, key: note}
+        omitted.append(key)
+    return value, omitted
+
+
+def get_default_budget() -> Dict[str, int | None]:
+    """
+    Load the default response budget for read tools from environment variables.
+
+    - CODEBEAMER_TOOL_MAX_TOKENS: Maximum tokens per tool result (default: unlimited)
+    - CODEBEAMER_TOOL_MAX_BYTES: Maximum bytes per tool result (default: unlimited)
+    """
+    load_config()
+    max_tokens = os.getenv("CODEBEAMER_TOOL_MAX_TOKENS")
+    max_bytes = os.getenv("CODEBEAMER_TOOL_MAX_BYTES")
+    return {
+        "max_tokens": int(max_tokens) if max_tokens else None,
+        "max_bytes": int(max_bytes) if max_bytes else None,
+    }
+
+
+def shape_response(
+    response: Dict[str, Any],
+    fields: List[str] | None = None,
+    max_tokens: int | None = None,
+    max_bytes: int | None = None,
+    continuation: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Project a tool response to the requested fields and fit it into a size budget.
+
+    Fields are dotted paths applied to each record of a list result (or of the
+    itemRefs / items list of a paged result), or to the object itself.
+    When a list does not fit, as many records as fit are returned together with
+    a continuation handle to pass back for the next records. When a single
+    object does not fit, long strings are shortened and the largest fields are
+    replaced by a note saying how to request them, down to fields smaller than
+    that note, so a very small budget may still be exceeded.
+
+    Args:
+        response: A {"result": ...} or error dictionary from codebeamer_interface
+        fields: Optional dotted paths of fields to keep, e.g. ["id", "status.name"]
+        max_tokens: Optional approximate token budget for the result
+        max_bytes: Optional byte budget for the result
+        continuation: Handle returned by a previous truncated call
+
+    Returns:
+        The shaped response dictionary
+    """
+    if "result" not in response:
+        return response
+    if max_tokens is None and max_bytes is None:
+        default = get_default_budget()
+        max_tokens, max_bytes = default["max_tokens"], default["max_bytes"]
+
+    result = response["result"]
+    records, key = _records(result)
+    tree = _field_tree(fields) if fields else {}
+    offset = 0
+    if continuation:
+        try:
+            offset = int(continuation)
+        except ValueError:
+            return {
+                "error": "Invalid continuation",
+                "details": f"Continuation {continuation!r} is not valid",
+            }
+
+    if records is not None:
+        records = _project(records[offset:], tree)
+    else:
+        result = _project(result, tree)
+
+    budgets = [b for b in (max_bytes, max_tokens and max_tokens * BYTES_PER_TOKEN) if b]
+    budget = min(budgets) if budgets else None
+
+    if records is None:
+        if (
+            budget is None
+            or not isinstance(result, dict)
+            or encoded_size(result) + ENVELOPE_BYTES <= budget
+        ):
+            return {"result": result}
+        summary, omitted = _summarise(result, budget)
+        return {"result": summary, "truncated": True, "omitted_fields": omitted}
+
+    fitting = len(records)
+    if budget is not None:
+        used = encoded_size(_with_records(result, key, [])) + ENVELOPE_BYTES
+        depth = 2 if key is None else 3
+        for index, record in enumerate(records):
+            used += encoded_size(record, depth) + 2 * depth + 2
+            if used > budget:
+                # Always return at least one record so continuations make progress
+                fitting = max(1, index)
+                break
+    shaped: Dict[str, Any] = {"result": _with_records(result, key, records[:fitting])}
+    if fitting < len(records):
+        shaped.update(
+            truncated=True,
+            returned=fitting,
+            remaining=len(records) - fitting,
+            continuation=str(offset + fitting),
+        )
+    return shaped
@@ -0,0 +1,303 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List
+
+import codebeamer_interface
+from codebeamer_interface import CodebeamerError
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it of on or that the this to was "
+    "were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text, without stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over tracker items, ranked with BM25.
+
+    Each item is one document made of its name, description and comment texts.
+    Documents can be added, replaced and removed one at a time, so the index is
+    kept current by re-indexing only the items that changed.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._doc_length: Dict[int, int] = {}
+        self._doc_meta: Dict[int, tuple] = {}
+        self._total_length = 0
+        # Newest modifiedAt indexed per tracker, used for incremental updates
+        self.last_modified: Dict[int, str | None] = {}
+        # Hash of the comment texts indexed per item, to notice new comments
+        self.comment_hashes: Dict[int, int] = {}
+        # Trackers the update loop is asked to index, and the errors of failed attempts
+        self.requested: set[int] = set()
+        self.failures: Dict[int, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._doc_length)
+
+    def tracker_ids(self) -> List[int]:
+        return sorted(self.last_modified)
+
+    def request(self, tracker_id: int) -> None:
+        """Ask the update loop to index a tracker as soon as it can, without waiting."""
+        self.failures.pop(tracker_id, None)
+        self.requested.add(tracker_id)
+        self._wakeup.set()
+
+    def add(
+        self, item_id: int, tracker_id: int, name: str, texts: Iterable[str]
+    ) -> None:
+        """Index an item, replacing any previously indexed version of it."""
+        self.remove(item_id)
+        tokens = tokenize(name or "")
+        for text in texts:
+            tokens.extend(tokenize(text or ""))
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[item_id] = frequency
+        self._doc_terms[item_id] = list(frequencies)
+        self._doc_length[item_id] = len(tokens)
+        self._doc_meta[item_id] = (tracker_id, name)
+        self._total_length += len(tokens)
+
+    def remove(self, item_id: int) -> None:
+        terms = self._doc_terms.pop(item_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[item_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_length.pop(item_id)
+        del self._doc_meta[item_id]
+        self.comment_hashes.pop(item_id, None)
+
+    def item_ids(self, tracker_id: int) -> List[int]:
+        return [
+            item_id for item_id, meta in self._doc_meta.items() if meta[0] == tracker_id
+        ]
+
+    def search(
+        self, query: str, tracker_id: int | None = None, top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the best matching items for a free-text query.
+
+        Args:
+            query: Words to search for
+            tracker_id: Only return items of this tracker (optional)
+            top_k: Maximum number of results (default: 10)
+
+        Returns:
+            List of {"item_id", "tracker_id", "name", "score"} dictionaries, best first
+        """
+        documents = len(self._doc_length)
+        if not documents:
+            return []
+        average_length = self._total_length / documents
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for item_id, frequency in postings.items():
+                if tracker_id is not None and self._doc_meta[item_id][0] != tracker_id:
+                    continue
+                norm = self.k1 * (
+                    1 - self.b + self.b * self._doc_length[item_id] / average_length
+                )
+                scores[item_id] = scores.get(item_id, 0.0) + idf * frequency * (
+                    self.k1 + 1
+                ) / (frequency + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda entry: entry[1])
+        return [
+            {
+                "item_id": item_id,
+                "tracker_id": self._doc_meta[item_id][0],
+                "name": self._doc_meta[item_id][1],
+                "score": round(score, 4),
+            }
+            for item_id, score in best
+        ]
+
+
+async def index_tracker(
+    index: SearchIndex,
+    tracker_id: int,
+    refresh_comments: bool = False,
+    comment_concurrency: int = 8,
+) -> Dict[str, int]:
+    """
+    Bring a tracker's items up to date in the search index.
+
+    Only items modified since the newest modifiedAt already indexed are fetched
+    (see codebeamer_interface.get_tracker_changes), together with their comments;
+    the first call indexes every item. Items deleted in Codebeamer are dropped.
+
+    A new comment does not change an item's modifiedAt, so with `refresh_comments`
+    the comments of the other indexed items are read again as well, which
+    conditional GETs keep cheap, and items whose comments changed are re-indexed.
+
+    Returns:
+        Dictionary with the number of items indexed and removed
+    """
+    since = index.last_modified.get(tracker_id)
+    item_ids, items = await codebeamer_interface.get_tracker_changes(tracker_id, since)
+    semaphore = asyncio.Semaphore(comment_concurrency)
+
+    async def comment_texts(item_id: int) -> List[str]:
+        async with semaphore:
+            response = await codebeamer_interface.get_tracker_item_comments(item_id)
+        comments = response.get("result") or []
+        return [c.get("comment", "") for c in comments if isinstance(c, dict)]
+
+    async def read_comments(ids: List[int]) -> Dict[int, List[str]]:
+        with codebeamer_interface.upstream_only():
+            texts = await asyncio.gather(*(comment_texts(i) for i in ids))
+        return dict(zip(ids, texts))
+
+    comments = await read_comments([item["id"] for item in items])
+    if refresh_comments:
+        indexed = set(index.item_ids(tracker_id))
+        unchanged = [i for i in item_ids if i in indexed and i not in comments]
+        commented = {
+            item_id: texts
+            for item_id, texts in (await read_comments(unchanged)).items()
+            if hash(tuple(texts)) != index.comment_hashes.get(item_id)
+        }
+        if commented:
+            with codebeamer_interface.upstream_only():
+                bulk = await codebeamer_interface.get_tracker_items_bulk(
+                    list(commented)
+                )
+            items.extend(
+                entry["result"] for entry in bulk["result"] if "result" in entry
+            )
+            comments.update(commented)
+
+    for item in items:
+        texts = comments.get(item["id"], [])
+        index.add(
+            item["id"],
+            tracker_id,
+            item.get("name", ""),
+            [item.get("description") or "", *texts],
+        )
+        index.comment_hashes[item["id"]] = hash(tuple(texts))
+    existing = set(item_ids)
+    removed = [
+        item_id for item_id in index.item_ids(tracker_id) if item_id not in existing
+    ]
+    for item_id in removed:
+        index.remove(item_id)
+
+    index.last_modified[tracker_id] = max(
+        filter(None, [since, *(item.get("modifiedAt") for item in items)]), default=None
+    )
+    return {"indexed": len(items), "removed": len(removed)}
+
+
+async def run_index_loop(
+    index: SearchIndex, interval: float, tracker_ids: List[int]
+) -> None:
+    """
+    Keep the index up to date in the background.
+
+    The given trackers, and those indexed on request, are updated every `interval`
+    seconds. A tracker requested in between is indexed as soon as it is requested.
+    """
+    next_round = time.monotonic()
+    while True:
+        full_round = time.monotonic() >= next_round
+        if full_round:
+            trackers = set(tracker_ids) | set(index.tracker_ids()) | index.requested
+            next_round = time.monotonic() + interval
+        else:
+            trackers = set(index.requested)
+        # Cleared first so a tracker requested while this round runs wakes the next one
+        index._wakeup.clear()
+        started = time.perf_counter()
+        for tracker_id in sorted(trackers):
+            try:
+                await index_tracker(index, tracker_id, refresh_comments=full_round)
+            except CodebeamerError as e:
+                index.failures[tracker_id] = e.error
+                logger.error(f"Indexing tracker {tracker_id} failed: {e}")
+            except Exception as e:
+                index.failures[tracker_id] = {
+                    "error": "Indexing failed",
+                    "details": str(e),
+                }
+                logger.error(f"Indexing tracker {tracker_id} failed: {e}")
+            finally:
+                index.requested.discard(tracker_id)
+        if full_round:
+            logger.info(
+                "Search index update finished in %.1fs: %d items",
+                time.perf_counter() - started,
+                len(index),
+            )
+        try:
+            await asyncio.wait_for(
+                index._wakeup.wait(), max(0.0, next_round - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+@asynccontextmanager
+async def search_index_updates_from_env(
+    index: SearchIndex,
+) -> AsyncIterator[SearchIndex]:
+    """
+    Keep the index updated in the background for the duration of the context.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_SEARCH_TRACKER_IDS: Comma-separated trackers to index (default: none)
+    - CODEBEAMER_SEARCH_INDEX_INTERVAL: Seconds between updates (default: 300)
+    """
+    load_config()
+    tracker_ids = [
+        int(t)
+        for t in os.getenv("CODEBEAMER_SEARCH_TRACKER_IDS", "").split(",")
+        if t.strip()
+    ]
+    update_task = asyncio.create_task(
+        run_index_loop(
+            index,
+            float(os.getenv("CODEBEAMER_SEARCH_INDEX_INTERVAL", "300")),
+            tracker_ids,
+        )
+    )
+    try:
+        yield index
+    finally:
+        update_task.cancel()
@@ -0,0 +1,170 @@
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Mapping
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Spans waiting to be exported before new ones are dropped, and spans written per export
+SPAN_QUEUE_SIZE = 16384
+SPAN_BATCH_SIZE = 2048
+
+_tracer = None
+_provider = None
+# File written by the "file" exporter, closed once the provider has flushed to it
+_trace_file = None
+# opentelemetry is optional and only imported once tracing is configured
+_propagate = None
+_trace = None
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled, so callers need no checks."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def configure_tracing(
+    exporter: str, path: str = "traces.jsonl", sample_ratio: float = 1.0
+) -> bool:
+    """
+    Start exporting spans of tool calls and Codebeamer requests.
+
+    Spans are exported in batches from a queue of SPAN_QUEUE_SIZE spans, sized so
+    the file exporter keeps up with every call traced at ratio 1.0. Spans created
+    while the queue is full are dropped, which the SDK logs as "Queue full,
+    dropping Span."; lower the sample ratio when that happens.
+
+    Args:
+        exporter: "console" to print spans, or "file" to append them as JSON to `path`
+        path: File written by the "file" exporter (default: traces.jsonl)
+        sample_ratio: Share of new traces that are recorded (default: 1.0)
+
+    Returns:
+        Whether tracing was enabled; it needs the opentelemetry-sdk package
+    """
+    global _tracer, _provider, _propagate, _trace, _trace_file
+    try:
+        from opentelemetry import propagate, trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("opentelemetry-sdk is not installed, tracing is disabled")
+        return False
+
+    if exporter not in ("file", "console"):
+        raise ValueError(f"Unknown tracing exporter {exporter!r}")
+    shutdown_tracing()
+    if exporter == "file":
+        _trace_file = open(path, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(
+            out=_trace_file, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    else:
+        span_exporter = ConsoleSpanExporter()
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": "codebeamer-mcp"}),
+        # Follow the caller's sampling decision, sample new traces by ratio
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    _provider.add_span_processor(
+        BatchSpanProcessor(
+            span_exporter,
+            max_queue_size=SPAN_QUEUE_SIZE,
+            schedule_delay_millis=1000,
+            max_export_batch_size=SPAN_BATCH_SIZE,
+        )
+    )
+    _tracer = _provider.get_tracer(__name__)
+    _propagate, _trace = propagate, trace
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans, stop tracing and close the file of the "file" exporter."""
+    global _tracer, _provider, _trace_file
+    if _provider is not None:
+        _provider.shutdown()
+    if _trace_file is not None:
+        _trace_file.close()
+    _tracer = None
+    _provider = None
+    _trace_file = None
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Dict[str, Any] | None = None,
+    carrier: Mapping[str, str] | None = None,
+) -> Iterator[Any]:
+    """
+    Run the body in a span, child of the current span or of the context in `carrier`.
+
+    Args:
+        name: Span name
+        kind: "internal", "server" or "client"
+        attributes: Initial span attributes (optional)
+        carrier: Incoming headers holding a traceparent to continue (optional)
+
+    Returns:
+        The span, or a no-op stand-in while tracing is disabled
+    """
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+    context = _propagate.extract(carrier) if carrier is not None else None
+    with _tracer.start_as_current_span(
+        name,
+        context=context,
+        kind=getattr(_trace.SpanKind, kind.upper()),
+        attributes=attributes,
+    ) as span:
+        yield span
+
+
+def inject_trace_context(headers: Dict[str, str]) -> None:
+    """Add the traceparent of the current span to outgoing request headers."""
+    if _tracer is not None:
+        _propagate.inject(headers)
+
+
+@asynccontextmanager
+async def tracing_from_env() -> AsyncIterator[bool]:
+    """
+    Enable tracing, as configured by environment variables, within the context.
+
+    Reads settings from environment variables:
+    - CODEBEAMER_TRACING_EXPORTER: "console" or "file", unset disables tracing
+    - CODEBEAMER_TRACING_FILE: File of the "file" exporter (default: traces.jsonl)
+    - CODEBEAMER_TRACING_SAMPLE_RATIO: Share of traces recorded, 0 to 1 (default: 1.0)
+    """
+    load_config()
+    exporter = os.getenv("CODEBEAMER_TRACING_EXPORTER", "")
+    enabled = bool(exporter) and configure_tracing(
+        exporter,
+        os.getenv("CODEBEAMER_TRACING_FILE", "traces.jsonl"),
+        float(os.getenv("CODEBEAMER_TRACING_SAMPLE_RATIO", "1.0")),
+    )
+    if enabled:
+        logger.info(f"Tracing enabled with the {exporter} exporter")
+    try:
+        yield enabled
+    finally:
+        shutdown_tracing()
@@ -0,0 +1,45 @@
+"""
+Shared fixtures of the tests, which run the client against the benchmarks' stub.
+"""
+
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "servers"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from codebeamer_stub import StubDataset, run_stub_in_thread  # noqa: E402
+from response_cache import ValidatorStore  # noqa: E402
+
+import codebeamer_interface  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Serve a fresh stub and point the client at it, without a response cache."""
+
+    def serve(**app_kwargs):
+        port = free_port()
+        monkeypatch.setenv("CODEBEAMER_BASE_URL", f"http://127.0.0.1:{port}")
+        monkeypatch.setenv("CODEBEAMER_API_TOKEN", "test")
+        codebeamer_interface.set_credentials_provider(None)
+        codebeamer_interface.set_response_cache(None)
+        codebeamer_interface.set_rate_limiter(None)
+        codebeamer_interface.set_mirror(None)
+        codebeamer_interface.set_validator_store(ValidatorStore())
+        app_kwargs.setdefault("dataset", StubDataset(items_per_tracker=5))
+        return run_stub_in_thread(port=port, **app_kwargs)
+
+    yield serve
+    codebeamer_interface.set_credentials_provider(None)
+    codebeamer_interface.set_validator_store(None)
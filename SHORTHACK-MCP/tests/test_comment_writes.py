@@ -0,0 +1,97 @@
+"""
+Tests of bulk comment writes: read-back after lost answers and cancelled writes.
+
+Usage:
+    python -m pytest tests/test_comment_writes.py
+"""
+
+import asyncio
+
+import codebeamer_interface
+
+ITEM_ID = 10100001
+
+
+def test_lost_answer_is_matched_to_this_write_only(stub, monkeypatch):
+    monkeypatch.setenv("CODEBEAMER_WRITE_MAX_ATTEMPTS", "2")
+    with stub(lost_response_rate=1.0) as app:
+        # An identical comment posted long before must not be taken for this write
+        old = {
+            "id": 1,
+            "comment": "checked",
+            "commentFormat": "PlainText",
+            "createdAt": "2024-06-01T09:00:00.000",
+        }
+        app.state.dataset.comments[ITEM_ID] = [old]
+        response = asyncio.run(
+            codebeamer_interface.post_tracker_item_comments(
+                [
+                    {
+                        "item_id": ITEM_ID,
+                        "comment_text": "checked",
+                        "idempotency_key": "lost-answer",
+                    }
+                ]
+            )
+        )
+        entry = response["result"][0]
+        assert entry["status"] == "created"
+        assert entry["result"]["id"] == 2
+        assert len(app.state.dataset.comments[ITEM_ID]) == 2
+
+
+def test_cancelled_write_resolves_and_releases_its_key(monkeypatch):
+    async def scenario() -> dict:
+        started = asyncio.Event()
+
+        async def hang(*args):
+            started.set()
+            await asyncio.sleep(3600)
+
+        monkeypatch.setattr(codebeamer_interface, "_post_comment_with_retries", hang)
+        queue = await codebeamer_interface.open_write_queue(concurrency=1)
+        try:
+            batch = asyncio.create_task(
+                codebeamer_interface.post_tracker_item_comments(
+                    [
+                        {
+                            "item_id": ITEM_ID,
+                            "comment_text": "never sent",
+                            "idempotency_key": "cancelled",
+                        }
+                    ]
+                )
+            )
+            await started.wait()
+            for worker in queue._workers:
+                worker.cancel()
+            return await asyncio.wait_for(batch, 5)
+        finally:
+            await codebeamer_interface.close_write_queue()
+
+    response = asyncio.run(scenario())
+    entry = response["result"][0]
+    assert entry["status"] == "failed" and entry["error"] == "Cancelled"
+    assert "cancelled" not in codebeamer_interface._pending_writes
+
+
+def test_same_text_without_a_key_is_posted_again_by_a_later_call(stub):
+    comment = {"item_id": ITEM_ID, "comment_text": "Reviewed, OK"}
+    with stub() as app:
+        first = asyncio.run(
+            codebeamer_interface.post_tracker_item_comments([comment, comment])
+        )
+        second = asyncio.run(codebeamer_interface.post_tracker_item_comments([comment]))
+        assert len(app.state.dataset.comments[ITEM_ID]) == 2
+    # Within one call the derived key still posts identical entries once
+    assert first["summary"] == {"created": 1, "duplicate": 1, "failed": 0}
+    assert second["summary"] == {"created": 1, "duplicate": 0, "failed": 0}
+
+
+def test_given_key_is_not_posted_again_by_a_later_call(stub):
+    comment = {"item_id": ITEM_ID, "comment_text": "Reviewed", "idempotency_key": "r1"}
+    with stub() as app:
+        asyncio.run(codebeamer_interface.post_tracker_item_comments([comment]))
+        again = asyncio.run(codebeamer_interface.post_tracker_item_comments([comment]))
+        assert len(app.state.dataset.comments[ITEM_ID]) == 1
+    assert again["result"][0]["status"] == "duplicate"
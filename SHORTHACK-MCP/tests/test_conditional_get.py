@@ -0,0 +1,88 @@
+"""
+Tests of conditional GET revalidation against the Codebeamer stub.
+
+Usage:
+    python -m pytest tests/test_conditional_get.py
+"""
+
+import asyncio
+
+import codebeamer_interface
+
+ITEM_ID = 10100001
+
+
+def get_item() -> dict:
+    return asyncio.run(codebeamer_interface.get_tracker_item(ITEM_ID))
+
+
+def saved() -> tuple:
+    stats = codebeamer_interface.get_request_stats()
+    return stats["not_modified"], stats["bytes_saved"]
+
+
+def test_etag_is_sent_and_304_returns_the_stored_body(stub):
+    with stub() as app:
+        first = get_item()
+        etag, last_modified, body_size, result = (
+            codebeamer_interface.get_validator_store().get(f"items/{ITEM_ID}")
+        )
+        assert etag and last_modified and result == first
+
+        not_modified, bytes_saved = saved()
+        # The stub only answers 304 when If-None-Match carries exactly the ETag it sent
+        assert get_item() == first
+        assert app.state.stats["not_modified"] == 1
+        assert saved() == (not_modified + 1, bytes_saved + body_size)
+
+
+def test_last_modified_is_sent_when_there_is_no_etag(stub):
+    with stub(etags=False) as app:
+        first = get_item()
+        etag, last_modified, body_size, _ = (
+            codebeamer_interface.get_validator_store().get(f"items/{ITEM_ID}")
+        )
+        assert etag is None and last_modified
+
+        not_modified, bytes_saved = saved()
+        # Without an ETag, a 304 needs an If-Modified-Since no older than the item
+        assert get_item() == first
+        assert app.state.stats["not_modified"] == 1
+        assert saved() == (not_modified + 1, bytes_saved + body_size)
+
+
+def test_changed_etag_replaces_the_stored_body(stub):
+    with stub() as app:
+        first = get_item()
+        etag = codebeamer_interface.get_validator_store().get(f"items/{ITEM_ID}")[0]
+
+        app.state.dataset.touch(ITEM_ID, "2026-01-01T00:00:00.000")
+        changed = get_item()
+        assert changed != first
+        assert changed["result"]["modifiedAt"] == "2026-01-01T00:00:00.000"
+        assert app.state.stats["not_modified"] == 0
+        new_etag, _, _, result = codebeamer_interface.get_validator_store().get(
+            f"items/{ITEM_ID}"
+        )
+        assert new_etag != etag and result == changed
+
+        # The next revalidation matches the new ETag and serves the new body
+        assert get_item() == changed
+        assert app.state.stats["not_modified"] == 1
+
+
+def test_writes_drop_the_validators(stub):
+    with stub():
+        endpoint = f"items/{ITEM_ID}/comments"
+        asyncio.run(codebeamer_interface.get_tracker_item_comments(ITEM_ID))
+        assert codebeamer_interface.get_validator_store().get(endpoint) is not None
+        asyncio.run(
+            codebeamer_interface.post_tracker_item_comment(
+                ITEM_ID, "revalidation check"
+            )
+        )
+        assert codebeamer_interface.get_validator_store().get(endpoint) is None
+        comments = asyncio.run(codebeamer_interface.get_tracker_item_comments(ITEM_ID))
+        assert [comment["comment"] for comment in comments["result"]] == [
+            "revalidation check"
+        ]
@@ -0,0 +1,57 @@
+"""
+Tests of the MCP tools' batching and field selection.
+
+Usage:
+    python -m pytest tests/test_mcp_tools.py
+"""
+
+import asyncio
+
+import mcp_server
+from codebeamer_stub import StubDataset
+
+
+def test_bulk_fields_are_dotted_paths(stub):
+    with stub():
+        response = asyncio.run(
+            mcp_server.mcp_get_tracker_items_bulk(
+                [10100001, 10199999], fields=["id", "status.name"]
+            )
+        )
+    found, missing = response["result"]
+    assert found == {
+        "item_id": 10100001,
+        "result": {"id": 10100001, "status": {"name": "In Progress"}},
+    }
+    assert (
+        missing["item_id"] == 10199999
+        and missing["status_code"] == 404
+        and "error" in missing
+    )
+
+
+def test_iter_cursor_never_returns_more_than_the_limit(stub):
+    async def batch(cursor: str | None, limit: int) -> dict:
+        return (
+            await mcp_server.mcp_iter_tracker_items(101, cursor=cursor, limit=limit)
+        )["result"]
+
+    async def scenario() -> list:
+        first = await batch(None, 4)
+        # The cursor's pages hold 4 items, more than this call takes
+        second = await batch(first["next_cursor"], 3)
+        third = await batch(second["next_cursor"], 10)
+        return [first, second, third]
+
+    with stub(dataset=StubDataset(items_per_tracker=12)):
+        first, second, third = asyncio.run(scenario())
+    ids = [
+        [item["id"] - 10100000 for item in batch["items"]]
+        for batch in (first, second, third)
+    ]
+    assert ids == [[1, 2, 3, 4], [5, 6, 7], [8, 9, 10, 11, 12]]
+    assert [first["next_cursor"], second["next_cursor"], third["next_cursor"]] == [
+        "2:4",
+        "2:4:3",
+        None,
+    ]
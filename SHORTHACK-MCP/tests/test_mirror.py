@@ -0,0 +1,32 @@
+"""
+Tests of syncing the local mirror when part of Codebeamer cannot be read.
+
+Usage:
+    python -m pytest tests/test_mirror.py
+"""
+
+import asyncio
+
+from codebeamer_mirror import CodebeamerMirror, sync
+from codebeamer_stub import StubDataset
+
+
+def test_failing_project_and_tracker_do_not_stop_the_sync(stub, tmp_path):
+    dataset = StubDataset(projects=2, trackers_per_project=2, items_per_tracker=5)
+    forbidden = ["/v3/projects/1/trackers", "/v3/trackers/201/items"]
+    mirror = CodebeamerMirror(str(tmp_path / "mirror.db"))
+    try:
+        with stub(dataset=dataset, forbidden_paths=forbidden):
+            totals = asyncio.run(sync(mirror))
+        assert totals["trackers"] == 1 and totals["updated"] == 5
+        assert [
+            (failure.get("project_id"), failure.get("tracker_id"))
+            for failure in totals["failed"]
+        ] == [(1, None), (None, 201)]
+        assert {failure["status_code"] for failure in totals["failed"]} == {403}
+
+        assert mirror.get_trackers(2, max_staleness=60) is not None
+        assert mirror.get_tracker_item_refs(201, max_staleness=60) is None
+        assert len(mirror.get_tracker_item_refs(202, max_staleness=60)) == 5
+    finally:
+        mirror.close()
@@ -0,0 +1,49 @@
+"""
+Tests of what the response cache keeps.
+
+Usage:
+    python -m pytest tests/test_response_cache.py
+"""
+
+import asyncio
+
+import codebeamer_interface
+from response_cache import TTLLRUCache
+
+
+async def stream_tracker(tracker_id: int) -> list:
+    return [
+        ref["id"]
+        async for ref in codebeamer_interface.iter_tracker_items(
+            tracker_id, page_size=2
+        )
+    ]
+
+
+def test_streamed_pages_are_not_cached(stub):
+    cache = TTLLRUCache()
+    with stub():
+        codebeamer_interface.set_response_cache(cache)
+        try:
+            assert len(asyncio.run(stream_tracker(101))) == 5
+            assert cache.stats()["size"] == 0
+            assert (
+                codebeamer_interface.get_validator_store().get(
+                    "trackers/101/items?page=1&pageSize=2"
+                )
+                is None
+            )
+
+            # A page read on its own is still cached
+            asyncio.run(
+                codebeamer_interface.get_tracker_items(101, page=1, page_size=2)
+            )
+            assert cache.stats()["size"] == 1
+            assert (
+                codebeamer_interface.get_validator_store().get(
+                    "trackers/101/items?page=1&pageSize=2"
+                )
+                is not None
+            )
+        finally:
+            codebeamer_interface.set_response_cache(None)
@@ -0,0 +1,82 @@
+"""
+Tests of searching trackers that are indexed in the background.
+
+Usage:
+    python -m pytest tests/test_search_index.py
+"""
+
+import asyncio
+
+import mcp_server
+from search_index import SearchIndex, index_tracker, run_index_loop
+
+ITEM_ID = 10100002
+
+
+def test_search_does_not_wait_for_the_index(stub, monkeypatch):
+    index = SearchIndex()
+    monkeypatch.setattr(mcp_server, "search_index", index)
+
+    async def scenario() -> tuple:
+        updates = asyncio.create_task(run_index_loop(index, 3600, []))
+        try:
+            first = await mcp_server.mcp_search_items("requirement", tracker_id=101)
+            while 101 in index.requested:
+                await asyncio.sleep(0.01)
+            return first, await mcp_server.mcp_search_items(
+                "requirement", tracker_id=101
+            )
+        finally:
+            updates.cancel()
+
+    with stub():
+        first, second = asyncio.run(scenario())
+    assert first["error"] == "Index not built"
+    assert len(second["result"]) == 5
+    assert {match["tracker_id"] for match in second["result"]} == {101}
+
+
+def test_failed_indexing_is_reported(stub, monkeypatch):
+    index = SearchIndex()
+    monkeypatch.setattr(mcp_server, "search_index", index)
+
+    async def scenario() -> list:
+        updates = asyncio.create_task(run_index_loop(index, 3600, []))
+        try:
+            responses = [
+                await mcp_server.mcp_search_items("requirement", tracker_id=101)
+            ]
+            while 101 in index.requested:
+                await asyncio.sleep(0.01)
+            responses.append(
+                await mcp_server.mcp_search_items("requirement", tracker_id=101)
+            )
+            responses.append(
+                await mcp_server.mcp_search_items("requirement", tracker_id=101)
+            )
+            return responses
+        finally:
+            updates.cancel()
+
+    with stub(authorization="Bearer other"):
+        requested, failed, again = asyncio.run(scenario())
+    assert requested["error"] == "Index not built"
+    assert failed["status_code"] == 401
+    assert again["error"] == "Index not built"
+
+
+def test_new_comment_on_an_unchanged_item_is_indexed(stub):
+    index = SearchIndex()
+    with stub() as app:
+        asyncio.run(index_tracker(index, 101))
+        assert index.search("zebra") == []
+
+        app.state.dataset.comments[ITEM_ID] = [
+            {"id": 1, "comment": "Zebra crossing", "commentFormat": "PlainText"}
+        ]
+        # The item's modifiedAt did not move, so only a comment refresh finds it
+        asyncio.run(index_tracker(index, 101))
+        assert index.search("zebra") == []
+        asyncio.run(index_tracker(index, 101, refresh_comments=True))
+    assert [match["item_id"] for match in index.search("zebra")] == [ITEM_ID]
+    assert len(index) == 5
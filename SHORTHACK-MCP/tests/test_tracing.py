@@ -0,0 +1,39 @@
+"""
+Tests of the file span exporter.
+
+Usage:
+    python -m pytest tests/test_tracing.py
+"""
+
+import json
+
+import pytest
+import tracing
+
+pytest.importorskip("opentelemetry.sdk")
+
+
+def test_shutdown_flushes_and_closes_the_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    assert tracing.configure_tracing("file", str(path))
+    trace_file = tracing._trace_file
+    for number in range(3):
+        with tracing.start_span(f"span {number}"):
+            pass
+    tracing.shutdown_tracing()
+    assert trace_file.closed and tracing._trace_file is None
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == [
+        "span 0",
+        "span 1",
+        "span 2",
+    ]
+
+
+def test_reconfiguring_closes_the_previous_file(tmp_path):
+    assert tracing.configure_tracing("file", str(tmp_path / "first.jsonl"))
+    first = tracing._trace_file
+    try:
+        assert tracing.configure_tracing("file", str(tmp_path / "second.jsonl"))
+        assert first.closed and not tracing._trace_file.closed
+    finally:
+        tracing.shutdown_tracing()